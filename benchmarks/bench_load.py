@@ -0,0 +1,483 @@
+"""Last-Benchmark der Check-Pipeline gegen eine lokale Farm simulierter Websites.
+
+Aufruf (aus dem Projekt-Root):
+
+    python benchmarks/bench_load.py [--sites 100 1000 10000] [--output ergebnis.json]
+    python benchmarks/bench_load.py --compare alt.json --output neu.json
+
+Ein eigener Prozess startet einen aiohttp-Server, der beliebig viele virtuelle
+Websites unter /s/<nr> beantwortet, verteilt auf mehrere Loopback-Adressen
+(127.0.1.x), damit die Limits pro Host wie bei echten Websites greifen. Jede
+Website hat ein Profil: normale Antwortzeit aus einer Verteilung, zufällige
+Fehler, dauerhafte Timeouts oder Flapping (wechselt periodisch online/offline).
+
+Gegen die Farm läuft die echte Pipeline (ConcurrentChecker, SiteScheduler,
+SiteMonitor, CheckHistory, AsyncDatabase in einer temporären Datei); statt an
+Discord gehen Statuswechsel an einen Stub. Gemessen wird pro Anzahl Websites:
+
+- ein vollständiger Durchlauf aller Websites (Dauer, Checks pro Sekunde)
+- Dauerbetrieb mit dem Scheduler (Verzögerung bis ein Flapping erkannt wird,
+  Lag der Event-Loop, übersprungene Checks)
+- Speicher pro Website für den Zustand im Monitor (tracemalloc)
+
+Alles läuft offline; die Ergebnisse werden als JSON geschrieben, damit sie
+zwischen Commits verglichen werden können.
+"""
+import os
+import sys
+import json
+import math
+import time
+import random
+import asyncio
+import argparse
+import platform
+import tempfile
+import tracemalloc
+import subprocess
+import multiprocessing
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from aiohttp import web  # noqa: E402
+
+import logger  # noqa: E402
+
+from checker import ConcurrentChecker, CheckResult  # noqa: E402
+from database import AsyncDatabase  # noqa: E402
+from history import CheckHistory  # noqa: E402
+from http_client import HttpClient  # noqa: E402
+from monitor import SiteMonitor  # noqa: E402
+from policy import CheckPolicy  # noqa: E402
+from scheduler import SiteScheduler  # noqa: E402
+from tracing import RequestTiming  # noqa: E402
+
+NORMAL = "normal"
+TIMEOUT = "timeout"
+FLAP = "flap"
+
+
+# Profile der virtuellen Websites
+
+def parse_latency(spec):
+    """'const:50', 'uniform:10:200' oder 'lognormal:50:0.6' (Median in ms, Sigma)"""
+    kind, *params = spec.split(":")
+    params = [float(p) for p in params]
+    if kind == "const" and len(params) == 1:
+        return kind, params
+    if kind == "uniform" and len(params) == 2:
+        return kind, params
+    if kind == "lognormal" and len(params) == 2:
+        return kind, [math.log(params[0]), params[1]]
+    raise ValueError(f"Ungültige Latenz-Verteilung: {spec}")
+
+
+def sample_latency(rng, latency):
+    kind, params = latency
+    if kind == "const":
+        ms = params[0]
+    elif kind == "uniform":
+        ms = rng.uniform(params[0], params[1])
+    else:
+        ms = rng.lognormvariate(params[0], params[1])
+    return ms / 1000
+
+
+def build_profiles(count, args):
+    """(Art, Periode, Phase) pro Website, reproduzierbar über --seed.
+
+    Flapping-Websites wechseln alle `Periode` Sekunden zwischen online und offline.
+    """
+    rng = random.Random(args.seed)
+    profiles = []
+    for _ in range(count):
+        roll = rng.random()
+        if roll < args.timeout_rate:
+            profiles.append((TIMEOUT, 0.0, 0.0))
+        elif roll < args.timeout_rate + args.flap_rate:
+            period = rng.uniform(2, 4) * args.interval
+            profiles.append((FLAP, period, rng.uniform(0, period)))
+        else:
+            profiles.append((NORMAL, 0.0, 0.0))
+    return profiles
+
+
+def flap_state(profile, t0, now):
+    """Erwarteter Zustand einer Flapping-Website und Zeitpunkt des letzten Wechsels"""
+    _, period, phase = profile
+    index = int((now - t0 + phase) // period)
+    return index % 2 == 0, t0 - phase + index * period
+
+
+def host_addresses(count):
+    # Unter Linux ist das ganze 127.0.0.0/8 lokal erreichbar, sonst nur 127.0.0.1
+    if sys.platform.startswith("linux"):
+        return [f"127.0.1.{i + 1}" for i in range(min(count, 254))]
+    return ["127.0.0.1"]
+
+
+# Farm (eigener Prozess, damit sie nicht die Event-Loop der Pipeline belastet)
+
+def run_farm(profiles, addresses, args, t0, ready):
+    rng = random.Random(args.seed + 1)
+    timeout_sleep = args.timeout + 1
+
+    async def handle(request):
+        profile = profiles[int(request.match_info["site"])]
+        kind = profile[0]
+        if kind == TIMEOUT:
+            await asyncio.sleep(timeout_sleep)
+            return web.Response(text="zu spät")
+        await asyncio.sleep(sample_latency(rng, args.latency_dist))
+        if kind == FLAP and not flap_state(profile, t0, time.time())[0]:
+            return web.Response(status=503, text="down")
+        if rng.random() < args.error_rate:
+            return web.Response(status=500, text="error")
+        return web.Response(text="ok")
+
+    async def serve():
+        app = web.Application()
+        app.router.add_get("/s/{site}", handle)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        first = web.TCPSite(runner, addresses[0], 0)
+        await first.start()
+        port = runner.addresses[0][1]
+        for address in addresses[1:]:
+            await web.TCPSite(runner, address, port).start()
+        ready.put(port)
+        await asyncio.Event().wait()
+
+    asyncio.run(serve())
+
+
+# Pipeline
+
+class StubNotifier:
+    """Ersetzt den Discord-Client: merkt sich nur die Statuswechsel"""
+
+    def __init__(self):
+        self.events = []  # (url, online, erkannt um)
+
+    async def notify(self, url, online):
+        self.events.append((url, online, time.time()))
+
+
+class Pipeline:
+    """Verarbeitet Check-Ergebnisse wie handle_result in bot.py (mit CheckPolicy, ohne Discord)"""
+
+    def __init__(self, monitor, policy, history, notifier):
+        self.monitor = monitor
+        self.policy = policy
+        self.history = history
+        self.notifier = notifier
+        self.checks = 0
+
+    async def handle(self, result):
+        url = result.url
+        previous_status = self.monitor.sites.get(url)
+        state = self.monitor.get_state(url)
+        self.history.record(result)
+        if result.timing is not None:
+            state.add_timing(result.timing)
+        self.checks += 1
+
+        decision = self.policy.observe(url, result.ok, previous_status, result.checked_at)
+        if result.ok:
+            state.up += 1
+            if result.response_time is not None:
+                state.latency.add(result.response_time)
+        else:
+            state.down += 1
+        self.monitor.set_status(url, decision.status)
+
+        if decision.changed:
+            if decision.status:
+                self.history.incident_ended(url, result.checked_at)
+            else:
+                self.history.incident_started(url, result.checked_at, result.reason)
+            # Erkennung messen, auch wenn die Policy die Meldung unterdrückt (Flapping)
+            await self.notifier.notify(url, decision.status)
+
+
+class LoopLag:
+    """Misst, wie viel später als geplant ein kurzer Sleep zurückkehrt"""
+
+    def __init__(self, interval=0.05):
+        self.interval = interval
+        self.samples = []
+        self._task = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            self.samples.append(max(0.0, loop.time() - start - self.interval))
+
+    def start(self):
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+
+    def summary(self):
+        return {
+            "p50_ms": percentile(self.samples, 0.5) * 1000,
+            "p99_ms": percentile(self.samples, 0.99) * 1000,
+            "max_ms": max(self.samples, default=0.0) * 1000,
+        }
+
+
+def percentile(values, q):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+async def measure_memory(db, count, args):
+    """Speicher für den Monitor-Zustand (Status, Stats, Scheduler-Job) pro Website"""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    scheduler = SiteScheduler(noop_check, default_interval=args.interval)
+    policy = CheckPolicy(scheduler)
+    monitor = SiteMonitor(db, scheduler, policy=policy)
+    await monitor.load()
+    history = CheckHistory(db)
+    pipeline = Pipeline(monitor, policy, history, StubNotifier())
+    rng = random.Random(args.seed)
+    now = time.time()
+    for step in range(args.memory_samples):
+        for url in monitor.sites:
+            timing = RequestTiming()
+            timing.dns, timing.connect, timing.ttfb = 0.0, 0.001, 0.03
+            timing.total = 0.031
+            latency = sample_latency(rng, args.latency_dist)
+            await pipeline.handle(CheckResult(url, status=200, response_time=latency, timing=timing, checked_at=now - step))
+        history._checks.clear()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return (after - before) / count
+
+
+async def check_all(checker, session, urls):
+    """Startet alle Checks gleichzeitig und liefert Ergebnisse sobald sie fertig sind"""
+    tasks = [asyncio.create_task(checker.check(session, url)) for url in urls]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        # Falls der Durchlauf abbricht, laufende Checks nicht verwaisen lassen
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+
+
+async def noop_check(url, timeout):
+    pass
+
+
+async def run_size(count, args):
+    profiles = build_profiles(count, args)
+    addresses = host_addresses(args.hosts)
+    urls = [f"http://{addresses[i % len(addresses)]}:{{port}}/s/{i}" for i in range(count)]
+    t0 = time.time()
+
+    ctx = multiprocessing.get_context("spawn")
+    ready = ctx.Queue()
+    farm = ctx.Process(target=run_farm, args=(profiles, addresses, args, t0, ready), daemon=True)
+    farm.start()
+    port = ready.get(timeout=30)
+    urls = [url.format(port=port) for url in urls]
+    profile_by_url = dict(zip(urls, profiles))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Logzeilen in das Temp-Verzeichnis, nicht in Logs/Bot.log
+        logger.LOG_DIR = tmp
+        logger.LOG_FILE = os.path.join(tmp, "Bot.log")
+        db = AsyncDatabase(os.path.join(tmp, "bench.db"))
+        await asyncio.gather(*(db.save_site(url) for url in urls))
+        http_client = HttpClient(limit=args.pool_limit, limit_per_host=args.pool_per_host)
+        checker = ConcurrentChecker(max_concurrency=args.concurrency, max_per_host=args.per_host, timeout=args.timeout)
+        notifier = StubNotifier()
+        history = CheckHistory(db)
+
+        async def run_check(url, timeout):
+            result = await checker.check(http_client.session, url, timeout=timeout, probe=monitor.probes.get(url))
+            await pipeline.handle(result)
+
+        scheduler = SiteScheduler(run_check, default_interval=args.interval, default_timeout=args.timeout)
+        policy = CheckPolicy(scheduler)
+        monitor = SiteMonitor(db, scheduler, policy=policy)
+        await monitor.load()
+        pipeline = Pipeline(monitor, policy, history, notifier)
+        history.start()
+
+        # 1) Ein vollständiger Durchlauf, so schnell wie die Limits es erlauben
+        lag = LoopLag()
+        lag.start()
+        start = time.perf_counter()
+        async for result in check_all(checker, http_client.session, list(monitor.sites)):
+            await pipeline.handle(result)
+        cycle_seconds = time.perf_counter() - start
+        await lag.stop()
+        cycle = {
+            "duration_s": cycle_seconds,
+            "probes_per_s": count / cycle_seconds,
+            "loop_lag": lag.summary(),
+        }
+
+        # 2) Dauerbetrieb über den Scheduler
+        notifier.events.clear()
+        checks_before = pipeline.checks
+        lag = LoopLag()
+        lag.start()
+        start = time.perf_counter()
+        scheduler.start()
+        await asyncio.sleep(args.duration)
+        await scheduler.stop()
+        steady_seconds = time.perf_counter() - start
+        await lag.stop()
+
+        delays = []
+        wrong = 0
+        for url, online, detected_at in notifier.events:
+            profile = profile_by_url[url]
+            if profile[0] != FLAP:
+                continue
+            expected, changed_at = flap_state(profile, t0, detected_at)
+            if expected != online:
+                wrong += 1
+                continue
+            delays.append(detected_at - changed_at)
+        steady = {
+            "duration_s": steady_seconds,
+            "checks": pipeline.checks - checks_before,
+            "probes_per_s": (pipeline.checks - checks_before) / steady_seconds,
+            "overruns": scheduler.overruns,
+            "loop_lag": lag.summary(),
+            "detections": len(delays),
+            "detection_mismatches": wrong,
+            "detection_delay_p50_s": percentile(delays, 0.5),
+            "detection_delay_p99_s": percentile(delays, 0.99),
+        }
+
+        await history.stop()
+        await http_client.close()
+        farm.terminate()
+        farm.join()
+
+        memory = await measure_memory(db, count, args)
+        await db.close()
+        logger.shutdown_log()
+
+    return {"sites": count, "cycle": cycle, "steady": steady, "memory_per_site_bytes": memory}
+
+
+def git_commit():
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True, text=True, check=True,
+        )
+        return out.stdout.strip()
+    except Exception:
+        return None
+
+
+def print_result(result):
+    cycle, steady = result["cycle"], result["steady"]
+    print(f"Websites: {result['sites']}")
+    print(f"  Durchlauf:        {cycle['duration_s']:.2f} s ({cycle['probes_per_s']:.0f} Checks/s), Loop-Lag p99 {cycle['loop_lag']['p99_ms']:.1f} ms")
+    print(f"  Dauerbetrieb:     {steady['probes_per_s']:.0f} Checks/s, {steady['overruns']} übersprungen, Loop-Lag p99 {steady['loop_lag']['p99_ms']:.1f} ms")
+    print(f"  Erkennung:        p50 {steady['detection_delay_p50_s']:.2f} s, p99 {steady['detection_delay_p99_s']:.2f} s ({steady['detections']} Wechsel)")
+    print(f"  Speicher/Website: {result['memory_per_site_bytes'] / 1024:.1f} KB")
+
+
+# Kennzahl -> True wenn größer besser ist
+COMPARED = {
+    ("cycle", "probes_per_s"): True,
+    ("steady", "probes_per_s"): True,
+    ("steady", "detection_delay_p99_s"): False,
+    ("steady", "loop_lag", "p99_ms"): False,
+    ("memory_per_site_bytes",): False,
+}
+
+
+def lookup(result, path):
+    for key in path:
+        result = result[key]
+    return result
+
+
+def compare(old, new):
+    old_by_size = {r["sites"]: r for r in old["results"]}
+    for result in new["results"]:
+        base = old_by_size.get(result["sites"])
+        if base is None:
+            continue
+        print(f"Vergleich mit {old.get('commit') or 'Basis'} bei {result['sites']} Websites:")
+        for path, higher_is_better in COMPARED.items():
+            before, after = lookup(base, path), lookup(result, path)
+            change = (after - before) / before * 100 if before else 0.0
+            worse = change < 0 if higher_is_better else change > 0
+            marker = "  ⚠" if worse and abs(change) > 10 else ""
+            print(f"  {'.'.join(path):32} {before:12.2f} -> {after:12.2f} ({change:+.1f}%){marker}")
+
+
+async def main(args):
+    results = []
+    for count in args.sites:
+        result = await run_size(count, args)
+        print_result(result)
+        results.append(result)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sites", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--duration", type=float, default=45, help="Dauerbetrieb pro Größe in Sekunden")
+    parser.add_argument("--interval", type=float, default=10, help="Check-Intervall im Dauerbetrieb")
+    parser.add_argument("--timeout", type=float, default=2, help="Timeout pro Check")
+    parser.add_argument("--latency", default="lognormal:30:0.6", help="const:MS, uniform:MIN:MAX oder lognormal:MEDIAN:SIGMA")
+    parser.add_argument("--error-rate", type=float, default=0.01, help="Anteil zufälliger HTTP 500")
+    parser.add_argument("--timeout-rate", type=float, default=0.01, help="Anteil Websites, die nie antworten")
+    parser.add_argument("--flap-rate", type=float, default=0.05, help="Anteil Websites, die periodisch ausfallen")
+    parser.add_argument("--hosts", type=int, default=64, help="Anzahl Loopback-Adressen")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--per-host", type=int, default=4)
+    parser.add_argument("--pool-limit", type=int, default=100)
+    parser.add_argument("--pool-per-host", type=int, default=10)
+    parser.add_argument("--memory-samples", type=int, default=20, help="Messwerte pro Website für die Speichermessung")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="Ergebnisse als JSON in diese Datei schreiben")
+    parser.add_argument("--compare", help="Mit einer früheren JSON-Ausgabe vergleichen")
+    args = parser.parse_args()
+    try:
+        args.latency_dist = parse_latency(args.latency)
+    except (ValueError, argparse.ArgumentTypeError) as e:
+        parser.error(str(e))
+
+    results = asyncio.run(main(args))
+    report = {
+        "commit": git_commit(),
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "params": {key: value for key, value in vars(args).items() if key not in ("output", "compare", "latency_dist")},
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Ergebnisse gespeichert: {args.output}")
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare(json.load(f), report)
@@ -0,0 +1,56 @@
+"""Micro-Benchmark für write_log: Kosten pro Logzeile bei wachsender Logdatei.
+
+Aufruf (aus dem Projekt-Root):
+
+    python benchmarks/bench_logger.py
+
+Für jede Ausgangsgröße der Logdatei werden LINES Zeilen geschrieben. Gemessen
+werden die Kosten pro Aufruf (nur Einreihen) und die Zeit, bis alle Zeilen
+durch den Hintergrund-Thread auf die Platte geschrieben sind.
+"""
+import os
+import sys
+import time
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import logger  # noqa: E402
+
+LINES = 20000
+PREFILL_SIZES = [0, 10000, 100000, 1000000]
+
+
+def prefill(path, count):
+    line = "[2000-01-01 00:00:00] https://example.com - Marked as ONLINE\n"
+    with open(path, "w", encoding="utf-8") as f:
+        for _ in range(count):
+            f.write(line)
+
+
+def run(prefill_lines):
+    with tempfile.TemporaryDirectory() as tmp:
+        logger.LOG_DIR = tmp
+        logger.LOG_FILE = os.path.join(tmp, "Bot.log")
+        prefill(logger.LOG_FILE, prefill_lines)
+
+        logger.write_log("warmup")
+        start = time.perf_counter()
+        for i in range(LINES):
+            logger.write_log(f"https://example.com/{i} - Marked as ONLINE")
+        enqueued = time.perf_counter()
+        logger.shutdown_log()
+        flushed = time.perf_counter()
+
+    return (enqueued - start) / LINES * 1e6, (flushed - start) / LINES * 1e6
+
+
+def main():
+    print(f"{'Vorhandene Zeilen':>18} | {'µs/Zeile (Aufruf)':>18} | {'µs/Zeile (bis Platte)':>22}")
+    for size in PREFILL_SIZES:
+        call_us, total_us = run(size)
+        print(f"{size:>18} | {call_us:>18.2f} | {total_us:>22.2f}")
+
+
+if __name__ == "__main__":
+    main()
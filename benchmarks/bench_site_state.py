@@ -0,0 +1,142 @@
+"""Benchmark für den Speicherbedarf des Zustands pro Website (SiteState).
+
+Aufruf (aus dem Projekt-Root):
+
+    python benchmarks/bench_site_state.py [anzahl_sites] [muster]
+
+Simuliert für `muster` Websites eine Woche Checks (alle 60 Sekunden, 1 %
+Fehler, gelegentliche Ausfälle, Phasen-Messungen) und kopiert deren Zustand
+anschließend auf `anzahl_sites` Websites. Gemessen werden der Speicher pro
+Website (tracemalloc) und die Kosten eines Checks (Zähler + Antwortzeit).
+Zum Vergleich wird dieselbe Woche im Layout vor SiteState simuliert (dict pro
+Website mit unbegrenzter Liste der Antwortzeiten, datetime-Liste der Ausfälle).
+"""
+import os
+import sys
+import time
+import random
+import datetime
+import tempfile
+import tracemalloc
+from array import array
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import logger  # noqa: E402
+from monitor import SiteState  # noqa: E402
+from stats import LatencyStats, PhaseStats, _Window  # noqa: E402
+from tracing import RequestTiming  # noqa: E402
+
+CHECK_INTERVAL = 60
+WEEK = 7 * 86400
+
+
+def simulate_week(rng, now):
+    state = SiteState(True)
+    for step in range(WEEK, 0, -CHECK_INTERVAL):
+        checked_at = now - step
+        if rng.random() > 0.01:
+            state.up += 1
+            state.latency.add(rng.lognormvariate(-2, 0.6), now=checked_at)
+            state.downtime_ended(checked_at)
+        else:
+            state.down += 1
+            if rng.random() < 0.2:
+                state.downtime_started(checked_at)
+    for _ in range(20):
+        timing = RequestTiming()
+        timing.dns, timing.connect, timing.ttfb, timing.total = 0.001, 0.01, rng.random() * 0.1, 0.12
+        timing.reused = True
+        state.add_timing(timing)
+    return state
+
+
+def simulate_baseline_week(rng, now):
+    # Layout vor SiteState: Status in sites, stats-dict mit unbegrenzter Liste der
+    # Antwortzeiten und downtime_log als Liste von datetimes
+    stats = {"up": 0, "down": 0, "response_times": []}
+    downtimes = []
+    for step in range(WEEK, 0, -CHECK_INTERVAL):
+        checked_at = now - step
+        if rng.random() > 0.01:
+            stats["up"] += 1
+            stats["response_times"].append(rng.lognormvariate(-2, 0.6))
+        else:
+            stats["down"] += 1
+            if rng.random() < 0.2:
+                downtimes.append(datetime.datetime.fromtimestamp(checked_at, datetime.timezone.utc))
+    return True, stats, downtimes
+
+
+def clone(state):
+    # Arrays direkt kopieren; über to_dict/from_dict dauert das Anlegen von 100.000 Websites zu lange
+    latency = LatencyStats()
+    latency.recent.values.extend(state.latency.recent.values)
+    latency.recent.position = state.latency.recent.position
+    latency.windows = tuple(_copy_window(window) for window in state.latency.windows)
+    copy = SiteState(state.status, state.up, state.down, latency)
+    if state.phases is not None:
+        copy.phases = PhaseStats()
+        copy.phases.recent.values.extend(state.phases.recent.values)
+        copy.phases.requests, copy.phases.reused = state.phases.requests, state.phases.reused
+    if state.downtimes is not None:
+        copy.downtimes = array("d", state.downtimes)
+    return copy
+
+
+def _copy_window(window):
+    copy = _Window(1, window.size)
+    copy.slice_seconds = window.slice_seconds
+    copy.meta = array("d", window.meta)
+    copy.keys = array("H", window.keys)
+    copy.hits = array("I", window.hits)
+    return copy
+
+
+def main(count, samples):
+    rng = random.Random(1)
+    now = time.time()
+
+    tracemalloc.start()
+    baseline = [simulate_baseline_week(rng, now) for _ in range(samples)]
+    baseline_bytes = tracemalloc.get_traced_memory()[0] / samples
+    del baseline
+    tracemalloc.stop()
+
+    rng = random.Random(1)
+    tracemalloc.start()
+    start = time.perf_counter()
+    templates = [simulate_week(rng, now) for _ in range(samples)]
+    simulate_seconds = time.perf_counter() - start
+    sample_bytes = tracemalloc.get_traced_memory()[0] / samples
+
+    before = tracemalloc.get_traced_memory()[0]
+    states = {f"https://site-{i}.example/": clone(templates[i % samples]) for i in range(count)}
+    total_bytes = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+
+    # Ein Check pro Website, wie in handle_result
+    start = time.perf_counter()
+    for state in states.values():
+        state.up += 1
+        state.latency.add(rng.lognormvariate(-2, 0.6), now=now)
+    check_seconds = time.perf_counter() - start
+
+    print(f"Websites:                {count}")
+    print(f"Simulierte Woche:        {samples} Websites in {simulate_seconds:.1f} s")
+    print(f"Speicher pro Website:    {sample_bytes / 1024:.1f} KB (Muster), {total_bytes / count / 1024:.1f} KB (Kopien)")
+    print(f"Layout vor SiteState:    {baseline_bytes / 1024:.1f} KB pro Website, {baseline_bytes / sample_bytes:.1f}x so viel")
+    print(f"Speicher gesamt:         {total_bytes / 1024 / 1024:.0f} MB")
+    print(f"Kosten pro Check:        {check_seconds / count * 1e6:.1f} µs")
+
+
+if __name__ == "__main__":
+    # Logzeilen (falls welche entstehen) in das Temp-Verzeichnis, nicht in Logs/Bot.log
+    with tempfile.TemporaryDirectory() as tmp:
+        logger.LOG_DIR = tmp
+        logger.LOG_FILE = os.path.join(tmp, "Bot.log")
+        main(
+            int(sys.argv[1]) if len(sys.argv) > 1 else 100000,
+            int(sys.argv[2]) if len(sys.argv) > 2 else 20,
+        )
+        logger.shutdown_log()
@@ -0,0 +1,79 @@
+"""Benchmark für den Warmstart des SiteMonitor.
+
+Aufruf (aus dem Projekt-Root):
+
+    python benchmarks/bench_warm_start.py [anzahl_sites]
+
+Legt eine temporäre Datenbank mit N Websites an, deren Zustand eine Woche
+Messwerte enthält, speichert einen Snapshot und misst anschließend, wie lange
+SiteMonitor.load() für alle Websites braucht (Ziel: deutlich unter 1 Sekunde
+bei 10.000 Websites).
+"""
+import os
+import sys
+import time
+import random
+import asyncio
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import logger  # noqa: E402
+from database import AsyncDatabase  # noqa: E402
+from monitor import SiteMonitor  # noqa: E402
+from scheduler import SiteScheduler  # noqa: E402
+
+
+async def noop_check(url, timeout):
+    pass
+
+
+async def prepare(db, count):
+    monitor = SiteMonitor(db, SiteScheduler(noop_check))
+    await asyncio.gather(*(db.save_site(f"https://site-{i}.example/") for i in range(count)))
+    await monitor.load()
+
+    # Eine Woche Messwerte (alle 5 Minuten) pro Website simulieren
+    now = time.time()
+    for url in monitor.sites:
+        state = monitor.get_state(url)
+        for step in range(0, 7 * 86400, 300):
+            state.latency.add(random.lognormvariate(-2, 0.5), now=now - step)
+        state.up = 2000
+        state.down = 16
+        monitor.set_status(url, random.random() > 0.05)
+
+    start = time.perf_counter()
+    await monitor.save_snapshot()
+    return time.perf_counter() - start
+
+
+async def main(count):
+    with tempfile.TemporaryDirectory() as tmp:
+        # Logzeilen in das Temp-Verzeichnis, nicht in Logs/Bot.log
+        logger.LOG_DIR = tmp
+        logger.LOG_FILE = os.path.join(tmp, "Bot.log")
+        path = os.path.join(tmp, "bench.db")
+
+        db = AsyncDatabase(path)
+        save_seconds = await prepare(db, count)
+        await db.close()
+
+        # Kaltstart: neue Verbindung, neuer Monitor
+        start = time.perf_counter()
+        db = AsyncDatabase(path)
+        monitor = SiteMonitor(db, SiteScheduler(noop_check))
+        await monitor.load()
+        load_seconds = time.perf_counter() - start
+        restored = sum(1 for status in monitor.sites.values() if status is not None)
+        await db.close()
+        logger.shutdown_log()
+
+    print(f"Websites:              {count}")
+    print(f"Snapshot speichern:    {save_seconds * 1000:.0f} ms")
+    print(f"Warmstart (load):      {load_seconds * 1000:.0f} ms")
+    print(f"Status wiederhergestellt: {restored}/{count}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 10000))
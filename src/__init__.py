@@ -1,2 +1,2 @@
-# src package init
-__all__ = []
+# src package init
+__all__ = []
@@ -1,220 +1,320 @@
-import discord
-from discord.ext import commands, tasks
-import aiohttp
-import yaml
-import os
-import datetime
-from database import Database
-from command import CustomCommands
-from logger import write_log
-
-# Token aus config.yaml laden (versuche Projekt-Root, dann src/)
-config_path = os.path.join(os.getcwd(), "config.yaml")
-if not os.path.exists(config_path):
-    # fallback: src/config.yaml
-    config_path = os.path.join(os.path.dirname(__file__), "..", "config.yaml")
-    config_path = os.path.normpath(config_path)
-
-with open(config_path, "r", encoding="utf-8") as f:
-    config = yaml.safe_load(f)
-
-TOKEN = config.get("token")
-
-CHECK_INTERVAL = 60  # Sekunden
-
-db = Database()
-
-
-class SiteMonitor:
-    def __init__(self, db):
-        self.db = db
-        loaded_sites = self.db.load_sites()  # Lade aus DB
-        # Alle geladenen Sites auf None setzen (unbekannter Status)
-        self.sites = {url: None for url in loaded_sites}
-        self.stats = {}
-        self.downtime_log = {}
-        write_log(f"SiteMonitor initialisiert mit {len(self.sites)} Websites", db=db)
-
-    def add_site(self, url):
-        self.sites[url] = None  # None = unbekannter Status, nicht False
-        self.db.save_site(url)
-        self.stats.setdefault(url, {"up": 0, "down": 0, "response_times": []})
-        self.downtime_log.setdefault(url, [])
-        write_log(f"Website hinzugefügt: {url}", db=db)
-
-    def remove_site(self, url):
-        self.sites.pop(url, None)
-        self.db.delete_site(url)
-        self.stats.pop(url, None)
-        self.downtime_log.pop(url, None)
-        write_log(f"Website entfernt: {url}", db=db)
-
-    def get_status(self):
-        return self.sites
-
-    def log_downtime(self, url, timestamp):
-        self.downtime_log.setdefault(url, []).append(timestamp)
-        write_log(f"Downtime bei {url} um {timestamp}", db=db)
-
-
-monitor = SiteMonitor(db)
-
-intents = discord.Intents.default()
-intents.message_content = True
-bot = commands.Bot(command_prefix="!", intents=intents)
-
-
-@bot.event
-async def on_ready():
-    print(f"Bot online als {bot.user}")
-    write_log(f"Bot online als {bot.user}", bot=bot, db=db)
-    await bot.add_cog(CustomCommands(bot, db, monitor))
-    # Globale Synchronisation der App-Commands (ersetzt guild-spezifische Sync)
-    try:
-        synced = await bot.tree.sync()
-        write_log(f"App-Commands global synchronisiert: {len(synced)} commands", bot=bot, db=db)
-    except Exception as e:
-        write_log(f"Fehler beim globalen Sync der App-Commands: {e}", bot=bot, db=db)
-    check_websites.start()
-
-
-@tasks.loop(seconds=CHECK_INTERVAL)
-async def check_websites():
-    if not monitor.sites:
-        return  # Keine Websites zu überwachen
-        
-    async with aiohttp.ClientSession() as session:
-        for url in list(monitor.sites.keys()):
-            previous_status = monitor.sites.get(url, None)  # Vorheriger Status
-            write_log(f"Checking {url} - Previous status: {previous_status}", db=db)
-            
-            try:
-                async with session.get(url, timeout=10) as resp:
-                    response_time = None
-                    try:
-                        response_time = resp.elapsed.total_seconds()
-                    except Exception:
-                        response_time = None
-                    
-                    write_log(f"{url} - HTTP Status: {resp.status}, Response time: {response_time}", db=db)
-                    
-                    # 2xx und 3xx Status-Codes als "online" betrachten
-                    if 200 <= resp.status < 400:
-                        monitor.stats.setdefault(url, {"up": 0, "down": 0, "response_times": []})
-                        monitor.stats[url]["up"] += 1
-                        if response_time:
-                            monitor.stats[url]["response_times"].append(response_time)
-                        monitor.sites[url] = True
-                        
-                        write_log(f"{url} - Marked as ONLINE", db=db)
-                        
-                        # Nur benachrichtigen wenn vorher offline war (nicht beim ersten Check)
-                        if previous_status is False:
-                            await notify_recovery(url)
-                            write_log(f"Seite wieder online: {url}", db=db)
-                    else:
-                        monitor.stats.setdefault(url, {"up": 0, "down": 0, "response_times": []})
-                        monitor.stats[url]["down"] += 1
-                        monitor.sites[url] = False
-                        
-                        write_log(f"{url} - Marked as OFFLINE due to HTTP {resp.status}", db=db)
-                        
-                        # Nur benachrichtigen wenn vorher online war (nicht beim ersten Check)
-                        if previous_status is True:
-                            await notify_downtime(url, f"HTTP {resp.status}")
-                            monitor.log_downtime(url, discord.utils.utcnow())
-                            write_log(f"Seite offline: {url} (HTTP {resp.status})", db=db)
-                            
-            except Exception as e:
-                monitor.stats.setdefault(url, {"up": 0, "down": 0, "response_times": []})
-                monitor.stats[url]["down"] += 1
-                monitor.sites[url] = False
-                
-                write_log(f"{url} - Marked as OFFLINE due to exception: {e}", db=db)
-                
-                # Nur benachrichtigen wenn vorher online war (nicht beim ersten Check)
-                if previous_status is True:
-                    await notify_downtime(url, str(e))
-                    monitor.log_downtime(url, discord.utils.utcnow())
-                    write_log(f"Fehler beim Check von {url}: {e}", db=db)
-
-
-async def get_favicon_url(url):
-    """Versucht die Favicon-URL einer Website zu finden"""
-    try:
-        from urllib.parse import urlparse, urljoin
-        parsed = urlparse(url)
-        base_url = f"{parsed.scheme}://{parsed.netloc}"
-        
-        # Standard Favicon-Locations
-        favicon_paths = [
-            "/favicon.ico",
-            "/favicon.png",
-            "/apple-touch-icon.png"
-        ]
-        
-        async with aiohttp.ClientSession() as session:
-            for path in favicon_paths:
-                favicon_url = urljoin(base_url, path)
-                try:
-                    async with session.head(favicon_url, timeout=5) as resp:
-                        if resp.status == 200:
-                            return favicon_url
-                except:
-                    continue
-        
-        # Fallback: Google Favicon Service
-        return f"https://www.google.com/s2/favicons?domain={parsed.netloc}&sz=32"
-    except:
-        return None
-
-async def notify_downtime(url, reason=""):
-    channel_id = db.get_channel_id()
-    if not channel_id:
-        return
-    channel = bot.get_channel(channel_id)
-    if channel:
-        favicon_url = await get_favicon_url(url)
-        
-        embed = discord.Embed(
-            title="🔴 Website Offline", 
-            description=f"**{url}** ist nicht erreichbar",
-            color=discord.Color.red(),
-            timestamp=discord.utils.utcnow()
-        )
-        
-        if reason:
-            embed.add_field(name="Grund", value=reason, inline=False)
-        
-        if favicon_url:
-            embed.set_thumbnail(url=favicon_url)
-        
-        embed.set_footer(text="Site Sentinel", icon_url=bot.user.avatar.url if bot.user.avatar else None)
-        
-        await channel.send(embed=embed)
-
-async def notify_recovery(url):
-    channel_id = db.get_channel_id()
-    if not channel_id:
-        return
-    channel = bot.get_channel(channel_id)
-    if channel:
-        favicon_url = await get_favicon_url(url)
-        
-        embed = discord.Embed(
-            title="🟢 Website Online", 
-            description=f"**{url}** ist wieder erreichbar",
-            color=discord.Color.green(),
-            timestamp=discord.utils.utcnow()
-        )
-        
-        if favicon_url:
-            embed.set_thumbnail(url=favicon_url)
-        
-        embed.set_footer(text="Site Sentinel", icon_url=bot.user.avatar.url if bot.user.avatar else None)
-        
-        await channel.send(embed=embed)
-
-
-if __name__ == "__main__":
-    bot.run(TOKEN)
+import time
+import json
+import asyncio
+import hashlib
+
+STARTED = time.perf_counter()  # für die Messung der Startzeit bis zum ersten Check
+
+# discord und yaml bleiben sofortige Imports: SentinelBot erbt von commands.Bot und
+# config.yaml wird beim Import gelesen, beides wird vor dem ersten Check ohnehin gebraucht.
+# Die gemessene Zeit bis zum ersten Check (STARTED) enthält diese Imports.
+import discord
+from discord.ext import commands
+import yaml
+import os
+from database import AsyncDatabase
+from command import CustomCommands
+from checker import ConcurrentChecker
+from scheduler import SiteScheduler
+from http_client import HttpClient
+from favicon import FaviconCache
+from monitor import SiteMonitor
+from history import CheckHistory
+from notifier import Notifier
+from subscriptions import SubscriptionIndex, LEGACY_GUILD
+from policy import CheckPolicy
+from workers import WorkerHub
+from logger import write_log, stop_log_shipper, enable_log_index
+
+# Token aus config.yaml laden (versuche Projekt-Root, dann src/)
+config_path = os.path.join(os.getcwd(), "config.yaml")
+if not os.path.exists(config_path):
+    # fallback: src/config.yaml
+    config_path = os.path.join(os.path.dirname(__file__), "..", "config.yaml")
+    config_path = os.path.normpath(config_path)
+
+with open(config_path, "r", encoding="utf-8") as f:
+    config = yaml.safe_load(f)
+
+TOKEN = config.get("token")
+
+CHECK_INTERVAL = config.get("check_interval", 60)  # Sekunden (Standard pro Website)
+
+# Durchsuchbarer Index der Log-Einträge für /logs (sonst wird Bot.log rückwärts gelesen)
+if config.get("log_index", True):
+    enable_log_index()
+
+# Alle Datenbankzugriffe laufen in einem eigenen Thread (wird erst in setup_hook geöffnet)
+db = AsyncDatabase()
+
+# Parallele Checks: globales Limit und Limit pro Host (über config.yaml anpassbar)
+checker = ConcurrentChecker(
+    max_concurrency=config.get("max_concurrency", 50),
+    max_per_host=config.get("max_per_host", 4),
+    timeout=config.get("check_timeout", 10),
+    host_gap=config.get("host_gap", 0),
+)
+
+
+async def run_check(url, timeout):
+    try:
+        result = await checker.check(http_client.session, url, timeout=timeout, probe=monitor.probes.get(url))
+        await handle_result(result)
+    except Exception as e:
+        write_log(f"Fehler beim Verarbeiten des Checks von {url}: {e}", db=db, level="error")
+
+
+async def process_result(result):
+    # Ergebnisse von Worker-Prozessen
+    try:
+        await handle_result(result)
+    except Exception as e:
+        write_log(f"Fehler beim Verarbeiten des Checks von {result.url}: {e}", db=db, level="error")
+
+
+def report_overrun(url, count):
+    write_log(f"Check von {url} läuft beim nächsten Termin noch - übersprungen ({count}x)", db=db)
+
+
+if config.get("workers") or config.get("worker_hub"):
+    # Checks laufen in eigenen Prozessen (lokal und/oder auf anderen Hosts)
+    hub_host, hub_port = config.get("worker_hub", "127.0.0.1:8765").rsplit(":", 1)
+    scheduler = WorkerHub(
+        process_result,
+        host=hub_host,
+        port=int(hub_port),
+        token=config.get("worker_token"),
+        local_workers=config.get("workers", 0),
+        worker_options={
+            key: config[key]
+            for key in ("max_concurrency", "max_per_host", "host_gap", "check_timeout", "http_pool_limit", "http_pool_per_host", "dns_cache_ttl")
+            if key in config
+        },
+        default_interval=CHECK_INTERVAL,
+        default_timeout=config.get("check_timeout", 10),
+        on_overrun=report_overrun,
+        log=lambda message: write_log(message, db=db),
+    )
+else:
+    scheduler = SiteScheduler(
+        run_check,
+        default_interval=CHECK_INTERVAL,
+        default_timeout=config.get("check_timeout", 10),
+        on_overrun=report_overrun,
+    )
+
+# Bestätigungs-Checks, adaptive Intervalle und Flap-Dämpfung
+policy = CheckPolicy(
+    scheduler,
+    confirm=config.get("confirm_failures", 2),
+    window=config.get("confirm_window", 3),
+    retry_delay=config.get("retry_delay", 5),
+    max_backoff=config.get("max_backoff", 2.0),
+    flap_threshold=config.get("flap_threshold", 4),
+)
+
+monitor = SiteMonitor(db, scheduler, policy=policy)
+if isinstance(scheduler, WorkerHub):
+    scheduler.probes = monitor.probes  # Probe-Einstellungen werden mit den Websites an die Worker gesendet
+
+# Gemeinsamer HTTP-Client mit Verbindungs-Pool und DNS-Cache
+http_client = HttpClient(
+    limit=config.get("http_pool_limit", 100),
+    limit_per_host=config.get("http_pool_per_host", 10),
+    dns_ttl=config.get("dns_cache_ttl", 300),
+)
+
+# Favicons pro Host (im Speicher + SQLite), werden im Hintergrund aktualisiert
+favicons = FaviconCache(db, http_client)
+
+# Check-Historie, wird gebündelt in die Datenbank geschrieben
+history = CheckHistory(db)
+
+# Abos pro Server: jede URL wird einmal geprüft, Wechsel gehen an alle abonnierten Server
+subscriptions = SubscriptionIndex(db)
+# Zähler, Offline-Menge und Tags pro Server mitführen
+monitor.on_status = subscriptions.status_changed
+monitor.on_tag = subscriptions.tag_changed
+
+
+def command_tree_hash(tree, application_id):
+    """Hash der App-Commands, um unnötige (und rate-limitierte) Syncs zu vermeiden"""
+    payload = sorted((command.to_dict(tree) for command in tree.get_commands()), key=lambda command: command["name"])
+    data = json.dumps([application_id, payload], sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+class SentinelBot(commands.Bot):
+    def __init__(self, *args, http_client, favicons, checker, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.http_client = http_client
+        self.favicons = favicons
+        self.checker = checker
+        self.first_check = None  # Sekunden vom Prozessstart bis zum ersten Check-Ergebnis
+
+    async def setup_hook(self):
+        # Läuft genau einmal nach dem Login, anders als on_ready nicht bei jedem Reconnect
+        phases = []
+        started = time.perf_counter()
+        await db.open()
+        phases.append(f"Datenbank {(time.perf_counter() - started) * 1000:.0f}ms")
+
+        # Websites, Favicons und HTTP-Client parallel vorbereiten
+        started = time.perf_counter()
+        self.http_client.session  # Session und Connector anlegen
+        await asyncio.gather(monitor.load(), favicons.load())
+        await subscriptions.load(monitor)
+        phases.append(f"Websites {(time.perf_counter() - started) * 1000:.0f}ms")
+
+        # Jede Website wird in ihrem eigenen Intervall geprüft; die Checks brauchen kein Gateway
+        monitor.start_snapshots()
+        history.start()
+        notifier.start()
+        if metrics is not None:
+            try:
+                await metrics.start()
+            except OSError as e:
+                write_log(f"Metrik-Endpunkt konnte nicht gestartet werden: {e}", db=db)
+        scheduler.start()
+
+        await self.add_cog(CustomCommands(self, db, monitor, subscriptions))
+        started = time.perf_counter()
+        await self.sync_commands()
+        phases.append(f"Commands {(time.perf_counter() - started) * 1000:.0f}ms")
+        write_log(f"Start in {(time.perf_counter() - STARTED) * 1000:.0f}ms ({', '.join(phases)})", db=db)
+
+    async def sync_commands(self):
+        """App-Commands global synchronisieren, aber nur wenn sie sich geändert haben"""
+        digest = command_tree_hash(self.tree, self.application_id)
+        if db.get_setting("command_tree_hash") == digest:
+            write_log("App-Commands unverändert - kein Sync nötig", db=db)
+            return
+        try:
+            synced = await self.tree.sync()
+            await db.set_setting("command_tree_hash", digest)
+            write_log(f"App-Commands global synchronisiert: {len(synced)} commands", db=db)
+        except Exception as e:
+            write_log(f"Fehler beim globalen Sync der App-Commands: {e}", db=db, level="error")
+
+    async def close(self):
+        await scheduler.stop()
+        if metrics is not None:
+            await metrics.stop()
+        await notifier.stop()
+        await monitor.stop_snapshots()
+        await history.stop()
+        await self.http_client.close()
+        await stop_log_shipper()
+        await db.close()
+        await super().close()
+
+
+intents = discord.Intents.default()
+intents.message_content = True
+bot = SentinelBot(command_prefix="!", intents=intents, http_client=http_client, favicons=favicons, checker=checker)
+
+# Benachrichtigungen laufen getrennt von den Checks (gesammelt und gedrosselt)
+notifier = Notifier(bot, db, monitor, favicons, subscriptions)
+
+# Optionaler Prometheus-Endpunkt (nur wenn metrics_port gesetzt ist)
+metrics = None
+if config.get("metrics_port"):
+    from metrics import Metrics  # aiohttp.web nur laden, wenn er gebraucht wird
+
+    metrics = Metrics(
+        monitor, scheduler, notifier, history, db,
+        host=config.get("metrics_host", "127.0.0.1"),
+        port=config["metrics_port"],
+        checker=checker,
+    )
+
+
+@bot.event
+async def on_ready():
+    # Wird auch nach jedem Reconnect ausgelöst - die Einrichtung passiert in setup_hook
+    print(f"Bot online als {bot.user}")
+    write_log(f"Bot online als {bot.user} auf {len(bot.guilds)} Server(n)", bot=bot, db=db)
+    await adopt_legacy_sites()
+
+
+async def adopt_legacy_sites():
+    """Websites aus einer Datenbank ohne Server-Zuordnung dem Server des alten Status-Channels geben"""
+    if not subscriptions.urls(LEGACY_GUILD) and LEGACY_GUILD not in subscriptions.channels:
+        return
+    channel = bot.get_channel(subscriptions.channels.get(LEGACY_GUILD) or 0)
+    if channel is not None and getattr(channel, "guild", None) is not None:
+        guild_id = channel.guild.id
+    elif len(bot.guilds) == 1:
+        guild_id = bot.guilds[0].id
+    else:
+        write_log("Websites ohne Server-Zuordnung gefunden, Server unklar - bitte /setchannel erneut ausführen", db=db, level="warning")
+        return
+    count = await subscriptions.adopt(guild_id)
+    write_log(f"{count} Websites ohne Server-Zuordnung an Server {guild_id} übertragen", db=db)
+
+
+@bot.event
+async def on_guild_remove(guild):
+    # Bot wurde vom Server entfernt: Abos löschen, Websites ohne weitere Abonnenten nicht mehr prüfen
+    orphaned = await subscriptions.remove_guild(guild.id)
+    for url in orphaned:
+        await monitor.remove_site(url)
+    write_log(f"Server {guild.id} verlassen: {len(orphaned)} Websites nicht mehr überwacht", db=db)
+
+
+async def handle_result(result):
+    url = result.url
+    if url not in monitor.sites:
+        return  # Website wurde während des Checks entfernt
+
+    previous_status = monitor.sites.get(url, None)  # Vorheriger Status
+    write_log(f"Checked {url} - Previous status: {previous_status}", db=db)
+
+    if result.status is not None:
+        write_log(f"{url} - HTTP Status: {result.status}, Response time: {result.response_time}", db=db)
+
+    if bot.first_check is None:
+        bot.first_check = time.perf_counter() - STARTED
+        write_log(f"Erster Check {(bot.first_check * 1000):.0f}ms nach dem Start", db=db)
+
+    state = monitor.get_state(url)
+    history.record(result)
+    if metrics is not None:
+        metrics.observe(result)
+    if result.timing is not None:
+        state.add_timing(result.timing)
+
+    decision = policy.observe(url, result.ok, previous_status, result.checked_at)
+    if result.ok:
+        state.up += 1
+        if result.response_time is not None:
+            state.latency.add(result.response_time)
+        # Host ist erreichbar -> Favicon bei Bedarf im Hintergrund vorladen
+        favicons.warm(url)
+    else:
+        state.down += 1
+        if result.error is None:
+            write_log(f"{url} - Check failed with HTTP {result.status}", db=db)
+        else:
+            write_log(f"{url} - Check failed: {result.error}", db=db)
+    monitor.set_status(url, decision.status)
+
+    if decision.status and decision.changed:
+        write_log(f"{url} - Marked as ONLINE", db=db)
+        history.incident_ended(url, result.checked_at)
+        monitor.log_recovery(url, result.checked_at)
+        write_log(f"Seite wieder online: {url}", db=db)
+    elif decision.changed:
+        write_log(f"{url} - Marked as OFFLINE due to: {result.reason}", db=db, level="warning")
+        history.incident_started(url, result.checked_at, result.reason)
+        monitor.log_downtime(url, result.checked_at)
+        write_log(f"Seite offline: {url} ({result.reason})", db=db, level="warning")
+    elif not result.ok and decision.status:
+        write_log(f"{url} - Ausfall noch nicht bestätigt, erneuter Check in {policy.retry_delay}s", db=db)
+
+    # Der erste Check einer Website und Wechsel bei flatternden Websites werden nicht gemeldet
+    if decision.notify:
+        notifier.push(url, not decision.status, decision.status, None if result.ok else result.reason)
+
+if __name__ == "__main__":
+    bot.run(TOKEN)
@@ -0,0 +1,177 @@
+import time
+import asyncio
+
+import aiohttp
+
+from probes import check_body
+from netprobe import connect, is_network_url, split_target
+from tracing import RequestTiming
+from urls import host_key
+
+# So viel vom Rest eines Bodys wird noch gelesen, damit die Verbindung in den Pool zurück kann;
+# bei größeren Antworten ist eine neue Verbindung billiger als das Herunterladen
+DRAIN_LIMIT = 64 * 1024
+
+
+class CheckResult:
+    """Ergebnis eines einzelnen Website-Checks"""
+
+    __slots__ = ("url", "status", "response_time", "error", "checked_at", "timing", "headers")
+
+    def __init__(self, url, status=None, response_time=None, error=None, checked_at=None, timing=None, headers=None):
+        self.url = url
+        self.status = status
+        self.response_time = response_time
+        self.error = error
+        self.checked_at = time.time() if checked_at is None else checked_at
+        self.timing = timing  # RequestTiming (Phasen), None wenn nicht gemessen
+        self.headers = headers  # Antwort-Header (nur im Prozess, z.B. für /ping)
+
+    @property
+    def ok(self):
+        # 2xx und 3xx Status-Codes als "online" betrachten; TCP/TLS-Checks haben keinen Status
+        if self.error is not None:
+            return False
+        if self.status is None:
+            return self.response_time is not None
+        return 200 <= self.status < 400
+
+    @property
+    def reason(self):
+        if self.error is not None:
+            return self.error
+        return f"HTTP {self.status}"
+
+
+async def _drain(resp):
+    """Liest den ungelesenen Body (bis DRAIN_LIMIT) und verwirft ihn.
+
+    aiohttp schließt die Verbindung statt sie wiederzuverwenden, wenn der
+    Body beim Verlassen von "async with" noch nicht vollständig gelesen ist.
+    """
+    read = 0
+    while read <= DRAIN_LIMIT:
+        chunk = await resp.content.readany()
+        if not chunk:
+            return
+        read += len(chunk)
+
+
+class ConcurrentChecker:
+    """Prüft Websites parallel mit globalem und per-Host Limit.
+
+    Mit host_gap bleibt ein Platz im Host-Limit nach einem Request noch so viele
+    Sekunden belegt (Pause zwischen Requests an denselben Host). Läuft für eine
+    URL schon ein Check mit derselben Probe, wird dessen Ergebnis mitbenutzt.
+    """
+
+    def __init__(self, max_concurrency=50, max_per_host=4, timeout=10, host_gap=0):
+        self.max_concurrency = max_concurrency
+        self.max_per_host = max_per_host
+        self.timeout = timeout
+        self.host_gap = host_gap
+        self._global = asyncio.Semaphore(max_concurrency)
+        # host -> [Semaphore, Anzahl aktiver/wartender Checks]
+        self._hosts = {}
+        self._inflight = {}  # (url, Probe) -> [laufender Check, Anzahl wartender Aufrufer]
+        self.joined = 0  # Aufrufe, die einen laufenden Check mitbenutzt haben (für /metrics)
+
+    def _acquire_host(self, host):
+        entry = self._hosts.get(host)
+        if entry is None:
+            entry = self._hosts[host] = [asyncio.Semaphore(self.max_per_host), 0]
+        entry[1] += 1
+        return entry[0]
+
+    def _release_host(self, host, acquired=False):
+        entry = self._hosts.get(host)
+        if entry is None:
+            return
+        if acquired:
+            entry[0].release()
+        entry[1] -= 1
+        if entry[1] <= 0:
+            # Keine Checks mehr für diesen Host -> Semaphore verwerfen
+            del self._hosts[host]
+
+    async def check(self, session, url, timeout=None, probe=None):
+        key = (url, id(probe) if probe is not None else None)
+        entry = self._inflight.get(key)
+        if entry is None:
+            entry = self._inflight[key] = [asyncio.ensure_future(self._limited(session, url, timeout, probe)), 0]
+            entry[0].add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            self.joined += 1
+        entry[1] += 1
+        try:
+            # shield: bricht ein Aufrufer ab, läuft der Check für die anderen weiter
+            return await asyncio.shield(entry[0])
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0 and not entry[0].done():
+                entry[0].cancel()  # niemand wartet mehr auf das Ergebnis
+
+    async def _limited(self, session, url, timeout, probe):
+        host = host_key(url)
+        host_semaphore = self._acquire_host(host)
+        acquired = False
+        try:
+            await host_semaphore.acquire()
+            acquired = True
+            async with self._global:
+                return await self.probe(session, url, timeout, probe)
+        finally:
+            if acquired and self.host_gap:
+                asyncio.get_running_loop().call_later(self.host_gap, self._release_host, host, True)
+            else:
+                self._release_host(host, acquired)
+
+    async def probe(self, session, url, timeout=None, probe=None):
+        """Ein einzelner Request; probe (ProbeConfig) steuert Methode und Body-Prüfungen"""
+        if is_network_url(url):
+            return await self.connect(url, timeout)
+        try:
+            timeout = aiohttp.ClientTimeout(total=timeout or self.timeout)
+            method = probe.method if probe is not None else "GET"
+            headers = probe.conditional_headers() if probe is not None else None
+            timing = RequestTiming()
+            start = time.perf_counter()
+            async with session.request(method, url, headers=headers, timeout=timeout, trace_request_ctx=timing) as resp:
+                # Zeit bis die Antwort-Header da sind (aiohttp kennt kein resp.elapsed)
+                response_time = time.perf_counter() - start
+                error = None
+                if probe is not None:
+                    error = await self._check_content(resp, probe)
+                await _drain(resp)
+            timing.finish()
+            return CheckResult(url, status=resp.status, response_time=response_time, error=error, timing=timing, headers=resp.headers)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            return CheckResult(url, error=str(e) or type(e).__name__)
+
+    async def connect(self, url, timeout=None):
+        """Check für tcp:// und tls:// URLs: nur Verbindungsaufbau (und TLS-Handshake), kein HTTP"""
+        try:
+            host, port, tls = split_target(url)
+        except ValueError as e:
+            return CheckResult(url, error=str(e))
+        result = await connect(host, port, tls, timeout or self.timeout)
+        timing = RequestTiming()
+        timing.dns = result.dns
+        timing.connect = result.handshake
+        timing.total = result.total
+        return CheckResult(url, response_time=result.total if result.ok else None, error=result.error, timing=timing)
+
+    async def _check_content(self, resp, probe):
+        if resp.status == 304 and probe.validators is not None:
+            # Inhalt unverändert -> Ergebnis der letzten Body-Prüfung gilt weiter
+            return probe.validators[2]
+        error = None
+        if probe.reads_body and 200 <= resp.status < 300:
+            error, _ = await check_body(resp, probe)
+        if probe.conditional:
+            etag = resp.headers.get("ETag")
+            last_modified = resp.headers.get("Last-Modified")
+            probe.validators = (etag, last_modified, error) if (etag or last_modified) else None
+        return error
@@ -1,298 +1,743 @@
-import discord
-from discord import app_commands
-from logger import write_log
-
-
-class CustomCommands(discord.ext.commands.Cog):
-    def __init__(self, bot, db, monitor):
-        self.bot = bot
-        self.db = db
-        self.monitor = monitor
-
-    @app_commands.command(name="setlogchannel", description="Setzt den Channel für Log-Meldungen")
-    @app_commands.describe(channel="Text-Channel für Log-Meldungen")
-    async def setlogchannel(self, interaction: discord.Interaction, channel: discord.TextChannel):
-        channel_id = channel.id
-        prev = self.db.get_log_channel_id()
-        self.db.set_log_channel_id(channel_id)
-        write_log(f"Log-Channel gesetzt: {channel_id} (vorher: {prev})", bot=self.bot, db=self.db)
-        desc = f"Log-Meldungen werden jetzt in <#{channel_id}> gesendet."
-        if prev:
-            desc = f"Ersetzt <#{prev}> — " + desc
-        embed = discord.Embed(title="Log-Channel gesetzt", description=desc, color=discord.Color.dark_grey())
-        await interaction.response.send_message(embed=embed)
-
-    @app_commands.command(name="setchannel", description="Setzt den Channel für Statusnachrichten")
-    @app_commands.describe(channel="Text-Channel für Statusnachrichten")
-    async def setchannel(self, interaction: discord.Interaction, channel: discord.TextChannel):
-        channel_id = channel.id
-        prev = self.db.get_channel_id()
-        self.db.set_channel_id(channel_id)
-        write_log(f"Status-Channel gesetzt: {channel_id} (vorher: {prev})", bot=self.bot, db=self.db)
-        desc = f"Statusnachrichten werden jetzt in <#{channel_id}> gesendet."
-        if prev:
-            desc = f"Ersetzt <#{prev}> — " + desc
-        embed = discord.Embed(title="Channel gesetzt", description=desc, color=discord.Color.green())
-        await interaction.response.send_message(embed=embed)
-
-    @app_commands.command(name="add", description="Fügt eine Website zur Überwachung hinzu")
-    @app_commands.describe(url="URL der Website")
-    async def add(self, interaction: discord.Interaction, url: str):
-        self.monitor.add_site(url)
-        self.db.save_site(url)
-        write_log(f"Website hinzugefügt via Command: {url}", bot=self.bot, db=self.db)
-        embed = discord.Embed(title="Website hinzugefügt", description=f"{url} wird jetzt überwacht.", color=discord.Color.blue())
-        await interaction.response.send_message(embed=embed)
-
-    @app_commands.command(name="remove", description="Entfernt eine Website aus der Überwachung")
-    @app_commands.describe(url="URL der Website")
-    async def remove(self, interaction: discord.Interaction, url: str):
-        self.monitor.remove_site(url)
-        self.db.delete_site(url)
-        write_log(f"Website entfernt via Command: {url}", bot=self.bot, db=self.db)
-        embed = discord.Embed(title="Website entfernt", description=f"{url} wird nicht mehr überwacht.", color=discord.Color.orange())
-        await interaction.response.send_message(embed=embed)
-
-    @app_commands.command(name="status", description="Zeigt den Status aller überwachten Websites als Embed")
-    async def status(self, interaction: discord.Interaction):
-        await interaction.response.defer()
-        
-        status = self.monitor.get_status()
-        if not status:
-            embed = discord.Embed(
-                title="📊 Status der Websites", 
-                description="❌ **Keine Websites werden überwacht**\n\n" +
-                           "Verwende `/add [url]` um eine Website zur Überwachung hinzuzufügen.",
-                color=discord.Color.orange()
-            )
-            embed.add_field(
-                name="💡 Hilfe", 
-                value="• `/add https://example.com` - Website hinzufügen\n" +
-                      "• `/setchannel` - Benachrichtigungs-Channel setzen\n" +
-                      "• `/setlogchannel` - Log-Channel setzen", 
-                inline=False
-            )
-            embed.set_footer(text="Site Sentinel", icon_url=self.bot.user.avatar.url if self.bot.user.avatar else None)
-            embed.timestamp = discord.utils.utcnow()
-            await interaction.followup.send(embed=embed)
-            return
-            
-        embed = discord.Embed(
-            title="📊 Status der Websites", 
-            description=f"Überwachung von **{len(status)}** Website(s)",
-            color=discord.Color.purple()
-        )
-        
-        # Statistiken sammeln
-        online_count = 0
-        offline_count = 0
-        unknown_count = 0
-        
-        for url, up in status.items():
-            if up is None:
-                emoji = "⚪"
-                status_text = "Unbekannt"
-                unknown_count += 1
-            elif up:
-                emoji = "🟢"
-                status_text = "Online"
-                online_count += 1
-            else:
-                emoji = "🔴"
-                status_text = "Offline"
-                offline_count += 1
-            
-            # Statistiken hinzufügen falls verfügbar
-            stats_text = status_text
-            if url in self.monitor.stats:
-                stats = self.monitor.stats[url]
-                uptime_total = stats["up"] + stats["down"]
-                if uptime_total > 0:
-                    uptime_percent = round((stats["up"] / uptime_total) * 100, 1)
-                    stats_text += f" ({uptime_percent}% Uptime)"
-                    
-                    # Durchschnittliche Response-Zeit
-                    if stats["response_times"]:
-                        avg_response = round(sum(stats["response_times"]) / len(stats["response_times"]) * 1000)
-                        stats_text += f"\n⚡ {avg_response}ms avg"
-            
-            embed.add_field(name=f"{emoji} {url}", value=stats_text, inline=False)
-        
-        # Zusammenfassung hinzufügen
-        summary_text = ""
-        if online_count > 0:
-            summary_text += f"🟢 **{online_count}** Online"
-        if offline_count > 0:
-            if summary_text: summary_text += " • "
-            summary_text += f"🔴 **{offline_count}** Offline"
-        if unknown_count > 0:
-            if summary_text: summary_text += " • "
-            summary_text += f"⚪ **{unknown_count}** Unbekannt"
-        
-        if summary_text:
-            embed.add_field(name="📈 Zusammenfassung", value=summary_text, inline=False)
-        
-        embed.set_footer(text="Site Sentinel", icon_url=self.bot.user.avatar.url if self.bot.user.avatar else None)
-        embed.timestamp = discord.utils.utcnow()
-        
-        await interaction.followup.send(embed=embed)
-
-    @app_commands.command(name="ping", description="Testet eine Website oder IP und zeigt Response-Informationen")
-    @app_commands.describe(url="URL der Website oder IP-Adresse die getestet werden soll")
-    async def ping(self, interaction: discord.Interaction, url: str):
-        await interaction.response.defer()
-        
-        import aiohttp
-        import time
-        import asyncio
-        from urllib.parse import urlparse
-        
-        # URL validieren und formatieren
-        if not url.startswith(('http://', 'https://')):
-            url = 'https://' + url
-        
-        # Favicon URL generieren
-        try:
-            parsed = urlparse(url)
-            favicon_url = f"https://www.google.com/s2/favicons?domain={parsed.netloc}&sz=32"
-        except:
-            favicon_url = None
-        
-        embed = None
-        
-        try:
-            start_time = time.perf_counter()
-            async with aiohttp.ClientSession() as session:
-                async with asyncio.wait_for(session.get(url), timeout=10) as response:
-                    end_time = time.perf_counter()
-                    response_time_ms = round((end_time - start_time) * 1000)
-                    
-                    # Response-Daten sammeln
-                    status_code = response.status
-                    content_type = response.headers.get('Content-Type', 'N/A')
-                    content_length = response.headers.get('Content-Length', 'N/A')
-                    server = response.headers.get('Server', 'N/A')
-                    last_modified = response.headers.get('Last-Modified', 'N/A')
-                    
-                    # Status-Farbe bestimmen
-                    if 200 <= status_code < 300:
-                        color = discord.Color.green()
-                        status_emoji = "🟢"
-                    elif 300 <= status_code < 400:
-                        color = discord.Color.yellow()
-                        status_emoji = "🟡"
-                    elif 400 <= status_code < 500:
-                        color = discord.Color.orange()
-                        status_emoji = "🟠"
-                    else:
-                        color = discord.Color.red()
-                        status_emoji = "🔴"
-                    
-                    embed = discord.Embed(
-                        title="Website Test",
-                        description=f"**{url}**", 
-                        color=color,
-                        timestamp=discord.utils.utcnow()
-                    )
-                    
-                    embed.add_field(name="Status", value=f"{status_emoji} {status_code}", inline=True)
-                    embed.add_field(name="Response Time", value=f"⚡ {response_time_ms} ms", inline=True)
-                    embed.add_field(name="Content-Type", value=content_type[:50], inline=True)
-                    
-                    if content_length != 'N/A':
-                        # Formatierte Größe
-                        try:
-                            size_bytes = int(content_length)
-                            if size_bytes < 1024:
-                                size_str = f"{size_bytes} B"
-                            elif size_bytes < 1024*1024:
-                                size_str = f"{size_bytes/1024:.1f} KB"
-                            else:
-                                size_str = f"{size_bytes/(1024*1024):.1f} MB"
-                            embed.add_field(name="Content-Length", value=size_str, inline=True)
-                        except:
-                            embed.add_field(name="Content-Length", value=content_length, inline=True)
-                    
-                    if server != 'N/A':
-                        embed.add_field(name="Server", value=server[:50], inline=True)
-                    
-                    if last_modified != 'N/A':
-                        embed.add_field(name="Last-Modified", value=last_modified[:50], inline=True)
-                    
-                    if favicon_url:
-                        embed.set_thumbnail(url=favicon_url)
-                    
-                    embed.set_footer(text="Site Sentinel", icon_url=self.bot.user.avatar.url if self.bot.user.avatar else None)
-                    
-        except asyncio.TimeoutError:
-            embed = discord.Embed(
-                title="Website Test",
-                description=f"**{url}**", 
-                color=discord.Color.red(),
-                timestamp=discord.utils.utcnow()
-            )
-            embed.add_field(name="Fehler", value="🔴 Timeout (>10s)", inline=False)
-            if favicon_url:
-                embed.set_thumbnail(url=favicon_url)
-            embed.set_footer(text="Site Sentinel")
-            
-        except Exception as e:
-            embed = discord.Embed(
-                title="Website Test",
-                description=f"**{url}**", 
-                color=discord.Color.red(),
-                timestamp=discord.utils.utcnow()
-            )
-            embed.add_field(name="Fehler", value=f"🔴 {str(e)}", inline=False)
-            if favicon_url:
-                embed.set_thumbnail(url=favicon_url)
-            embed.set_footer(text="Site Sentinel")
-
-        await interaction.followup.send(embed=embed)
-
-    @app_commands.command(name="debug", description="Zeigt Debug-Informationen für das Monitoring")
-    async def debug(self, interaction: discord.Interaction):
-        await interaction.response.defer()
-        
-        import os
-        
-        status = self.monitor.get_status()
-        embed = discord.Embed(title="🔍 Debug Informationen", color=discord.Color.blue())
-        
-        if not status:
-            embed.add_field(name="❌ Problem", value="Keine Websites in der Überwachung", inline=False)
-        else:
-            embed.add_field(name="📊 Überwachte Sites", value=f"{len(status)} Website(s)", inline=True)
-            
-            for url, current_status in status.items():
-                status_text = "None (Unbekannt)" if current_status is None else ("Online" if current_status else "Offline")
-                
-                debug_info = f"**Status:** {status_text}\n"
-                
-                if url in self.monitor.stats:
-                    stats = self.monitor.stats[url]
-                    debug_info += f"**Up:** {stats['up']} | **Down:** {stats['down']}\n"
-                    if stats['response_times']:
-                        avg_time = sum(stats['response_times']) / len(stats['response_times'])
-                        debug_info += f"**Avg Response:** {avg_time*1000:.0f}ms\n"
-                else:
-                    debug_info += "**Stats:** Keine Daten\n"
-                
-                embed.add_field(name=f"🌐 {url[:50]}", value=debug_info, inline=False)
-        
-        # Check-Interval Info
-        embed.add_field(name="⏱️ Check Interval", value="60 Sekunden", inline=True)
-        
-        # Letzte Logs (falls verfügbar)
-        try:
-            log_file = "/home/the1andoni/Documents/Documents/Programmierung/Python/Bots/SiteSentinel/Logs/Bot.log"
-            if os.path.exists(log_file):
-                with open(log_file, 'r') as f:
-                    lines = f.readlines()[-10:]  # Letzte 10 Zeilen
-                recent_logs = "```\n" + "".join(lines[-5:]) + "```"  # Nur 5 für Discord
-                embed.add_field(name="📝 Letzte Logs", value=recent_logs[:1024], inline=False)
-        except Exception as e:
-            embed.add_field(name="📝 Log Fehler", value=str(e), inline=False)
-        
-        embed.timestamp = discord.utils.utcnow()
-        await interaction.followup.send(embed=embed)
+import re
+import asyncio
+import discord
+from discord import app_commands
+from logger import write_log, invalidate_log_channel, get_log_index, LOG_FILE
+from views import SiteListView, LogView
+from probes import ProbeConfig
+from workers import WorkerHub
+from sitefile import read_entries, detect_format, export_sites, validate_url
+from logsearch import tail_lines, scan_log, parse_time, format_time
+from netprobe import connect_samples, is_network_url, split_target
+from subscriptions import LEGACY_GUILD
+
+LOG_PAGE_SIZE = 15
+LEVEL_EMOJI = {"error": "🔴", "warning": "🟠"}
+
+
+class CustomCommands(discord.ext.commands.Cog):
+    def __init__(self, bot, db, monitor, subscriptions):
+        self.bot = bot
+        self.db = db
+        self.monitor = monitor
+        self.subscriptions = subscriptions
+
+    async def interaction_check(self, interaction: discord.Interaction):
+        # Websites und Channels gehören zu einem Server, in DMs gibt es nichts anzuzeigen
+        if interaction.guild_id is None:
+            await interaction.response.send_message("Dieser Command funktioniert nur auf einem Server.", ephemeral=True)
+            return False
+        return True
+
+    def _sites(self, interaction):
+        """Die Websites des Servers, aus dem der Command kommt (gleiche Schnittstelle wie der Monitor)"""
+        return self.subscriptions.view(interaction.guild_id, self.monitor)
+
+    @app_commands.command(name="setlogchannel", description="Setzt den Channel für Log-Meldungen (nur Bot-Owner)")
+    @app_commands.describe(channel="Text-Channel für Log-Meldungen")
+    async def setlogchannel(self, interaction: discord.Interaction, channel: discord.TextChannel):
+        # Die Logs enthalten die Websites aller Server
+        if not await self.bot.is_owner(interaction.user):
+            await interaction.response.send_message("Nur der Bot-Owner kann den Log-Channel setzen.", ephemeral=True)
+            return
+        channel_id = channel.id
+        prev = self.db.get_log_channel_id()
+        await self.db.set_log_channel_id(channel_id)
+        invalidate_log_channel()
+        write_log(f"Log-Channel gesetzt: {channel_id} (vorher: {prev})", bot=self.bot, db=self.db)
+        desc = f"Log-Meldungen werden jetzt in <#{channel_id}> gesendet."
+        if prev:
+            desc = f"Ersetzt <#{prev}> — " + desc
+        embed = discord.Embed(title="Log-Channel gesetzt", description=desc, color=discord.Color.dark_grey())
+        await interaction.response.send_message(embed=embed)
+
+    @app_commands.command(name="setchannel", description="Setzt den Channel für Statusnachrichten")
+    @app_commands.describe(channel="Text-Channel für Statusnachrichten")
+    async def setchannel(self, interaction: discord.Interaction, channel: discord.TextChannel):
+        channel_id = channel.id
+        guild_id = interaction.guild_id
+        prev = self.subscriptions.channels.get(guild_id)
+        await self.subscriptions.set_channel(guild_id, channel_id)
+        write_log(f"Status-Channel für Server {guild_id} gesetzt: {channel_id} (vorher: {prev})", bot=self.bot, db=self.db)
+        desc = f"Statusnachrichten werden jetzt in <#{channel_id}> gesendet."
+        if prev:
+            desc = f"Ersetzt <#{prev}> — " + desc
+        if self.subscriptions.urls(LEGACY_GUILD) and await self.bot.is_owner(interaction.user):
+            # Websites aus der Zeit vor mehreren Servern übernimmt der Server, in dem der Owner das ausführt
+            adopted = await self.subscriptions.adopt(guild_id)
+            desc += f"\n{adopted} bisherige Website(s) ohne Server-Zuordnung übernommen."
+        embed = discord.Embed(title="Channel gesetzt", description=desc, color=discord.Color.green())
+        await interaction.response.send_message(embed=embed)
+
+    @app_commands.command(name="add", description="Fügt eine Website zur Überwachung hinzu")
+    @app_commands.describe(
+        url="URL der Website",
+        interval="Check-Intervall in Sekunden (Standard: globales Intervall)",
+        timeout="Timeout pro Check in Sekunden (Standard: globaler Timeout)",
+        tag="Optionaler Tag zum Filtern in /status und /debug"
+    )
+    async def add(
+        self,
+        interaction: discord.Interaction,
+        url: str,
+        interval: app_commands.Range[int, 10, 86400] = None,
+        timeout: app_commands.Range[int, 1, 120] = None,
+        tag: app_commands.Range[str, 1, 50] = None
+    ):
+        try:
+            url = self.monitor.resolve(validate_url(url))
+        except ValueError as e:
+            embed = discord.Embed(title="Website hinzufügen", description=str(e), color=discord.Color.red())
+            await interaction.response.send_message(embed=embed, ephemeral=True)
+            return
+        note = ""
+        if url not in self.monitor.sites:
+            url = await self.monitor.add_site(url, interval, timeout, tag)
+        elif self.subscriptions.is_shared(interaction.guild_id, url):
+            # Andere Server prüfen die Website schon: nur abonnieren, deren Einstellungen bleiben
+            if interval or timeout or tag:
+                note = "\nDie Website wird auch von anderen Servern überwacht, Intervall, Timeout und Tag bleiben unverändert."
+        else:
+            await self.monitor.update_site(url, interval, timeout, tag)
+        await self.subscriptions.subscribe(interaction.guild_id, [url])
+        write_log(f"Website hinzugefügt via Command: {url} (Server {interaction.guild_id})", bot=self.bot, db=self.db)
+        job = self.monitor.scheduler.get(url)
+        embed = discord.Embed(
+            title="Website hinzugefügt",
+            description=f"{url} wird jetzt alle {job.interval} Sekunden überwacht.{note}",
+            color=discord.Color.blue()
+        )
+        await interaction.response.send_message(embed=embed)
+
+    @app_commands.command(name="remove", description="Entfernt eine Website aus der Überwachung")
+    @app_commands.describe(url="URL der Website")
+    async def remove(self, interaction: discord.Interaction, url: str):
+        url = self.monitor.resolve(url)
+        if not self.subscriptions.is_subscribed(interaction.guild_id, url):
+            embed = discord.Embed(title="Website entfernen", description=f"{url} wird auf diesem Server nicht überwacht.", color=discord.Color.orange())
+            await interaction.response.send_message(embed=embed, ephemeral=True)
+            return
+        if await self.subscriptions.unsubscribe(interaction.guild_id, url):
+            # Kein anderer Server hat die Website abonniert -> Check beenden
+            await self.monitor.remove_site(url)
+        write_log(f"Website entfernt via Command: {url} (Server {interaction.guild_id})", bot=self.bot, db=self.db)
+        embed = discord.Embed(title="Website entfernt", description=f"{url} wird nicht mehr überwacht.", color=discord.Color.orange())
+        await interaction.response.send_message(embed=embed)
+
+    @app_commands.command(name="import", description="Importiert Websites aus einer CSV-, YAML- oder Textdatei")
+    @app_commands.describe(
+        file="CSV (url,interval,timeout,tag,probe), YAML-Liste oder eine URL pro Zeile",
+        precheck="Websites vorher auf Erreichbarkeit prüfen (Standard: ja)",
+        skip_unreachable="Nicht erreichbare Websites nicht importieren"
+    )
+    async def import_sites(
+        self,
+        interaction: discord.Interaction,
+        file: discord.Attachment,
+        precheck: bool = True,
+        skip_unreachable: bool = False
+    ):
+        await interaction.response.defer()
+
+        entries = {}
+        invalid = []
+        duplicates = 0
+        try:
+            async with self.bot.http_client.session.get(file.url) as response:
+                response.raise_for_status()
+                async for line, entry, error in read_entries(response.content, detect_format(file.filename)):
+                    if error is not None:
+                        invalid.append(f"Zeile {line}: {error}")
+                    elif entry.url in entries:
+                        duplicates += 1
+                    else:
+                        entries[entry.url] = entry
+        except Exception as e:
+            embed = discord.Embed(title="Import fehlgeschlagen", description=f"{file.filename}: {e}"[:4000], color=discord.Color.red())
+            await interaction.followup.send(embed=embed)
+            return
+
+        unreachable = []
+        if precheck and entries:
+            # Höchstens 20 Vorab-Checks gleichzeitig, damit die laufende Überwachung nicht leidet
+            limit = asyncio.Semaphore(20)
+            session = self.bot.http_client.session
+
+            async def reachable(entry):
+                async with limit:
+                    result = await self.bot.checker.check(session, entry.url, timeout=entry.timeout, probe=entry.probe)
+                return entry, result
+
+            for entry, result in await asyncio.gather(*(reachable(entry) for entry in entries.values())):
+                if not result.ok:
+                    unreachable.append(f"{entry.url} ({result.reason})")
+                    if skip_unreachable:
+                        del entries[entry.url]
+
+        # Neue URLs einplanen; schon geprüfte URLs nur aktualisieren, wenn kein anderer Server sie abonniert hat
+        guild_sites = self._sites(interaction)
+        new = []
+        shared = []
+        for entry in entries.values():
+            (shared if self.monitor.resolve(entry.url) in self.monitor.sites else new).append(entry)
+        existing = sum(1 for entry in shared if self.monitor.resolve(entry.url) in guild_sites.sites)
+        if new:
+            await self.monitor.add_sites((entry.url, entry.interval, entry.timeout, entry.tag, entry.probe) for entry in new)
+        kept = 0
+        for entry in shared:
+            url = self.monitor.resolve(entry.url)
+            if self.subscriptions.is_shared(interaction.guild_id, url):
+                kept += 1  # Einstellungen gelten auch für andere Server, nur abonnieren
+                continue
+            await self.monitor.update_site(url, entry.interval, entry.timeout, entry.tag)
+            if entry.probe is not None:
+                await self.monitor.set_probe(url, entry.probe)
+        await self.subscriptions.subscribe(interaction.guild_id, [self.monitor.resolve(url) for url in entries])
+        write_log(f"Import aus {file.filename}: {len(entries)} Websites (Server {interaction.guild_id})", bot=self.bot, db=self.db)
+
+        embed = discord.Embed(
+            title="📥 Import abgeschlossen",
+            description=(
+                f"**{len(entries)}** Website(s) übernommen ({len(entries) - existing} neu, {existing} aktualisiert)\n"
+                + (f"{kept} davon überwachen auch andere Server, ihre Einstellungen bleiben unverändert\n" if kept else "")
+                + f"Ungültig: {len(invalid)} • Doppelt: {duplicates}"
+                + (f" • Nicht erreichbar: {len(unreachable)}" + (" (übersprungen)" if skip_unreachable else "") if precheck else "")
+            ),
+            color=discord.Color.blue() if not invalid else discord.Color.orange(),
+            timestamp=discord.utils.utcnow()
+        )
+        for name, items in (("❌ Ungültig", invalid), ("🔴 Nicht erreichbar", unreachable)):
+            if items:
+                value = "\n".join(items[:10])
+                if len(items) > 10:
+                    value += f"\n… und {len(items) - 10} weitere"
+                embed.add_field(name=name, value=value[:1024], inline=False)
+        embed.set_footer(text=f"Site Sentinel • {file.filename}")
+        await interaction.followup.send(embed=embed)
+
+    @app_commands.command(name="export", description="Exportiert alle Websites mit Einstellungen und Kennzahlen")
+    @app_commands.describe(format="Dateiformat (Standard: CSV)")
+    @app_commands.choices(format=[
+        app_commands.Choice(name="CSV", value="csv"),
+        app_commands.Choice(name="YAML", value="yaml"),
+    ])
+    async def export(self, interaction: discord.Interaction, format: app_commands.Choice[str] = None):
+        await interaction.response.defer()
+        fmt = format.value if format else "csv"
+        sites = self._sites(interaction)
+        with await export_sites(sites, fmt) as fp:
+            file = discord.File(fp, filename=f"sitesentinel-sites.{fmt}")
+            await interaction.followup.send(content=f"📤 {len(sites.sites)} Website(s) exportiert", file=file)
+
+    @app_commands.command(name="probe", description="Legt fest, wie eine Website geprüft wird")
+    @app_commands.describe(
+        url="URL der Website",
+        mode="get = normaler Request, head = nur Status-Code, conditional = GET mit ETag/If-Modified-Since",
+        keyword="Text, der im Body vorkommen muss",
+        regex="Regulärer Ausdruck, der im Body vorkommen muss",
+        body_hash="Erwarteter SHA-256 des Bodys (der ersten max_bytes)",
+        max_bytes="Maximal gelesene Bytes des Bodys (Standard: 256 KB)"
+    )
+    @app_commands.choices(mode=[
+        app_commands.Choice(name="GET", value="get"),
+        app_commands.Choice(name="HEAD", value="head"),
+        app_commands.Choice(name="Conditional GET", value="conditional"),
+    ])
+    async def probe(
+        self,
+        interaction: discord.Interaction,
+        url: str,
+        mode: app_commands.Choice[str] = None,
+        keyword: str = None,
+        regex: str = None,
+        body_hash: str = None,
+        max_bytes: app_commands.Range[int, 1024, 10 * 1024 * 1024] = None
+    ):
+        url = self.monitor.resolve(url)
+        if not self.subscriptions.is_subscribed(interaction.guild_id, url):
+            embed = discord.Embed(title="Probe", description=f"{url} wird auf diesem Server nicht überwacht.", color=discord.Color.orange())
+            await interaction.response.send_message(embed=embed, ephemeral=True)
+            return
+
+        mode_value = mode.value if mode else "get"
+        if mode_value == "get" and not (keyword or regex or body_hash or max_bytes):
+            probe = None  # Standard: einfacher GET
+        else:
+            try:
+                probe = ProbeConfig(
+                    method="HEAD" if mode_value == "head" else "GET",
+                    conditional=mode_value == "conditional",
+                    keyword=keyword,
+                    regex=regex,
+                    body_hash=body_hash,
+                    max_bytes=max_bytes
+                )
+            except re.error as e:
+                embed = discord.Embed(title="Probe", description=f"Ungültiger Regex: {e}", color=discord.Color.red())
+                await interaction.response.send_message(embed=embed, ephemeral=True)
+                return
+
+        await self.monitor.set_probe(url, probe)
+        description = probe.describe() if probe is not None else "GET"
+        if probe is not None and probe.method == "HEAD" and (keyword or regex or body_hash):
+            description += "\n⚠️ Bei HEAD werden Body-Prüfungen ignoriert."
+        embed = discord.Embed(title="Probe gesetzt", description=f"**{url}**\n{description}", color=discord.Color.blue())
+        await interaction.response.send_message(embed=embed)
+
+    @app_commands.command(name="status", description="Zeigt den Status aller überwachten Websites als Embed")
+    async def status(self, interaction: discord.Interaction):
+        await interaction.response.defer()
+        
+        sites = self._sites(interaction)
+        status = sites.get_status()
+        if not status:
+            embed = discord.Embed(
+                title="📊 Status der Websites", 
+                description="❌ **Keine Websites werden überwacht**\n\n" +
+                           "Verwende `/add [url]` um eine Website zur Überwachung hinzuzufügen.",
+                color=discord.Color.orange()
+            )
+            embed.add_field(
+                name="💡 Hilfe", 
+                value="• `/add https://example.com` - Website hinzufügen\n" +
+                      "• `/setchannel` - Benachrichtigungs-Channel setzen\n" +
+                      "• `/setlogchannel` - Log-Channel setzen", 
+                inline=False
+            )
+            embed.set_footer(text="Site Sentinel", icon_url=self.bot.user.avatar.url if self.bot.user.avatar else None)
+            embed.timestamp = discord.utils.utcnow()
+            await interaction.followup.send(embed=embed)
+            return
+            
+        view = SiteListView(sites, self._render_status)
+        await interaction.followup.send(embed=self._render_status(view), view=view)
+
+    def _render_status(self, view):
+        sites = view.monitor  # Websites des Servers (GuildSites)
+        embed = discord.Embed(
+            title="📊 Status der Websites", 
+            description=f"Überwachung von **{len(sites.sites)}** Website(s)",
+            color=discord.Color.purple()
+        )
+
+        # Nur die Websites der aktuellen Seite, Texte kommen aus dem Monitor-Cache
+        for url in view.page_urls():
+            up = sites.sites.get(url)
+            emoji = "⚪" if up is None else ("🟢" if up else "🔴")
+            embed.add_field(name=f"{emoji} {url}"[:256], value=sites.summary(url), inline=False)
+
+        # Zusammenfassung über die Websites des Servers
+        counts = sites.counts
+        summary_text = ""
+        if counts[True] > 0:
+            summary_text += f"🟢 **{counts[True]}** Online"
+        if counts[False] > 0:
+            if summary_text: summary_text += " • "
+            summary_text += f"🔴 **{counts[False]}** Offline"
+        if counts[None] > 0:
+            if summary_text: summary_text += " • "
+            summary_text += f"⚪ **{counts[None]}** Unbekannt"
+        
+        if summary_text:
+            embed.add_field(name="📈 Zusammenfassung", value=summary_text, inline=False)
+        
+        embed.set_footer(
+            text=f"Site Sentinel • Seite {view.page + 1}/{view.pages} ({view.count()} Websites)",
+            icon_url=self.bot.user.avatar.url if self.bot.user.avatar else None
+        )
+        embed.timestamp = discord.utils.utcnow()
+        return embed
+
+    @app_commands.command(name="uptime", description="Zeigt die Uptime der letzten Tage aus der Check-Historie")
+    @app_commands.describe(url="URL der Website (leer = alle Websites)", days="Zeitraum in Tagen (Standard: 30)")
+    async def uptime(self, interaction: discord.Interaction, url: str = None, days: app_commands.Range[int, 1, 730] = 30):
+        await interaction.response.defer()
+
+        import time
+
+        if url:
+            url = self.monitor.resolve(url)
+        start_time = time.perf_counter()
+        since = int(time.time()) - days * 86400
+        rows = await self.db.get_uptime(since, url, guild_id=interaction.guild_id)
+        query_ms = (time.perf_counter() - start_time) * 1000
+
+        embed = discord.Embed(
+            title=f"📈 Uptime der letzten {days} Tage",
+            color=discord.Color.purple(),
+            timestamp=discord.utils.utcnow()
+        )
+        if not rows:
+            embed.description = "Keine Check-Daten für diesen Zeitraum vorhanden."
+        else:
+            lines = []
+            for site, checks, up, avg_latency, _ in rows:
+                uptime_percent = (up / checks) * 100 if checks else 0
+                line = f"**{site}** — {uptime_percent:.2f}% ({up}/{checks} Checks)"
+                if avg_latency is not None:
+                    line += f" · ⚡ {avg_latency:.0f}ms avg"
+                lines.append(line)
+            description = "\n".join(lines)
+            if len(description) > 4000:
+                description = description[:4000].rsplit("\n", 1)[0] + "\n…"
+            embed.description = description
+
+        embed.set_footer(text=f"Site Sentinel • Abfrage in {query_ms:.1f} ms")
+        await interaction.followup.send(embed=embed)
+
+    @app_commands.command(name="incidents", description="Listet die Ausfälle der letzten Tage auf")
+    @app_commands.describe(url="URL der Website (leer = alle Websites)", days="Zeitraum in Tagen (Standard: 30)")
+    async def incidents(self, interaction: discord.Interaction, url: str = None, days: app_commands.Range[int, 1, 730] = 30):
+        await interaction.response.defer()
+
+        import time
+
+        if url:
+            url = self.monitor.resolve(url)
+        since = int(time.time()) - days * 86400
+        rows = await self.db.get_incidents(since, url, limit=20, guild_id=interaction.guild_id)
+
+        embed = discord.Embed(
+            title=f"🚨 Ausfälle der letzten {days} Tage",
+            color=discord.Color.red(),
+            timestamp=discord.utils.utcnow()
+        )
+        if not rows:
+            embed.description = "Keine Ausfälle in diesem Zeitraum. 🎉"
+        for site, started, ended, reason in rows:
+            if ended is None:
+                duration = "läuft noch"
+            else:
+                minutes, seconds = divmod(ended - started, 60)
+                hours, minutes = divmod(minutes, 60)
+                duration = f"{hours}h {minutes}m {seconds}s"
+            value = f"Beginn: <t:{started}:f>\nDauer: {duration}"
+            if reason:
+                value += f"\nGrund: {reason[:200]}"
+            embed.add_field(name=f"🔴 {site[:200]}", value=value, inline=False)
+
+        embed.set_footer(text="Site Sentinel")
+        await interaction.followup.send(embed=embed)
+
+    @app_commands.command(name="ping", description="Testet eine Website, IP oder einen TCP/TLS-Dienst und zeigt Verbindungs- und Response-Informationen")
+    @app_commands.describe(
+        url="URL der Website, IP-Adresse oder tcp://host:port bzw. tls://host:port",
+        samples="Anzahl Verbindungsversuche für min/avg/max/Jitter (Standard: 4)"
+    )
+    async def ping(self, interaction: discord.Interaction, url: str, samples: app_commands.Range[int, 1, 20] = 4):
+        await interaction.response.defer()
+        
+        # URL in kanonische Form bringen (ohne Schema wird https angenommen, bei IPs http)
+        url = self.monitor.resolve(url)
+        try:
+            host, port, tls = split_target(url)
+        except ValueError as e:
+            embed = discord.Embed(title="Website Test", description=f"**{url}**\n🔴 {e}", color=discord.Color.red())
+            await interaction.followup.send(embed=embed)
+            return
+        
+        if is_network_url(url):
+            # Dienst ohne HTTP (Datenbank, SMTP, Gameserver, ...): nur Verbindungsaufbau
+            stats = await connect_samples(host, port, tls, count=samples)
+            if stats.received == stats.sent:
+                color = discord.Color.green()
+            elif stats.received:
+                color = discord.Color.yellow()
+            else:
+                color = discord.Color.red()
+            embed = discord.Embed(title="Verbindungstest", description=f"**{url}**", color=color, timestamp=discord.utils.utcnow())
+            self._add_connection_fields(embed, stats)
+            embed.set_footer(text="Site Sentinel")
+            await interaction.followup.send(embed=embed)
+            return
+        
+        # Favicon URL aus dem Cache (wird bei Bedarf im Hintergrund geladen)
+        try:
+            favicon_url = self.bot.favicons.lookup(url)
+        except:
+            favicon_url = None
+        
+        # Verbindungsaufbau mehrfach messen, HTTP einmal; läuft für die URL gerade
+        # ein geplanter Check, wird dessen Ergebnis mitbenutzt
+        stats, result = await asyncio.gather(
+            connect_samples(host, port, tls, count=samples),
+            self.bot.checker.check(self.bot.http_client.session, url, timeout=10, probe=self.monitor.probes.get(url)),
+        )
+        
+        if result.status is None:
+            embed = discord.Embed(
+                title="Website Test",
+                description=f"**{url}**", 
+                color=discord.Color.red(),
+                timestamp=discord.utils.utcnow()
+            )
+            if result.error == "TimeoutError":
+                embed.add_field(name="Fehler", value="🔴 Timeout (>10s)", inline=False)
+            else:
+                embed.add_field(name="Fehler", value=f"🔴 {result.error}"[:1024], inline=False)
+            self._add_connection_fields(embed, stats)
+            if favicon_url:
+                embed.set_thumbnail(url=favicon_url)
+            embed.set_footer(text="Site Sentinel")
+            await interaction.followup.send(embed=embed)
+            return
+        
+        # Response-Daten sammeln
+        status_code = result.status
+        response_time_ms = round(result.response_time * 1000)
+        headers = result.headers or {}
+        content_type = headers.get('Content-Type', 'N/A')
+        content_length = headers.get('Content-Length', 'N/A')
+        server = headers.get('Server', 'N/A')
+        last_modified = headers.get('Last-Modified', 'N/A')
+        
+        # Status-Farbe bestimmen
+        if 200 <= status_code < 300:
+            color = discord.Color.green()
+            status_emoji = "🟢"
+        elif 300 <= status_code < 400:
+            color = discord.Color.yellow()
+            status_emoji = "🟡"
+        elif 400 <= status_code < 500:
+            color = discord.Color.orange()
+            status_emoji = "🟠"
+        else:
+            color = discord.Color.red()
+            status_emoji = "🔴"
+        
+        embed = discord.Embed(
+            title="Website Test",
+            description=f"**{url}**", 
+            color=color,
+            timestamp=discord.utils.utcnow()
+        )
+        
+        embed.add_field(name="Status", value=f"{status_emoji} {status_code}", inline=True)
+        embed.add_field(name="Response Time", value=f"⚡ {response_time_ms} ms", inline=True)
+        embed.add_field(name="Content-Type", value=content_type[:50], inline=True)
+        
+        if content_length != 'N/A':
+            # Formatierte Größe
+            try:
+                size_bytes = int(content_length)
+                if size_bytes < 1024:
+                    size_str = f"{size_bytes} B"
+                elif size_bytes < 1024*1024:
+                    size_str = f"{size_bytes/1024:.1f} KB"
+                else:
+                    size_str = f"{size_bytes/(1024*1024):.1f} MB"
+                embed.add_field(name="Content-Length", value=size_str, inline=True)
+            except:
+                embed.add_field(name="Content-Length", value=content_length, inline=True)
+        
+        if server != 'N/A':
+            embed.add_field(name="Server", value=server[:50], inline=True)
+        
+        if last_modified != 'N/A':
+            embed.add_field(name="Last-Modified", value=last_modified[:50], inline=True)
+        
+        if result.error is not None:
+            embed.add_field(name="Probe", value=f"🔴 {result.error}"[:1024], inline=False)
+        if result.timing is not None:
+            embed.add_field(name="Phasen", value=f"⏱️ {result.timing.describe()}", inline=False)
+        self._add_connection_fields(embed, stats)
+        if favicon_url:
+            embed.set_thumbnail(url=favicon_url)
+        
+        embed.set_footer(text="Site Sentinel", icon_url=self.bot.user.avatar.url if self.bot.user.avatar else None)
+
+        await interaction.followup.send(embed=embed)
+
+    def _add_connection_fields(self, embed, stats):
+        """Ergebnis von netprobe.connect_samples als Embed-Felder"""
+        import time
+
+        if stats.error is not None:
+            embed.add_field(name="Verbindung", value=f"🔴 {stats.error}"[:1024], inline=False)
+            return
+        value = f"🔁 {stats.received}/{stats.sent} erfolgreich · Verlust {stats.loss:.0f}%"
+        summary = stats.summary()
+        if summary:
+            value += (
+                f"\n⚡ min {summary['min']:.0f}ms · avg {summary['avg']:.0f}ms · max {summary['max']:.0f}ms"
+                f" · Jitter {summary['jitter']:.1f}ms"
+            )
+        value += f"\n🌐 {stats.address or stats.host}:{stats.port} · DNS {stats.dns * 1000:.0f}ms"
+        embed.add_field(name="Verbindung (TCP" + (" + TLS)" if stats.tls else ")"), value=value, inline=False)
+        if summary and "tls" in summary:
+            tls_text = f"🔒 Handshake {summary['tls']:.0f}ms avg"
+            expires = stats.cert_expires
+            if expires is not None:
+                days = (expires - time.time()) / 86400
+                tls_text += f"\n{'⚠️' if days < 14 else '📜'} Zertifikat gültig bis <t:{int(expires)}:D> (noch {days:.0f} Tage)"
+            embed.add_field(name="TLS", value=tls_text, inline=False)
+        if stats.received < stats.sent and stats.last_error:
+            embed.add_field(name="Verbindungsfehler", value=f"🔴 {stats.last_error}"[:1024], inline=False)
+
+    @app_commands.command(name="logs", description="Durchsucht die Bot-Logs nach Website, Zeitraum und Text")
+    @app_commands.describe(
+        url="Nur Einträge zu dieser Website",
+        text="Suchbegriff(e) in der Meldung",
+        since="Ab wann, z.B. 6h, 2d oder 2024-05-01 12:00 (Standard: 24h)",
+        until="Bis wann, gleiches Format (Standard: jetzt)"
+    )
+    async def logs(self, interaction: discord.Interaction, url: str = None, text: str = None, since: str = None, until: str = None):
+        await interaction.response.defer()
+
+        try:
+            since_ts = parse_time(since or "24h")
+            until_ts = parse_time(until) if until else None
+        except ValueError as e:
+            embed = discord.Embed(title="📝 Logs", description=str(e), color=discord.Color.orange())
+            await interaction.followup.send(embed=embed)
+            return
+        # Die Logs enthalten die Websites aller Server: ohne URL nur für den Bot-Owner
+        owner = await self.bot.is_owner(interaction.user)
+        if url:
+            url = self.monitor.resolve(url)
+            if not owner and not self.subscriptions.is_subscribed(interaction.guild_id, url):
+                embed = discord.Embed(title="📝 Logs", description=f"{url} wird auf diesem Server nicht überwacht.", color=discord.Color.orange())
+                await interaction.followup.send(embed=embed)
+                return
+        elif not owner:
+            embed = discord.Embed(title="📝 Logs", description="Bitte eine Website dieses Servers angeben (alle Logs nur für den Bot-Owner).", color=discord.Color.orange())
+            await interaction.followup.send(embed=embed)
+            return
+        index = get_log_index()
+
+        async def fetch(page):
+            offset = page * LOG_PAGE_SIZE
+            if index is not None:
+                return await asyncio.to_thread(index.search, url, text, since_ts, until_ts, LOG_PAGE_SIZE, offset)
+            return await asyncio.to_thread(scan_log, LOG_FILE, url, text, since_ts, until_ts, LOG_PAGE_SIZE, offset)
+
+        def render(view):
+            filters = [f"seit {format_time(since_ts)}"]
+            if until_ts is not None:
+                filters.append(f"bis {format_time(until_ts)}")
+            if url:
+                filters.append(url)
+            if text:
+                filters.append(f"„{text}“")
+            embed = discord.Embed(title="📝 Logs", color=discord.Color.dark_grey())
+            lines = []
+            size = 0
+            for record in view.records:
+                line = f"`{format_time(record.time)}` {LEVEL_EMOJI.get(record.level, '')} {record.message[:300]}".replace("  ", " ")
+                if size + len(line) + 1 > 3800:
+                    break
+                lines.append(line)
+                size += len(line) + 1
+            embed.description = " · ".join(filters)[:200] + "\n\n" + ("\n".join(lines) if lines else "Keine Einträge gefunden.")
+            source = "Index" if index is not None else "Log-Datei"
+            embed.set_footer(text=f"Site Sentinel • Seite {view.page + 1} • {source} • Abfrage in {view.query_ms:.1f} ms")
+            return embed
+
+        view = LogView(fetch, render)
+        await view.load()
+        await interaction.followup.send(embed=render(view), view=view)
+
+    @app_commands.command(name="debug", description="Zeigt Debug-Informationen für das Monitoring")
+    async def debug(self, interaction: discord.Interaction):
+        await interaction.response.defer()
+        
+        import os
+        
+        # Letzte Logs (falls verfügbar) - einmal pro Aufruf, nicht pro Seite; enthalten alle Server
+        log_field = None
+        try:
+            if os.path.exists(LOG_FILE) and await self.bot.is_owner(interaction.user):
+                # Nur das Ende der Datei lesen, unabhängig von ihrer Größe
+                lines = [line[:200] for line in tail_lines(LOG_FILE, 5)]
+                recent_logs = "```\n" + "\n".join(lines) + "\n```"
+                log_field = ("📝 Letzte Logs", recent_logs[-1024:] if len(recent_logs) > 1024 else recent_logs)
+        except Exception as e:
+            log_field = ("📝 Log Fehler", str(e))
+
+        sites = self._sites(interaction)
+
+        def render(view):
+            return self._render_debug(sites, view, log_field)
+
+        if not sites.sites:
+            await interaction.followup.send(embed=self._render_debug(sites, None, log_field))
+            return
+        view = SiteListView(sites, render)
+        await interaction.followup.send(embed=render(view), view=view)
+
+    def _render_debug(self, sites, view, log_field):
+        status = sites.get_status()
+        embed = discord.Embed(title="🔍 Debug Informationen", color=discord.Color.blue())
+        
+        if not status:
+            embed.add_field(name="❌ Problem", value="Keine Websites in der Überwachung", inline=False)
+        else:
+            embed.add_field(name="📊 Überwachte Sites", value=f"{len(status)} Website(s)", inline=True)
+            
+            for url in view.page_urls():
+                current_status = status.get(url)
+                status_text = "None (Unbekannt)" if current_status is None else ("Online" if current_status else "Offline")
+                
+                debug_info = f"**Status:** {status_text}\n"
+                job = self.monitor.scheduler.get(url)
+                if job is not None:
+                    interval_text = f"{job.interval}s"
+                    if job.current != job.interval:
+                        interval_text += f" (aktuell {job.current:g}s)"
+                    debug_info += f"**Intervall:** {interval_text} | **Timeout:** {job.timeout}s\n"
+                policy = self.monitor.policy
+                if policy is not None and policy.is_flapping(url):
+                    debug_info += "**Flapping:** ja, Benachrichtigungen unterdrückt\n"
+                probe = self.monitor.probes.get(url)
+                debug_info += f"**Probe:** {probe.describe() if probe is not None else 'GET'}\n"
+                
+                state = self.monitor.get_state(url)
+                if state is not None and (state.up or state.down):
+                    debug_info += f"**Up:** {state.up} | **Down:** {state.down}\n"
+                    if state.latency.last is not None:
+                        debug_info += f"**Letzte Response:** {state.latency.last:.0f}ms\n"
+                    for window in ("1h", "24h", "7d"):
+                        latency = state.latency.summary(window)
+                        if latency:
+                            debug_info += (
+                                f"**{window}:** {latency['avg']:.0f}ms avg | p95 {latency['p95']:.0f}ms"
+                                f" | max {latency['max']:.0f}ms ({latency['count']} Checks)\n"
+                            )
+                    phases = state.phases.summary() if state.phases is not None else None
+                    if phases:
+                        parts = [
+                            f"{label} {phases[key]:.0f}ms"
+                            for label, key in (("DNS", "dns"), ("Connect", "connect"), ("TTFB", "ttfb"), ("Gesamt", "total"))
+                            if phases[key] is not None
+                        ]
+                        debug_info += f"**Phasen (Median):** {' | '.join(parts)} | Reuse {phases['reuse']:.0f}%\n"
+                    outage = state.last_downtime()
+                    if outage is not None:
+                        start, end, duration = outage
+                        debug_info += (
+                            f"**Letzter Ausfall:** <t:{int(start)}:R>, "
+                            + (f"{duration / 60:.0f} min" if end is not None else "dauert noch an")
+                            + "\n"
+                        )
+                else:
+                    debug_info += "**Stats:** Keine Daten\n"
+                
+                embed.add_field(name=f"🌐 {url[:50]}", value=debug_info, inline=False)
+        
+        # Check-Interval Info
+        scheduler = self.monitor.scheduler
+        embed.add_field(name="⏱️ Check Interval", value=f"{scheduler.default_interval} Sekunden (Standard)", inline=True)
+        embed.add_field(name="⏳ Überläufe", value=f"{scheduler.overruns} übersprungene Checks", inline=True)
+        if getattr(self.bot, "first_check", None) is not None:
+            embed.add_field(name="🚀 Start", value=f"Erster Check {self.bot.first_check:.2f}s nach Prozessstart", inline=True)
+        if isinstance(scheduler, WorkerHub):
+            workers = scheduler.workers
+            embed.add_field(name="🧵 Worker", value=f"{len(workers)} verbunden" + (f": {', '.join(workers)}"[:900] if workers else ""), inline=False)
+        
+        if log_field is not None:
+            embed.add_field(name=log_field[0], value=log_field[1], inline=False)
+        
+        if view is not None:
+            embed.set_footer(text=f"Seite {view.page + 1}/{view.pages} ({view.count()} Websites)")
+        embed.timestamp = discord.utils.utcnow()
+        return embed
@@ -1,62 +1,641 @@
-import sqlite3
-
-class Database:
-    def __init__(self, db_path="data.db"):
-        self.conn = sqlite3.connect(db_path)
-        self.create_tables()
-
-    def create_tables(self):
-        cursor = self.conn.cursor()
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS settings (
-                key TEXT PRIMARY KEY,
-                value TEXT
-            )
-        """)
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS websites (
-                url TEXT PRIMARY KEY,
-                status TEXT,
-                last_checked TEXT
-            )
-        """)
-        self.conn.commit()
-
-    def set_log_channel_id(self, channel_id):
-        cursor = self.conn.cursor()
-        cursor.execute("REPLACE INTO settings (key, value) VALUES (?, ?)", ("log_channel_id", str(channel_id)))
-        self.conn.commit()
-
-    def get_log_channel_id(self):
-        cursor = self.conn.cursor()
-        cursor.execute("SELECT value FROM settings WHERE key=?", ("log_channel_id",))
-        result = cursor.fetchone()
-        return int(result[0]) if result else None
-
-    def set_channel_id(self, channel_id):
-        cursor = self.conn.cursor()
-        cursor.execute("REPLACE INTO settings (key, value) VALUES (?, ?)", ("channel_id", str(channel_id)))
-        self.conn.commit()
-
-    def get_channel_id(self):
-        cursor = self.conn.cursor()
-        cursor.execute("SELECT value FROM settings WHERE key=?", ("channel_id",))
-        result = cursor.fetchone()
-        return int(result[0]) if result else None
-
-    def save_site(self, url):
-        cursor = self.conn.cursor()
-        cursor.execute("REPLACE INTO websites (url, status, last_checked) VALUES (?, ?, ?)", (url, 'unknown', ''))
-        self.conn.commit()
-
-    def delete_site(self, url):
-        cursor = self.conn.cursor()
-        cursor.execute("DELETE FROM websites WHERE url=?", (url,))
-        self.conn.commit()
-
-    def load_sites(self):
-        cursor = self.conn.cursor()
-        cursor.execute("SELECT url FROM websites")
-        rows = cursor.fetchall()
-        # Returniere nur die URLs, nicht den Status (wird im SiteMonitor auf None gesetzt)
-        return [row[0] for row in rows]
+import json
+import time
+import queue
+import sqlite3
+import asyncio
+import datetime
+import threading
+import contextlib
+import concurrent.futures
+
+# Auflösung der Rollup-Tabellen: Name -> (Bucket-Größe in Sekunden, Aufbewahrung in Sekunden)
+ROLLUPS = {
+    "minute": (60, 2 * 86400),
+    "hour": (3600, 90 * 86400),
+    "day": (86400, 730 * 86400),
+}
+RAW_RETENTION = 7 * 86400  # Einzelne Check-Ergebnisse
+UPTIME_MINUTE_RANGE = 6 * 3600  # /uptime bis zu dieser Spanne aus Minuten-Rollups
+
+
+def _encode_latency(latency):
+    if latency is None or isinstance(latency, str):
+        return latency
+    return json.dumps(latency, separators=(",", ":"))
+
+
+class Database:
+    def __init__(self, db_path="data.db"):
+        self.conn = sqlite3.connect(db_path)
+        # WAL: Lesen blockiert Schreiben nicht, Commits sind deutlich günstiger
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        # Im Batch-Modus committet der Aufrufer (AsyncDatabase) selbst
+        self._batching = False
+        self.create_tables()
+
+    def _commit(self):
+        if not self._batching:
+            self.conn.commit()
+
+    @contextlib.contextmanager
+    def _transaction(self):
+        if self._batching:
+            yield
+            return
+        with self.conn:
+            yield
+
+    @contextlib.contextmanager
+    def batch(self):
+        """Mehrere Aufrufe in einer Transaktion; jeder Aufruf läuft in einem eigenen Savepoint"""
+        self._batching = True
+        self.conn.execute("BEGIN")
+        try:
+            yield
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+        finally:
+            self._batching = False
+
+    def run_in_batch(self, func, *args):
+        # Fehler eines Aufrufs rollen nur diesen Aufruf zurück, nicht den ganzen Batch
+        self.conn.execute("SAVEPOINT op")
+        try:
+            result = func(*args)
+        except Exception:
+            self.conn.execute("ROLLBACK TO op")
+            self.conn.execute("RELEASE op")
+            raise
+        self.conn.execute("RELEASE op")
+        return result
+
+    def load_settings(self):
+        cursor = self.conn.cursor()
+        cursor.execute("SELECT key, value FROM settings")
+        return dict(cursor.fetchall())
+
+    def create_tables(self):
+        cursor = self.conn.cursor()
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS settings (
+                key TEXT PRIMARY KEY,
+                value TEXT
+            )
+        """)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS websites (
+                url TEXT PRIMARY KEY,
+                status TEXT,
+                last_checked TEXT
+            )
+        """)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS favicons (
+                host TEXT PRIMARY KEY,
+                url TEXT,
+                fetched_at REAL
+            )
+        """)
+        # Check-Historie: Rohdaten + Rollups pro Minute/Stunde/Tag
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS checks (
+                url TEXT NOT NULL,
+                ts INTEGER NOT NULL,
+                ok INTEGER NOT NULL,
+                status_code INTEGER,
+                latency_ms REAL,
+                error TEXT
+            )
+        """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_checks_url_ts ON checks (url, ts)")
+        for name in ROLLUPS:
+            cursor.execute(f"""
+                CREATE TABLE IF NOT EXISTS rollup_{name} (
+                    url TEXT NOT NULL,
+                    bucket INTEGER NOT NULL,
+                    checks INTEGER NOT NULL,
+                    up INTEGER NOT NULL,
+                    latency_sum REAL NOT NULL,
+                    latency_count INTEGER NOT NULL,
+                    latency_max REAL NOT NULL,
+                    PRIMARY KEY (url, bucket)
+                ) WITHOUT ROWID
+            """)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS incidents (
+                id INTEGER PRIMARY KEY,
+                url TEXT NOT NULL,
+                started INTEGER NOT NULL,
+                ended INTEGER,
+                reason TEXT
+            )
+        """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_incidents_url_started ON incidents (url, started)")
+        # Letzter bekannter Zustand pro Website für den Warmstart
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS site_state (
+                url TEXT PRIMARY KEY,
+                status INTEGER,
+                up INTEGER NOT NULL DEFAULT 0,
+                down INTEGER NOT NULL DEFAULT 0,
+                latency TEXT,
+                updated_at REAL
+            )
+        """)
+        # Welche Server (Guilds) welche Website abonniert haben; geprüft wird jede URL nur einmal
+        migrate = cursor.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='subscriptions'").fetchone() is None
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS subscriptions (
+                guild_id INTEGER NOT NULL,
+                url TEXT NOT NULL,
+                PRIMARY KEY (guild_id, url)
+            )
+        """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_subscriptions_url ON subscriptions (url)")
+        # Status-Channel pro Server
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS guilds (
+                guild_id INTEGER PRIMARY KEY,
+                channel_id INTEGER
+            )
+        """)
+        if migrate:
+            # Bestehende Websites und der bisherige globale Status-Channel gehören zu Guild 0,
+            # bis der Bot den Server kennt (SubscriptionIndex.adopt)
+            cursor.execute("INSERT OR IGNORE INTO subscriptions (guild_id, url) SELECT 0, url FROM websites")
+            cursor.execute("""
+                INSERT OR IGNORE INTO guilds (guild_id, channel_id)
+                SELECT 0, CAST(value AS INTEGER) FROM settings WHERE key = 'channel_id' AND value != ''
+            """)
+        # Spalten für Intervall/Timeout pro Website nachrüsten (ältere Datenbanken)
+        columns = {row[1] for row in cursor.execute("PRAGMA table_info(websites)")}
+        if "check_interval" not in columns:
+            cursor.execute("ALTER TABLE websites ADD COLUMN check_interval INTEGER")
+        if "check_timeout" not in columns:
+            cursor.execute("ALTER TABLE websites ADD COLUMN check_timeout INTEGER")
+        if "tag" not in columns:
+            cursor.execute("ALTER TABLE websites ADD COLUMN tag TEXT")
+        if "probe" not in columns:
+            # JSON mit Probe-Einstellungen (siehe probes.ProbeConfig), NULL = einfacher GET
+            cursor.execute("ALTER TABLE websites ADD COLUMN probe TEXT")
+        self.conn.commit()
+
+    def set_log_channel_id(self, channel_id):
+        cursor = self.conn.cursor()
+        cursor.execute("REPLACE INTO settings (key, value) VALUES (?, ?)", ("log_channel_id", str(channel_id)))
+        self._commit()
+
+    def get_log_channel_id(self):
+        cursor = self.conn.cursor()
+        cursor.execute("SELECT value FROM settings WHERE key=?", ("log_channel_id",))
+        result = cursor.fetchone()
+        return int(result[0]) if result else None
+
+    def set_setting(self, key, value):
+        cursor = self.conn.cursor()
+        cursor.execute("REPLACE INTO settings (key, value) VALUES (?, ?)", (key, value))
+        self._commit()
+
+    def save_site(self, url, interval=None, timeout=None, tag=None):
+        cursor = self.conn.cursor()
+        cursor.execute(
+            "REPLACE INTO websites (url, status, last_checked, check_interval, check_timeout, tag) VALUES (?, ?, ?, ?, ?, ?)",
+            (url, 'unknown', '', interval, timeout, tag)
+        )
+        self._commit()
+
+    def save_sites(self, rows):
+        """Mehrere Websites in einer Transaktion speichern; rows: (url, interval, timeout, tag, probe)"""
+        with self._transaction():
+            cursor = self.conn.cursor()
+            cursor.executemany(
+                "REPLACE INTO websites (url, status, last_checked, check_interval, check_timeout, tag, probe) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(url, 'unknown', '', interval, timeout, tag, probe) for url, interval, timeout, tag, probe in rows]
+            )
+
+    def update_site(self, url, interval=None, timeout=None, tag=None):
+        """Konfiguration einer bestehenden Website ändern; None lässt den Wert unverändert"""
+        cursor = self.conn.cursor()
+        cursor.execute(
+            """
+            UPDATE websites SET check_interval = COALESCE(?, check_interval),
+                check_timeout = COALESCE(?, check_timeout), tag = COALESCE(?, tag)
+            WHERE url = ?
+            """,
+            (interval, timeout, tag, url)
+        )
+        self._commit()
+
+    def delete_site(self, url):
+        cursor = self.conn.cursor()
+        cursor.execute("DELETE FROM websites WHERE url=?", (url,))
+        cursor.execute("DELETE FROM site_state WHERE url=?", (url,))
+        self._commit()
+
+    def save_probe(self, url, probe):
+        cursor = self.conn.cursor()
+        cursor.execute("UPDATE websites SET probe=? WHERE url=?", (probe, url))
+        self._commit()
+
+    def load_site_states(self):
+        cursor = self.conn.cursor()
+        # Ein Query für Konfiguration und letzten Zustand aller Websites
+        cursor.execute("""
+            SELECT w.url, w.check_interval, w.check_timeout, w.tag, w.probe, s.status, s.up, s.down, s.latency
+            FROM websites w LEFT JOIN site_state s ON s.url = w.url
+        """)
+        # latency bleibt JSON-Text, LatencyStats.restore() dekodiert erst bei Bedarf
+        return cursor.fetchall()
+
+    def save_site_states(self, rows):
+        """rows: Liste aus (url, status, up, down, latency, updated_at)
+
+        latency ist ein dict (wird hier im Datenbank-Thread serialisiert) oder bereits JSON-Text.
+        """
+        with self._transaction():
+            cursor = self.conn.cursor()
+            cursor.executemany(
+                "REPLACE INTO site_state (url, status, up, down, latency, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (url, status, up, down, _encode_latency(latency), updated_at)
+                    for url, status, up, down, latency, updated_at in rows
+                ]
+            )
+
+    def load_subscriptions(self):
+        cursor = self.conn.cursor()
+        cursor.execute("SELECT guild_id, url FROM subscriptions ORDER BY rowid")
+        return cursor.fetchall()
+
+    def load_guild_channels(self):
+        cursor = self.conn.cursor()
+        cursor.execute("SELECT guild_id, channel_id FROM guilds WHERE channel_id IS NOT NULL")
+        return cursor.fetchall()
+
+    def subscribe(self, guild_id, urls):
+        with self._transaction():
+            cursor = self.conn.cursor()
+            cursor.executemany(
+                "INSERT OR IGNORE INTO subscriptions (guild_id, url) VALUES (?, ?)",
+                [(guild_id, url) for url in urls]
+            )
+
+    def unsubscribe(self, guild_id, url):
+        cursor = self.conn.cursor()
+        cursor.execute("DELETE FROM subscriptions WHERE guild_id=? AND url=?", (guild_id, url))
+        self._commit()
+
+    def set_guild_channel(self, guild_id, channel_id):
+        cursor = self.conn.cursor()
+        cursor.execute("REPLACE INTO guilds (guild_id, channel_id) VALUES (?, ?)", (guild_id, channel_id))
+        self._commit()
+
+    def delete_guild(self, guild_id):
+        with self._transaction():
+            cursor = self.conn.cursor()
+            cursor.execute("DELETE FROM subscriptions WHERE guild_id=?", (guild_id,))
+            cursor.execute("DELETE FROM guilds WHERE guild_id=?", (guild_id,))
+
+    def move_guild(self, old_id, new_id):
+        """Abos und Channel von old_id auf new_id übertragen (Channel nur, falls new_id keinen hat)"""
+        with self._transaction():
+            cursor = self.conn.cursor()
+            cursor.execute("UPDATE OR IGNORE subscriptions SET guild_id=? WHERE guild_id=?", (new_id, old_id))
+            cursor.execute("UPDATE OR IGNORE guilds SET guild_id=? WHERE guild_id=?", (new_id, old_id))
+            cursor.execute("DELETE FROM subscriptions WHERE guild_id=?", (old_id,))
+            cursor.execute("DELETE FROM guilds WHERE guild_id=?", (old_id,))
+
+    def save_favicon(self, host, url, fetched_at):
+        cursor = self.conn.cursor()
+        # url None = kein Favicon gefunden (negativer Cache-Eintrag)
+        cursor.execute("REPLACE INTO favicons (host, url, fetched_at) VALUES (?, ?, ?)", (host, url, fetched_at))
+        self._commit()
+
+    def load_favicons(self, limit):
+        cursor = self.conn.cursor()
+        # Die neuesten Einträge, älteste zuerst (LRU-Reihenfolge)
+        cursor.execute("""
+            SELECT host, url, fetched_at FROM (
+                SELECT host, url, fetched_at FROM favicons ORDER BY fetched_at DESC LIMIT ?
+            ) ORDER BY fetched_at ASC
+        """, (limit,))
+        return cursor.fetchall()
+
+    def write_history(self, checks, incident_events):
+        """Schreibt einen Stapel Check-Ergebnisse in einer Transaktion.
+
+        checks: Liste aus (url, ts, ok, status_code, latency_ms, error)
+        incident_events: Liste aus ("start", url, ts, reason) oder ("end", url, ts, None)
+        """
+        rollups = {name: {} for name in ROLLUPS}
+        latest = {}
+        for url, ts, ok, _, latency_ms, _ in checks:
+            for name, (size, _) in ROLLUPS.items():
+                key = (url, ts - ts % size)
+                entry = rollups[name].get(key)
+                if entry is None:
+                    entry = rollups[name][key] = [0, 0, 0.0, 0, 0.0]
+                entry[0] += 1
+                entry[1] += 1 if ok else 0
+                if latency_ms is not None:
+                    entry[2] += latency_ms
+                    entry[3] += 1
+                    entry[4] = max(entry[4], latency_ms)
+            if url not in latest or ts >= latest[url][1]:
+                latest[url] = ("online" if ok else "offline", ts)
+
+        with self._transaction():
+            cursor = self.conn.cursor()
+            cursor.executemany(
+                "INSERT INTO checks (url, ts, ok, status_code, latency_ms, error) VALUES (?, ?, ?, ?, ?, ?)",
+                checks
+            )
+            for name, entries in rollups.items():
+                cursor.executemany(f"""
+                    INSERT INTO rollup_{name} (url, bucket, checks, up, latency_sum, latency_count, latency_max)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT (url, bucket) DO UPDATE SET
+                        checks = checks + excluded.checks,
+                        up = up + excluded.up,
+                        latency_sum = latency_sum + excluded.latency_sum,
+                        latency_count = latency_count + excluded.latency_count,
+                        latency_max = MAX(latency_max, excluded.latency_max)
+                """, [(url, bucket, *entry) for (url, bucket), entry in entries.items()])
+            cursor.executemany(
+                "UPDATE websites SET status=?, last_checked=? WHERE url=?",
+                [
+                    (status, datetime.datetime.fromtimestamp(ts).strftime("%Y-%m-%d %H:%M:%S"), url)
+                    for url, (status, ts) in latest.items()
+                ]
+            )
+            for kind, url, ts, reason in incident_events:
+                if kind == "start":
+                    cursor.execute("INSERT INTO incidents (url, started, reason) VALUES (?, ?, ?)", (url, ts, reason))
+                else:
+                    cursor.execute(
+                        "UPDATE incidents SET ended=? WHERE url=? AND ended IS NULL",
+                        (ts, url)
+                    )
+
+    def prune_history(self, now):
+        with self._transaction():
+            cursor = self.conn.cursor()
+            cursor.execute("DELETE FROM checks WHERE ts < ?", (now - RAW_RETENTION,))
+            for name, (_, retention) in ROLLUPS.items():
+                cursor.execute(f"DELETE FROM rollup_{name} WHERE bucket < ?", (now - retention,))
+
+    def get_uptime(self, since, url=None, guild_id=None):
+        """Uptime seit `since` aus den Rollups: Liste aus (url, checks, up, avg_latency_ms, max_latency_ms)
+
+        guild_id beschränkt auf die Websites, die der Server abonniert hat.
+        """
+        # Kurze Zeiträume aus Minuten-, mittlere aus Stunden-, lange aus Tages-Rollups
+        age = time.time() - since
+        names = list(ROLLUPS)
+        name = "minute" if age <= UPTIME_MINUTE_RANGE else "hour" if age <= 2 * 86400 else "day"
+        # Nur Buckets, die ganz im Zeitraum liegen; den Rand davor füllt die nächstfeinere
+        # Auflösung, sodass höchstens deren Bucket-Größe (bzw. eine Minute) fehlt
+        start = -(-since // ROLLUPS[name][0]) * ROLLUPS[name][0]
+        parts = [f"SELECT * FROM rollup_{name} WHERE bucket >= ?"]
+        params = [start]
+        if name != names[0]:
+            finer = names[names.index(name) - 1]
+            size = ROLLUPS[finer][0]
+            parts.append(f"SELECT * FROM rollup_{finer} WHERE bucket >= ? AND bucket < ?")
+            params += [-(-since // size) * size, start]
+        query = f"""
+            SELECT url, SUM(checks), SUM(up),
+                   SUM(latency_sum) / NULLIF(SUM(latency_count), 0), MAX(latency_max)
+            FROM ({" UNION ALL ".join(parts)})
+            WHERE 1
+        """
+        if url is not None:
+            query += " AND url = ?"
+            params.append(url)
+        if guild_id is not None:
+            query += " AND url IN (SELECT url FROM subscriptions WHERE guild_id = ?)"
+            params.append(guild_id)
+        query += " GROUP BY url ORDER BY url"
+        cursor = self.conn.cursor()
+        cursor.execute(query, params)
+        return cursor.fetchall()
+
+    def get_incidents(self, since, url=None, limit=20, guild_id=None):
+        """Incidents seit `since`, neueste zuerst: Liste aus (url, started, ended, reason)"""
+        query = "SELECT url, started, ended, reason FROM incidents WHERE (ended IS NULL OR ended >= ?)"
+        params = [since]
+        if url is not None:
+            query += " AND url = ?"
+            params.append(url)
+        if guild_id is not None:
+            query += " AND url IN (SELECT url FROM subscriptions WHERE guild_id = ?)"
+            params.append(guild_id)
+        query += " ORDER BY started DESC LIMIT ?"
+        params.append(limit)
+        cursor = self.conn.cursor()
+        cursor.execute(query, params)
+        return cursor.fetchall()
+
+
+class AsyncDatabase:
+    """Async-Fassade für Database, damit SQLite nie den Event-Loop blockiert.
+
+    Ein eigener Thread besitzt die Verbindung und arbeitet eine Warteschlange ab;
+    alle Aufträge, die gerade anstehen, laufen in einer gemeinsamen Transaktion
+    mit einem Commit. Die Tabelle `settings` liegt zusätzlich im Speicher, die
+    get_*-Methoden dafür sind deshalb synchron und ohne I/O.
+    """
+
+    def __init__(self, db_path="data.db", batch_size=200):
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self._queue = queue.SimpleQueue()
+        self._settings = {}
+        # Kennzahlen des Writer-Threads (für /metrics)
+        self.transactions = 0
+        self.write_seconds = 0.0
+        self._thread = None
+        self._settings_loaded = None
+
+    def _start(self):
+        # Writer-Thread erst beim ersten Zugriff starten (nicht schon beim Import des Bots);
+        # die Settings sind der erste Auftrag, alle späteren laufen danach
+        self._thread = threading.Thread(target=self._worker, name="database-writer", daemon=True)
+        self._thread.start()
+        self._settings_loaded = self._submit("load_settings")
+        self._settings_loaded.add_done_callback(self._store_settings)
+
+    def _store_settings(self, future):
+        if future.exception() is None:
+            self._settings = future.result()
+
+    async def open(self):
+        """Datenbank öffnen und Settings laden"""
+        if self._thread is None:
+            self._start()
+        await asyncio.wrap_future(self._settings_loaded)
+
+    def _submit(self, name, *args):
+        if self._thread is None:
+            self._start()
+        future = concurrent.futures.Future()
+        self._queue.put((future, name, args))
+        return future
+
+    async def _call(self, name, *args):
+        return await asyncio.wrap_future(self._submit(name, *args))
+
+    def _worker(self):
+        try:
+            db = Database(self.db_path)
+        except Exception as e:
+            self._fail(e)
+            return
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            batch = [item]
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._queue.put(None)  # nach diesem Batch beenden
+                    break
+                batch.append(item)
+
+            results = []
+            start = time.perf_counter()
+            try:
+                with db.batch():
+                    for future, name, args in batch:
+                        if not future.set_running_or_notify_cancel():
+                            continue
+                        try:
+                            results.append((future, db.run_in_batch(getattr(db, name), *args), None))
+                        except Exception as e:
+                            results.append((future, None, e))
+            except Exception as e:
+                # Commit fehlgeschlagen -> alle Aufträge des Batches scheitern
+                results = [(future, None, e) for future, _, _ in batch if not future.cancelled()]
+            self.write_seconds += time.perf_counter() - start
+            self.transactions += 1
+
+            for future, result, error in results:
+                if error is not None:
+                    future.set_exception(error)
+                else:
+                    future.set_result(result)
+        db.conn.close()
+
+    def _fail(self, error):
+        # Datenbank ließ sich nicht öffnen: jeder Auftrag (auch spätere) scheitert mit
+        # diesem Fehler, statt ewig auf den Thread zu warten - bis close() None schickt
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            future = item[0]
+            if future.set_running_or_notify_cancel():
+                future.set_exception(error)
+
+    @property
+    def pending(self):
+        """Aufträge, die auf den Writer-Thread warten"""
+        return self._queue.qsize()
+
+    async def close(self):
+        if self._thread is None:
+            return
+        self._queue.put(None)
+        await asyncio.to_thread(self._thread.join)
+
+    # Settings (aus dem Speicher, geladen von open())
+
+    def get_log_channel_id(self):
+        value = self._settings.get("log_channel_id")
+        return int(value) if value else None
+
+    async def set_log_channel_id(self, channel_id):
+        await self._call("set_log_channel_id", channel_id)
+        self._settings["log_channel_id"] = str(channel_id)
+
+    def get_setting(self, key):
+        return self._settings.get(key)
+
+    async def set_setting(self, key, value):
+        await self._call("set_setting", key, value)
+        self._settings[key] = value
+
+    # Websites
+
+    async def save_site(self, url, interval=None, timeout=None, tag=None):
+        await self._call("save_site", url, interval, timeout, tag)
+
+    async def save_sites(self, rows):
+        await self._call("save_sites", rows)
+
+    async def update_site(self, url, interval=None, timeout=None, tag=None):
+        await self._call("update_site", url, interval, timeout, tag)
+
+    async def delete_site(self, url):
+        await self._call("delete_site", url)
+
+    async def save_probe(self, url, probe):
+        await self._call("save_probe", url, probe)
+
+    async def load_site_states(self):
+        return await self._call("load_site_states")
+
+    async def save_site_states(self, rows):
+        await self._call("save_site_states", rows)
+
+    # Abos und Status-Channel pro Server
+
+    async def load_subscriptions(self):
+        return await self._call("load_subscriptions")
+
+    async def load_guild_channels(self):
+        return await self._call("load_guild_channels")
+
+    async def subscribe(self, guild_id, urls):
+        await self._call("subscribe", guild_id, urls)
+
+    async def unsubscribe(self, guild_id, url):
+        await self._call("unsubscribe", guild_id, url)
+
+    async def set_guild_channel(self, guild_id, channel_id):
+        await self._call("set_guild_channel", guild_id, channel_id)
+
+    async def delete_guild(self, guild_id):
+        await self._call("delete_guild", guild_id)
+
+    async def move_guild(self, old_id, new_id):
+        await self._call("move_guild", old_id, new_id)
+
+    # Favicons
+
+    async def save_favicon(self, host, url, fetched_at):
+        await self._call("save_favicon", host, url, fetched_at)
+
+    async def load_favicons(self, limit):
+        return await self._call("load_favicons", limit)
+
+    # Check-Historie
+
+    async def write_history(self, checks, incident_events):
+        await self._call("write_history", checks, incident_events)
+
+    async def prune_history(self, now):
+        await self._call("prune_history", now)
+
+    async def get_uptime(self, since, url=None, guild_id=None):
+        return await self._call("get_uptime", since, url, guild_id)
+
+    async def get_incidents(self, since, url=None, limit=20, guild_id=None):
+        return await self._call("get_incidents", since, url, limit, guild_id)
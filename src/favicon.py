@@ -0,0 +1,109 @@
+import time
+import asyncio
+from collections import OrderedDict
+from urllib.parse import urlparse, urljoin
+
+import aiohttp
+
+# Standard Favicon-Locations
+FAVICON_PATHS = [
+    "/favicon.ico",
+    "/favicon.png",
+    "/apple-touch-icon.png"
+]
+
+
+def fallback_favicon_url(host):
+    # Fallback: Google Favicon Service
+    return f"https://www.google.com/s2/favicons?domain={host}&sz=32"
+
+
+async def resolve_favicon(session, url):
+    """Versucht die Favicon-URL einer Website zu finden (None wenn keine gefunden)"""
+    parsed = urlparse(url)
+    base_url = f"{parsed.scheme}://{parsed.netloc}"
+    for path in FAVICON_PATHS:
+        favicon_url = urljoin(base_url, path)
+        try:
+            async with session.head(favicon_url, timeout=aiohttp.ClientTimeout(total=5)) as resp:
+                if resp.status == 200:
+                    return favicon_url
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            continue
+    return None
+
+
+class FaviconCache:
+    """Favicon-URLs pro Host mit TTL, LRU-Begrenzung und Persistenz in SQLite.
+
+    lookup() antwortet sofort aus dem Cache (oder mit dem Google-Fallback) und
+    stößt fehlende oder abgelaufene Einträge nur im Hintergrund neu an, damit
+    Benachrichtigungen nie auf HEAD-Requests warten.
+    """
+
+    def __init__(self, db, http_client, max_entries=1024, ttl=7 * 86400, negative_ttl=3600):
+        self.db = db
+        self.http_client = http_client
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._entries = OrderedDict()  # host -> (favicon_url oder None, fetched_at)
+        self._refreshing = {}  # host -> Task
+
+    async def load(self):
+        for host, favicon_url, fetched_at in await self.db.load_favicons(self.max_entries):
+            self._entries[host] = (favicon_url, fetched_at)
+
+    def _is_fresh(self, entry):
+        favicon_url, fetched_at = entry
+        ttl = self.ttl if favicon_url else self.negative_ttl
+        return time.time() - fetched_at < ttl
+
+    def lookup(self, url, refresh=True):
+        """Favicon-URL aus dem Cache; refresh=False verhindert Requests (z.B. bei Downtime)"""
+        parsed = urlparse(url)
+        host = parsed.netloc
+        if not host or parsed.scheme not in ("http", "https"):
+            return None  # tcp:// und tls:// haben kein Favicon
+        entry = self._entries.get(host)
+        if entry is not None:
+            self._entries.move_to_end(host)
+        if refresh and (entry is None or not self._is_fresh(entry)):
+            self._schedule_refresh(host, url)
+        if entry is not None and entry[0]:
+            return entry[0]
+        return fallback_favicon_url(host)
+
+    def warm(self, url):
+        """Lädt das Favicon im Hintergrund vor, falls es fehlt oder abgelaufen ist"""
+        parsed = urlparse(url)
+        host = parsed.netloc
+        if parsed.scheme not in ("http", "https"):
+            return
+        entry = self._entries.get(host)
+        if host and (entry is None or not self._is_fresh(entry)):
+            self._schedule_refresh(host, url)
+
+    def _schedule_refresh(self, host, url):
+        if host in self._refreshing:
+            return
+        task = asyncio.get_running_loop().create_task(self._refresh(host, url))
+        self._refreshing[host] = task
+        task.add_done_callback(lambda _: self._refreshing.pop(host, None))
+
+    async def _refresh(self, host, url):
+        favicon_url = await resolve_favicon(self.http_client.session, url)
+        fetched_at = time.time()
+        self._store(host, favicon_url, fetched_at)
+        try:
+            await self.db.save_favicon(host, favicon_url, fetched_at)
+        except Exception:
+            pass  # Cache im Speicher bleibt gültig
+
+    def _store(self, host, favicon_url, fetched_at):
+        self._entries[host] = (favicon_url, fetched_at)
+        self._entries.move_to_end(host)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
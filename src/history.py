@@ -0,0 +1,85 @@
+import time
+import asyncio
+from logger import write_log
+
+
+class CheckHistory:
+    """Sammelt Check-Ergebnisse im Speicher und schreibt sie gebündelt in die Datenbank.
+
+    Statt eines Commits pro Check wird alle `flush_interval` Sekunden ein Stapel
+    in einer einzigen Transaktion geschrieben (Rohdaten, Rollups, Website-Status
+    und Incidents). Alte Daten werden stündlich entsprechend der Aufbewahrung
+    pro Auflösung entfernt.
+    """
+
+    def __init__(self, db, flush_interval=5.0, prune_interval=3600):
+        self.db = db
+        self.flush_interval = flush_interval
+        self.prune_interval = prune_interval
+        self._checks = []
+        self._incidents = []
+        self._task = None
+        self._last_prune = 0.0
+
+    def record(self, result):
+        latency_ms = result.response_time * 1000 if result.response_time is not None else None
+        self._checks.append((
+            result.url,
+            int(result.checked_at),
+            1 if result.ok else 0,
+            result.status,
+            latency_ms,
+            result.error,
+        ))
+
+    def incident_started(self, url, timestamp, reason):
+        self._incidents.append(("start", url, int(timestamp), reason))
+
+    def incident_ended(self, url, timestamp):
+        self._incidents.append(("end", url, int(timestamp), None))
+
+    @property
+    def pending(self):
+        return len(self._checks) + len(self._incidents)
+
+    async def flush(self):
+        if not self._checks and not self._incidents:
+            return 0
+        checks, self._checks = self._checks, []
+        incidents, self._incidents = self._incidents, []
+        try:
+            await self.db.write_history(checks, incidents)
+        except Exception:
+            # Stapel zurücklegen (vor die inzwischen neu gesammelten), nächster Flush versucht es erneut
+            self._checks[:0] = checks
+            self._incidents[:0] = incidents
+            raise
+        return len(checks)
+
+    async def prune(self):
+        await self.db.prune_history(int(time.time()))
+        self._last_prune = time.monotonic()
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+                if time.monotonic() - self._last_prune >= self.prune_interval:
+                    await self.prune()
+            except Exception as e:
+                write_log(f"Fehler beim Schreiben der Check-Historie: {e}", level="error")
@@ -0,0 +1,36 @@
+import aiohttp
+
+from tracing import create_trace_config
+
+
+class HttpClient:
+    """Langlebige aiohttp-Session, die von Checks, Favicon-Suche und /ping geteilt wird.
+
+    Keep-Alive-Verbindungen, TLS-Sessions und DNS-Ergebnisse bleiben so zwischen
+    den Checks erhalten. Die Session wird beim ersten Zugriff erstellt und beim
+    Herunterfahren des Bots über close() geschlossen. Über die TraceConfig
+    werden bei Checks und /ping die Phasen jedes Requests gemessen.
+    """
+
+    def __init__(self, limit=100, limit_per_host=10, dns_ttl=300):
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.dns_ttl = dns_ttl
+        self._session = None
+
+    @property
+    def session(self):
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                ttl_dns_cache=self.dns_ttl,
+                use_dns_cache=True,
+            )
+            self._session = aiohttp.ClientSession(connector=connector, trace_configs=[create_trace_config()])
+        return self._session
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
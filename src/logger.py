@@ -1,61 +1,259 @@
-import os
-import datetime
-import discord
-
-LOG_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "Logs")
-LOG_FILE = os.path.join(LOG_DIR, "Bot.log")
-
-
-def write_log(message: str, *, bot: discord.Client = None, db=None, max_age_days: int = 7):
-    """Write a timestamped log line to Logs/Bot.log, prune entries older than max_age_days.
-
-    Parameters:
-    - message: the message to log
-    - bot: optional discord.Client to allow sending log messages to a configured log channel
-    - db: optional Database instance with get_log_channel_id()
-    - max_age_days: retention in days
-    """
-    timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    log_line = f"[{timestamp}] {message}\n"
-
-    os.makedirs(LOG_DIR, exist_ok=True)
-
-    # read existing lines and keep recent ones
-    try:
-        if os.path.exists(LOG_FILE):
-            with open(LOG_FILE, "r", encoding="utf-8") as f:
-                lines = f.readlines()
-            new_lines = []
-            cutoff = datetime.datetime.now() - datetime.timedelta(days=max_age_days)
-            for line in lines:
-                if line.startswith("["):
-                    try:
-                        date_str = line.split("]")[0][1:]
-                        log_time = datetime.datetime.strptime(date_str, "%Y-%m-%d %H:%M:%S")
-                        if log_time >= cutoff:
-                            new_lines.append(line)
-                    except Exception:
-                        new_lines.append(line)
-                else:
-                    new_lines.append(line)
-        else:
-            new_lines = []
-    except Exception:
-        new_lines = []
-
-    new_lines.append(log_line)
-    with open(LOG_FILE, "w", encoding="utf-8") as f:
-        f.writelines(new_lines)
-
-    # optionally send to discord channel if db and bot provided
-    if db is not None and bot is not None:
-        try:
-            log_channel_id = db.get_log_channel_id()
-            if log_channel_id:
-                channel = bot.get_channel(log_channel_id)
-                if channel:
-                    # fire-and-forget
-                    import asyncio
-                    asyncio.create_task(channel.send(embed=discord.Embed(title="Bot Log", description=message, color=discord.Color.dark_grey())))
-        except Exception:
-            pass
+import os
+import asyncio
+import atexit
+import datetime
+import queue
+import logging
+import logging.handlers
+import discord
+
+LOG_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "Logs")
+LOG_FILE = os.path.join(LOG_DIR, "Bot.log")
+LOG_RETENTION_DAYS = 7
+
+EMBED_DESCRIPTION_LIMIT = 4096
+
+_logger = None
+_listener = None
+_log_queue = None
+_shipper = None
+_index = None
+
+
+def _setup_log():
+    """Create the file logger: writes go through a queue to a background thread.
+
+    Bot.log is rotated at midnight into Bot.log.YYYY-MM-DD, only the last
+    LOG_RETENTION_DAYS rotated files are kept.
+    """
+    global _logger, _listener, _log_queue
+    os.makedirs(LOG_DIR, exist_ok=True)
+
+    file_handler = logging.handlers.TimedRotatingFileHandler(
+        LOG_FILE, when="midnight", backupCount=LOG_RETENTION_DAYS, encoding="utf-8"
+    )
+    file_handler.setFormatter(logging.Formatter("[%(asctime)s] %(message)s", "%Y-%m-%d %H:%M:%S"))
+
+    _log_queue = queue.SimpleQueue()
+    _listener = logging.handlers.QueueListener(_log_queue, *_handlers(file_handler))
+    _listener.start()
+
+    _logger = logging.getLogger("sitesentinel")
+    _logger.handlers.clear()
+    _logger.addHandler(logging.handlers.QueueHandler(_log_queue))
+    _logger.setLevel(logging.INFO)
+    _logger.propagate = False
+
+
+def _handlers(file_handler):
+    if _index is None:
+        return (file_handler,)
+    from logsearch import LogIndexHandler
+
+    return (file_handler, LogIndexHandler(_index))
+
+
+def enable_log_index(path=None):
+    """Also write every log record into a searchable SQLite index (see logsearch.LogIndex).
+
+    Can be called before or after the first write_log(); returns the index.
+    """
+    global _index, _listener
+    from logsearch import LogIndex
+
+    if _index is not None:
+        return _index
+    _index = LogIndex(path or os.path.join(LOG_DIR, "Bot.index.db"), retention=LOG_RETENTION_DAYS * 86400)
+    if _listener is not None:
+        # Restart the writer thread with the index handler; queued records are kept
+        file_handler = _listener.handlers[0]
+        _listener.stop()
+        _listener = logging.handlers.QueueListener(_log_queue, *_handlers(file_handler))
+        _listener.start()
+    return _index
+
+
+def get_log_index():
+    """The LogIndex if enable_log_index() was called, otherwise None."""
+    return _index
+
+
+def shutdown_log():
+    """Flush pending log lines and stop the background writer."""
+    global _logger, _listener
+    if _index is not None:
+        _index.close()  # read connection used by /logs
+    if _listener is None:
+        return
+    _listener.stop()  # processes all pending records first
+    for handler in _listener.handlers:
+        handler.close()
+    _logger.handlers.clear()
+    _listener = None
+    _logger = None
+
+
+atexit.register(shutdown_log)
+
+
+class LogShipper:
+    """Forward log lines to the Discord log channel, batched into multi-line embeds.
+
+    Lines are collected for up to `window` seconds or until the embed description
+    limit is reached and then sent as one embed. If the queue is full, new lines
+    are dropped and counted instead of blocking the caller. The log channel id is
+    cached and only re-read from the database after invalidate_channel().
+    """
+
+    def __init__(self, bot, db, window=2.0, max_queue=1000):
+        self.bot = bot
+        self.db = db
+        self.window = window
+        self.queue = asyncio.Queue(maxsize=max_queue)
+        self.dropped = 0
+        self.sent = 0
+        self._reported_dropped = 0
+        self._channel_id = None
+        self._channel_loaded = False
+        self._task = None
+
+    def invalidate_channel(self):
+        self._channel_loaded = False
+
+    def _get_channel_id(self):
+        if not self._channel_loaded:
+            self._channel_id = self.db.get_log_channel_id()
+            self._channel_loaded = True
+        return self._channel_id
+
+    def push(self, message):
+        try:
+            if not self._get_channel_id():
+                return  # no log channel configured
+        except Exception:
+            return
+        timestamp = datetime.datetime.now().strftime("%H:%M:%S")
+        line = f"`{timestamp}` {message}"
+        if len(line) > EMBED_DESCRIPTION_LIMIT:
+            line = line[:EMBED_DESCRIPTION_LIMIT - 1] + "…"
+        try:
+            self.queue.put_nowait(line)
+        except asyncio.QueueFull:
+            self.dropped += 1
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _collect(self, first):
+        """Collect lines until the window closes or the embed would be too long"""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.window
+        batch = [first]
+        size = len(first)
+        carry = None
+        while True:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                line = await asyncio.wait_for(self.queue.get(), timeout=remaining)
+            except asyncio.TimeoutError:
+                break
+            if size + 1 + len(line) > EMBED_DESCRIPTION_LIMIT:
+                carry = line  # starts the next embed
+                break
+            batch.append(line)
+            size += 1 + len(line)
+        return batch, carry
+
+    async def _run(self):
+        carry = None
+        while True:
+            first = carry if carry is not None else await self.queue.get()
+            batch, carry = await self._collect(first)
+            await self._send(batch)
+
+    async def _send(self, batch):
+        channel_id = self._get_channel_id()
+        channel = self.bot.get_channel(channel_id) if channel_id else None
+        if channel is None:
+            return
+        embed = discord.Embed(title="Bot Log", description="\n".join(batch), color=discord.Color.dark_grey())
+        newly_dropped = self.dropped - self._reported_dropped
+        if newly_dropped:
+            embed.set_footer(text=f"{newly_dropped} Log-Meldungen verworfen (Warteschlange voll)")
+            self._reported_dropped = self.dropped
+        try:
+            await channel.send(embed=embed)
+            self.sent += 1
+        except Exception as e:
+            write_log(f"Fehler beim Senden an den Log-Channel: {e}", level="error")
+
+
+def _get_shipper(bot, db):
+    global _shipper
+    if _shipper is None:
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return None  # no event loop yet (e.g. during startup)
+        _shipper = LogShipper(bot, db)
+    _shipper.start()
+    return _shipper
+
+
+def invalidate_log_channel():
+    """Re-read the log channel id before the next forwarded line."""
+    if _shipper is not None:
+        _shipper.invalidate_channel()
+
+
+async def stop_log_shipper():
+    global _shipper
+    if _shipper is not None:
+        await _shipper.stop()
+        _shipper = None
+
+
+def log_stats():
+    """Queue sizes for the metrics endpoint: file writer, Discord log channel, dropped lines."""
+    return {
+        "file_queue": _log_queue.qsize() if _log_queue is not None else 0,
+        "channel_queue": _shipper.queue.qsize() if _shipper is not None else 0,
+        "channel_dropped": _shipper.dropped if _shipper is not None else 0,
+    }
+
+
+def write_log(message: str, *, bot: discord.Client = None, db=None, level: str = "info"):
+    """Append a timestamped log line to Logs/Bot.log.
+
+    The line is only queued here; a background thread appends it to the file,
+    so the cost per call does not depend on the size of the log. If bot and db
+    are given, the line is also queued for the batched Discord log channel.
+
+    Parameters:
+    - message: the message to log
+    - bot: optional discord.Client to allow sending log messages to a configured log channel
+    - db: optional Database instance with get_log_channel_id()
+    - level: "info", "warning" or "error" (stored in the log index)
+    """
+    if _logger is None:
+        _setup_log()
+    _logger.log(logging.getLevelName(level.upper()), message)
+
+    # optionally send to discord channel if db and bot provided
+    if db is not None and bot is not None:
+        shipper = _get_shipper(bot, db)
+        if shipper is not None:
+            shipper.push(message)
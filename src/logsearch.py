@@ -0,0 +1,311 @@
+import os
+import re
+import glob
+import time
+import sqlite3
+import logging
+import datetime
+import threading
+
+from urls import NETWORK_SCHEMES
+
+URL_PATTERN = re.compile(rf"(?:https?|{'|'.join(NETWORK_SCHEMES)})://[^\s,;)\]]+")
+LINE_PATTERN = re.compile(r"^\[(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})\] (.*)$")
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def find_site(message):
+    """Erste URL in einer Log-Meldung (ohne angehängte Satzzeichen)"""
+    match = URL_PATTERN.search(message)
+    return match.group(0).rstrip(".:") if match else None
+
+
+class LogRecord:
+    """Ein Log-Eintrag aus Index oder Datei"""
+
+    __slots__ = ("time", "site", "level", "message")
+
+    def __init__(self, time, site, level, message):
+        self.time = time  # Unix-Zeit in Sekunden
+        self.site = site  # erste URL in der Meldung (oder None)
+        self.level = level
+        self.message = message
+
+
+def tail_lines(path, count, block_size=8192):
+    """Letzte `count` Zeilen einer Datei; liest rückwärts vom Ende, nicht die ganze Datei"""
+    if count <= 0:
+        return []
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        position = f.tell()
+        data = b""
+        # Eine Zeile mehr suchen, weil der erste Block mitten in einer Zeile beginnen kann
+        while position > 0 and data.count(b"\n") <= count:
+            step = min(block_size, position)
+            position -= step
+            f.seek(position)
+            data = f.read(step) + data
+    lines = data.decode("utf-8", errors="replace").splitlines()
+    return lines[-count:]
+
+
+def _reverse_lines(path, block_size=65536):
+    """Zeilen einer Datei vom Ende zum Anfang"""
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        position = f.tell()
+        rest = b""
+        while position > 0:
+            step = min(block_size, position)
+            position -= step
+            f.seek(position)
+            lines = (f.read(step) + rest).split(b"\n")
+            rest = lines.pop(0)  # evtl. unvollständig, kommt mit dem nächsten Block
+            for line in reversed(lines):
+                if line:
+                    yield line.decode("utf-8", errors="replace")
+        if rest:
+            yield rest.decode("utf-8", errors="replace")
+
+
+def _parse_match(match):
+    try:
+        timestamp = time.mktime(time.strptime(match.group(1), TIME_FORMAT))
+    except ValueError:
+        return None
+    message = match.group(2)
+    return LogRecord(int(timestamp), find_site(message), None, message)
+
+
+def log_files(log_file):
+    """Aktuelle Log-Datei und rotierte Dateien, neueste zuerst"""
+    rotated = sorted(glob.glob(f"{glob.escape(log_file)}.????-??-??"), reverse=True)
+    return ([log_file] if os.path.exists(log_file) else []) + rotated
+
+
+def scan_log(log_file, url=None, text=None, since=None, until=None, limit=20, offset=0, max_lines=500000):
+    """Log-Dateien rückwärts durchsuchen (ohne Index); liefert (Einträge, weitere vorhanden).
+
+    Das Lesen endet, sobald genug Treffer gefunden, `since` unterschritten oder
+    max_lines Zeilen gelesen sind. Zeitstempel werden als Text verglichen und
+    nur Treffer vollständig geparst. Folgezeilen ohne Zeitstempel (z.B.
+    Tracebacks) werden übersprungen.
+    """
+    wanted = offset + limit + 1
+    needle = text.lower() if text else None
+    since_text = format_time(since) if since is not None else None
+    until_text = format_time(until) if until is not None else None
+    found = []
+    scanned = 0
+    for path in log_files(log_file):
+        for line in _reverse_lines(path):
+            scanned += 1
+            if scanned > max_lines:
+                break
+            match = LINE_PATTERN.match(line)
+            if match is None:
+                continue
+            stamp = match.group(1)
+            if since_text is not None and stamp < since_text:
+                break
+            if until_text is not None and stamp > until_text:
+                continue
+            if url is not None and url not in line:
+                continue
+            if needle is not None and needle not in line.lower():
+                continue
+            record = _parse_match(match)
+            if record is None:
+                continue
+            found.append(record)
+            if len(found) >= wanted:
+                break
+        else:
+            continue
+        break
+    return found[offset:offset + limit], len(found) > offset + limit
+
+
+class LogIndex:
+    """SQLite-Index der letzten Log-Einträge (Zeit, Website, Level, Meldung).
+
+    Die Meldungen liegen zusätzlich in einer FTS5-Tabelle, falls SQLite sie
+    unterstützt; sonst wird mit LIKE gesucht. Geschrieben wird nur aus dem
+    Log-Thread (LogIndexHandler), gelesen über eine eigene Verbindung, die
+    offen bleibt.
+    """
+
+    def __init__(self, path, retention=7 * 86400):
+        self.path = path
+        self.retention = retention
+        self.fts = None  # wird beim ersten Öffnen ermittelt
+        self._reader = None
+        self._read_lock = threading.Lock()  # search() läuft in wechselnden Threads (asyncio.to_thread)
+
+    def connect(self):
+        # Der Handler schreibt im Log-Thread, geschlossen wird beim Herunterfahren
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS logs (
+                id INTEGER PRIMARY KEY,
+                time INTEGER NOT NULL,
+                site TEXT,
+                level TEXT,
+                message TEXT
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_logs_time ON logs (time)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_logs_site_time ON logs (site, time)")
+        if self.fts is None:
+            try:
+                conn.execute("CREATE VIRTUAL TABLE IF NOT EXISTS logs_fts USING fts5(message, content='logs', content_rowid='id')")
+                self.fts = True
+            except sqlite3.OperationalError:
+                self.fts = False  # SQLite ohne FTS5
+        conn.commit()
+        return conn
+
+    def _connect_reader(self):
+        # Schema und PRAGMAs nur beim ersten Lesen, danach bleibt die Verbindung offen
+        if self._reader is None:
+            self._reader = self.connect()
+        return self._reader
+
+    def close(self):
+        with self._read_lock:
+            if self._reader is not None:
+                self._reader.close()
+                self._reader = None
+
+    def insert(self, conn, records):
+        """records: Liste aus (time, site, level, message)"""
+        with conn:
+            last = conn.execute("SELECT COALESCE(MAX(id), 0) FROM logs").fetchone()[0]
+            conn.executemany("INSERT INTO logs (time, site, level, message) VALUES (?, ?, ?, ?)", records)
+            if self.fts:
+                conn.execute("INSERT INTO logs_fts (rowid, message) SELECT id, message FROM logs WHERE id > ?", (last,))
+
+    def prune(self, conn, now=None):
+        cutoff = int((now or time.time()) - self.retention)
+        with conn:
+            if self.fts:
+                conn.execute("""
+                    INSERT INTO logs_fts (logs_fts, rowid, message)
+                    SELECT 'delete', id, message FROM logs WHERE time < ?
+                """, (cutoff,))
+            conn.execute("DELETE FROM logs WHERE time < ?", (cutoff,))
+
+    def search(self, url=None, text=None, since=None, until=None, limit=20, offset=0):
+        """Neueste Treffer zuerst; liefert (Einträge, weitere vorhanden)"""
+        clauses = []
+        args = []
+        if url is not None:
+            clauses.append("l.site = ?")
+            args.append(url)
+        if since is not None:
+            clauses.append("l.time >= ?")
+            args.append(int(since))
+        if until is not None:
+            clauses.append("l.time <= ?")
+            args.append(int(until))
+        source = "logs l"
+        with self._read_lock:
+            conn = self._connect_reader()  # ermittelt beim ersten Mal auch self.fts
+            if text:
+                if self.fts:
+                    # Jedes Wort als Phrase, damit Sonderzeichen keine FTS-Syntax sind
+                    query = " ".join('"' + word.replace('"', '""') + '"' for word in text.split())
+                    source = "logs_fts f JOIN logs l ON l.id = f.rowid"
+                    clauses.append("logs_fts MATCH ?")
+                    args.append(query)
+                else:
+                    clauses.append("l.message LIKE ?")
+                    args.append(f"%{text}%")
+            where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+            rows = conn.execute(
+                f"SELECT l.time, l.site, l.level, l.message FROM {source} {where} ORDER BY l.id DESC LIMIT ? OFFSET ?",
+                args + [limit + 1, offset],
+            ).fetchall()
+        return [LogRecord(*row) for row in rows[:limit]], len(rows) > limit
+
+
+class LogIndexHandler(logging.Handler):
+    """Logging-Handler, der die Einträge gebündelt in den LogIndex schreibt.
+
+    Geschrieben wird, sobald batch_size Einträge anstehen oder spätestens
+    `delay` Sekunden nach dem ersten wartenden Eintrag.
+    """
+
+    def __init__(self, index, batch_size=200, delay=1.0, prune_interval=3600):
+        super().__init__()
+        self.index = index
+        self.batch_size = batch_size
+        self.delay = delay
+        self.prune_interval = prune_interval
+        self._conn = None
+        self._buffer = []
+        self._timer = None
+        self._pruned = 0.0
+
+    def emit(self, record):
+        try:
+            message = record.getMessage()
+            self._buffer.append((int(record.created), find_site(message), record.levelname.lower(), message))
+            if len(self._buffer) >= self.batch_size:
+                self._write()
+            elif self._timer is None:
+                self._timer = threading.Timer(self.delay, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+        except Exception:
+            self.handleError(record)
+
+    def flush(self):
+        self.acquire()
+        try:
+            if self._buffer:
+                self._write()
+        finally:
+            self.release()
+
+    def _write(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._conn is None:
+            self._conn = self.index.connect()
+        records, self._buffer = self._buffer, []
+        self.index.insert(self._conn, records)
+        now = time.time()
+        if now - self._pruned > self.prune_interval:
+            self._pruned = now
+            self.index.prune(self._conn, now)
+
+    def close(self):
+        self.flush()
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+        super().close()
+
+
+def format_time(timestamp):
+    return datetime.datetime.fromtimestamp(timestamp).strftime(TIME_FORMAT)
+
+
+def parse_time(value, now=None):
+    """Zeitangabe für /logs: relativ ("30m", "6h", "2d") oder "YYYY-MM-DD[ HH:MM]"; wirft ValueError"""
+    value = value.strip()
+    match = re.fullmatch(r"(\d+)\s*([mhd])", value.lower())
+    if match:
+        seconds = int(match.group(1)) * {"m": 60, "h": 3600, "d": 86400}[match.group(2)]
+        return int((now or time.time()) - seconds)
+    for fmt in ("%Y-%m-%d %H:%M", "%Y-%m-%d"):
+        try:
+            return int(time.mktime(time.strptime(value, fmt)))
+        except ValueError:
+            pass
+    raise ValueError(f"Unbekannte Zeitangabe: {value!r} (z.B. 6h, 2d oder 2024-05-01 12:00)")
@@ -0,0 +1,208 @@
+import time
+import asyncio
+import bisect
+
+from aiohttp import web
+
+from logger import write_log, log_stats
+from workers import WorkerHub
+
+# Grenzen der Histogramme in Sekunden
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+LAG_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0)
+
+OUTCOMES = ("ok", "http_error", "error")
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class _Histogram:
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self, size):
+        self.counts = [0] * size  # nicht kumulativ, letzter Eintrag = +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, bounds, value):
+        self.counts[bisect.bisect_left(bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def lines(self, name, bounds, labels=""):
+        prefix = f"{labels}," if labels else ""
+        cumulative = 0
+        out = []
+        for bound, n in zip(bounds, self.counts):
+            cumulative += n
+            out.append(f'{name}_bucket{{{prefix}le="{bound}"}} {cumulative}')
+        out.append(f'{name}_bucket{{{prefix}le="+Inf"}} {self.count}')
+        suffix = f"{{{labels}}}" if labels else ""
+        out.append(f"{name}_sum{suffix} {self.sum:.6f}")
+        out.append(f"{name}_count{suffix} {self.count}")
+        return out
+
+
+class _SiteMetrics:
+    __slots__ = ("latency", "outcomes", "last_check")
+
+    def __init__(self):
+        self.latency = _Histogram(len(LATENCY_BUCKETS) + 1)
+        self.outcomes = [0, 0, 0]  # Reihenfolge wie OUTCOMES
+        self.last_check = None
+
+
+class Metrics:
+    """Optionaler /metrics-Endpunkt im Prometheus-Textformat.
+
+    Pro Website: Status, Histogramm der Antwortzeiten und Checks nach
+    Ergebnis. Dazu interne Kennzahlen des Bots (Alter des ältesten Checks,
+    Scheduler, Benachrichtigungen, Lag der Event-Loop, Datenbank, Log-Queues),
+    damit sich auch eine Verlangsamung des Monitors selbst alarmieren lässt.
+    Der Server lauscht standardmäßig nur auf 127.0.0.1.
+    """
+
+    def __init__(self, monitor, scheduler, notifier, history, db, host="127.0.0.1", port=9105, lag_interval=0.5, checker=None):
+        self.monitor = monitor
+        self.scheduler = scheduler
+        self.checker = checker  # ConcurrentChecker im Bot-Prozess (ohne Worker)
+        self.notifier = notifier
+        self.history = history
+        self.db = db
+        self.host = host
+        self.port = port
+        self.lag_interval = lag_interval
+        self.loop_lag = _Histogram(len(LAG_BUCKETS) + 1)
+        self._sites = {}
+        self._runner = None
+        self._lag_task = None
+
+    def observe(self, result):
+        site = self._sites.get(result.url)
+        if site is None:
+            site = self._sites[result.url] = _SiteMetrics()
+        if result.ok:
+            site.outcomes[0] += 1
+        elif result.error is None:
+            site.outcomes[1] += 1
+        else:
+            site.outcomes[2] += 1
+        if result.response_time is not None:
+            site.latency.observe(LATENCY_BUCKETS, result.response_time)
+        site.last_check = result.checked_at
+
+    async def start(self):
+        if self._runner is not None:
+            return
+        app = web.Application()
+        app.router.add_get("/metrics", self._handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        self._lag_task = asyncio.get_running_loop().create_task(self._sample_lag())
+        write_log(f"Metriken unter http://{self.host}:{self.port}/metrics", db=self.db)
+
+    async def stop(self):
+        if self._lag_task is not None:
+            self._lag_task.cancel()
+            try:
+                await self._lag_task
+            except asyncio.CancelledError:
+                pass
+            self._lag_task = None
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def _sample_lag(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.lag_interval)
+            self.loop_lag.observe(LAG_BUCKETS, max(0.0, loop.time() - start - self.lag_interval))
+
+    async def _handle(self, request):
+        body = await self.render()
+        return web.Response(body=body.encode("utf-8"), headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"})
+
+    async def render(self, chunk_size=1000):
+        out = []
+        self._render_internal(out)
+
+        sites = self.monitor.sites
+        # Websites, die nicht mehr überwacht werden, verwerfen
+        for url in [url for url in self._sites if url not in sites]:
+            del self._sites[url]
+
+        out.append("# HELP sitesentinel_site_up Bestätigter Status der Website (1 = online, 0 = offline)")
+        out.append("# TYPE sitesentinel_site_up gauge")
+        urls = list(sites)
+        for start in range(0, len(urls), chunk_size):
+            for url in urls[start:start + chunk_size]:
+                status = sites.get(url)
+                if status is not None:
+                    out.append(f'sitesentinel_site_up{{url="{_escape(url)}"}} {int(status)}')
+            await asyncio.sleep(0)  # bei vielen Websites die Event-Loop nicht blockieren
+
+        out.append("# HELP sitesentinel_checks_total Checks pro Website nach Ergebnis")
+        out.append("# TYPE sitesentinel_checks_total counter")
+        for url, site in self._sites.items():
+            label = _escape(url)
+            for outcome, n in zip(OUTCOMES, site.outcomes):
+                out.append(f'sitesentinel_checks_total{{url="{label}",outcome="{outcome}"}} {n}')
+        await asyncio.sleep(0)
+
+        out.append("# HELP sitesentinel_response_seconds Antwortzeit bis zu den Headern")
+        out.append("# TYPE sitesentinel_response_seconds histogram")
+        for i, (url, site) in enumerate(self._sites.items()):
+            if site.latency.count:
+                out.extend(site.latency.lines("sitesentinel_response_seconds", LATENCY_BUCKETS, f'url="{_escape(url)}"'))
+            if i % chunk_size == chunk_size - 1:
+                await asyncio.sleep(0)
+
+        return "\n".join(out) + "\n"
+
+    def _render_internal(self, out):
+        def metric(name, kind, help_text, value, labels=""):
+            out.append(f"# HELP {name} {help_text}")
+            out.append(f"# TYPE {name} {kind}")
+            out.append(f"{name}{{{labels}}} {value}" if labels else f"{name} {value}")
+
+        counts = self.monitor.counts
+        out.append("# HELP sitesentinel_sites Überwachte Websites nach Status")
+        out.append("# TYPE sitesentinel_sites gauge")
+        for status, label in ((True, "up"), (False, "down"), (None, "unknown")):
+            out.append(f'sitesentinel_sites{{status="{label}"}} {counts[status]}')
+
+        # Im rollierenden Scheduler entspricht das der Dauer eines Durchlaufs
+        now = time.time()
+        checked = [site.last_check for url, site in self._sites.items() if site.last_check is not None and url in self.monitor.sites]
+        oldest = now - min(checked) if checked else 0.0
+        metric("sitesentinel_check_age_max_seconds", "gauge", "Zeit seit dem ältesten letzten Check einer Website", f"{oldest:.3f}")
+
+        metric("sitesentinel_scheduler_backlog", "gauge", "Laufende Checks", self.scheduler.backlog)
+        metric("sitesentinel_scheduler_overruns_total", "counter", "Übersprungene Checks, weil der vorige noch lief", self.scheduler.overruns)
+        if isinstance(self.scheduler, WorkerHub):
+            metric("sitesentinel_workers", "gauge", "Verbundene Worker-Prozesse", len(self.scheduler.workers))
+        elif self.checker is not None:
+            metric("sitesentinel_checks_joined_total", "counter", "Checks, die einen laufenden Check derselben URL mitbenutzt haben", self.checker.joined)
+
+        if self.notifier is not None:
+            metric("sitesentinel_notifications_pending", "gauge", "Gesammelte, noch nicht gesendete Statuswechsel", self.notifier.pending)
+            metric("sitesentinel_notification_messages_total", "counter", "Gesendete Benachrichtigungs-Nachrichten", self.notifier.sent)
+
+        out.append("# HELP sitesentinel_event_loop_lag_seconds Verzögerung der Event-Loop")
+        out.append("# TYPE sitesentinel_event_loop_lag_seconds histogram")
+        out.extend(self.loop_lag.lines("sitesentinel_event_loop_lag_seconds", LAG_BUCKETS))
+
+        metric("sitesentinel_db_queue", "gauge", "Datenbank-Aufträge in der Warteschlange", self.db.pending)
+        metric("sitesentinel_db_transactions_total", "counter", "Transaktionen des Datenbank-Threads", self.db.transactions)
+        metric("sitesentinel_db_write_seconds_total", "counter", "Zeit in Datenbank-Transaktionen", f"{self.db.write_seconds:.6f}")
+        metric("sitesentinel_history_pending", "gauge", "Checks, die noch in die Historie geschrieben werden", self.history.pending)
+
+        logs = log_stats()
+        metric("sitesentinel_log_queue", "gauge", "Log-Zeilen, die noch in die Datei geschrieben werden", logs["file_queue"])
+        metric("sitesentinel_log_channel_queue", "gauge", "Log-Zeilen für den Discord-Log-Channel", logs["channel_queue"])
+        metric("sitesentinel_log_channel_dropped_total", "counter", "Verworfene Log-Zeilen (Warteschlange voll)", logs["channel_dropped"])
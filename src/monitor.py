@@ -0,0 +1,409 @@
+import time
+import asyncio
+import datetime
+from array import array
+from collections.abc import Mapping
+from stats import LatencyStats, PhaseStats
+from probes import ProbeConfig
+from logger import write_log
+from urls import normalize_url, host_key
+
+DOWNTIME_HISTORY = 20  # gespeicherte Ausfälle pro Website
+
+
+class SiteState:
+    """Zustand einer Website: Status, Zähler, Antwortzeiten und letzte Ausfälle"""
+
+    __slots__ = ("status", "up", "down", "latency", "phases", "downtimes", "summary")
+
+    def __init__(self, status=None, up=0, down=0, latency=None):
+        self.status = status  # True/False, None = unbekannt
+        self.up = up
+        self.down = down
+        self.latency = latency if latency is not None else LatencyStats()
+        self.phases = None  # PhaseStats, ab der ersten Phasen-Messung
+        self.downtimes = None  # array: Beginn, Ende pro Ausfall (Ende 0 = läuft noch), max. DOWNTIME_HISTORY
+        self.summary = None  # zwischengespeicherter Status-Text für /status
+
+    def add_timing(self, timing):
+        if self.phases is None:
+            self.phases = PhaseStats()
+        self.phases.add(timing)
+
+    def downtime_started(self, timestamp):
+        if self.downtimes is None:
+            self.downtimes = array("d")
+        elif len(self.downtimes) >= 2 * DOWNTIME_HISTORY:
+            del self.downtimes[:2]
+        self.downtimes.extend((timestamp, 0.0))
+
+    def downtime_ended(self, timestamp):
+        if self.downtimes and self.downtimes[-1] == 0.0:
+            self.downtimes[-1] = timestamp
+
+    def last_downtime(self):
+        """(Beginn, Ende, Dauer in Sekunden) des letzten Ausfalls oder None; Ende None = läuft noch"""
+        if not self.downtimes:
+            return None
+        start, end = self.downtimes[-2:]
+        if not end:
+            return start, None, time.time() - start
+        return start, end, end - start
+
+
+def _canonical(url):
+    # Schlüssel für _keys; URLs mit ungültigem Port (z.B. aus alten Datenbanken) bleiben wie sie sind
+    try:
+        return normalize_url(url)
+    except ValueError:
+        return url
+
+
+class _StatusView(Mapping):
+    """Nur-lesende Sicht url -> Status auf die SiteStates (für /status, Views, Export)"""
+
+    __slots__ = ("_states",)
+
+    def __init__(self, states):
+        self._states = states
+
+    def __getitem__(self, url):
+        return self._states[url].status
+
+    def get(self, url, default=None):
+        state = self._states.get(url)
+        return default if state is None else state.status
+
+    def __contains__(self, url):
+        return url in self._states
+
+    def __iter__(self):
+        return iter(self._states)
+
+    def __len__(self):
+        return len(self._states)
+
+
+class SiteMonitor:
+    def __init__(self, db, scheduler, snapshot_interval=300, policy=None):
+        self.db = db
+        self.scheduler = scheduler
+        self.policy = policy  # CheckPolicy (optional)
+        self.snapshot_interval = snapshot_interval
+        self.states = {}  # kanonische URL -> SiteState
+        self.sites = _StatusView(self.states)
+        self.tags = {}  # url -> Tag (optional)
+        self.probes = {}  # url -> ProbeConfig (fehlt = einfacher GET)
+        # Inkrementell gepflegte Aggregate für /status und /debug
+        self.counts = {True: 0, False: 0, None: 0}
+        self.down = set()
+        self.tag_index = {}  # Tag -> Menge von URLs
+        self.hosts = {}  # Host -> Menge von URLs
+        self._keys = {}  # kanonische URL -> gespeicherte URL
+        self.on_status = None  # on_status(url, alt, neu) bei jedem Statuswechsel, z.B. SubscriptionIndex
+        self.on_tag = None  # on_tag(url, alt, neu) bei jedem Tag-Wechsel
+        self._snapshot_task = None
+        self.loaded = False
+
+    async def load(self):
+        """Lädt Websites samt letztem Status, Zählern und Antwortzeiten (ein Query)"""
+        if self.loaded:
+            return  # z.B. bei erneutem on_ready nach Reconnect
+        rows = await self.db.load_site_states()
+        states = {}
+        restored = 0
+        configs = []
+        duplicates = []
+        self._keys = {}
+        self.hosts = {}
+        for url, interval, timeout, tag, probe, status, up, down, latency in rows:
+            key = _canonical(url)
+            if key in self._keys:
+                duplicates.append((url, self._keys[key]))
+                continue
+            self._keys[key] = url
+            self.hosts.setdefault(host_key(key), set()).add(url)
+            # Ohne gespeicherten Zustand bleibt der Status None (unbekannt)
+            states[url] = SiteState(
+                None if status is None else bool(status),
+                up or 0,
+                down or 0,
+                LatencyStats.restore(latency) if latency else None,
+            )
+            if status is not None or latency:
+                restored += 1
+            self._set_tag(url, tag)
+            if probe:
+                try:
+                    self.probes[url] = ProbeConfig.from_json(probe)
+                except Exception as e:
+                    write_log(f"Ungültige Probe-Einstellungen für {url} ignoriert: {e}", db=self.db)
+            configs.append((host_key(key), url, interval, timeout))
+        # Gleiches dict-Objekt behalten, die Status-Sicht (self.sites) zeigt darauf
+        self.states.clear()
+        self.states.update(states)
+        self.counts = {True: 0, False: 0, None: 0}
+        for url, state in states.items():
+            self.counts[state.status] += 1
+            if state.status is False:
+                self.down.add(url)
+        self.loaded = True
+        # Startzeitpunkte gleichmäßig über das jeweilige Intervall verteilen; Websites eines
+        # Hosts liegen nebeneinander und nutzen so dieselbe Keep-Alive-Verbindung
+        configs.sort(key=lambda config: config[0])
+        self.scheduler.add_many(config[1:] for config in configs)
+        for url, existing in duplicates:
+            await self.db.delete_site(url)
+            write_log(f"Doppelte Website {url} entfernt (entspricht {existing})", db=self.db)
+        write_log(f"SiteMonitor initialisiert mit {len(self.sites)} Websites ({restored} mit gespeichertem Zustand)", db=self.db)
+
+    def resolve(self, url):
+        """Gespeicherte URL zu einer Eingabe; unbekannte URLs in kanonischer Form"""
+        key = _canonical(url.strip())
+        return self._keys.get(key, key)
+
+    async def add_site(self, url, interval=None, timeout=None, tag=None):
+        """Website hinzufügen (oder neu konfigurieren); liefert die verwendete URL"""
+        url = self.resolve(url)
+        self._register(url, tag)
+        self.probes.pop(url, None)
+        await self.db.save_site(url, interval, timeout, tag)
+        self.scheduler.add(url, interval, timeout)
+        write_log(f"Website hinzugefügt: {url}", db=self.db)
+        return url
+
+    async def update_site(self, url, interval=None, timeout=None, tag=None):
+        """Intervall, Timeout oder Tag einer überwachten Website ändern, ohne Status und Probe zurückzusetzen"""
+        if interval is None and timeout is None and tag is None:
+            return
+        await self.db.update_site(url, interval, timeout, tag)
+        if interval is not None or timeout is not None:
+            job = self.scheduler.get(url)
+            self.scheduler.add(
+                url,
+                interval or (job.interval if job is not None else None),
+                timeout or (job.timeout if job is not None else None),
+            )
+        if tag is not None:
+            self._set_tag(url, tag)
+            self.states[url].summary = None
+
+    async def add_sites(self, entries):
+        """Viele Websites auf einmal (ein Datenbank-Aufruf, ein Log-Eintrag).
+
+        entries: Iterable aus (url, interval, timeout, tag, probe); liefert die verwendeten URLs
+        """
+        rows = []
+        configs = []
+        for url, interval, timeout, tag, probe in entries:
+            url = self.resolve(url)
+            self._register(url, tag)
+            if probe is None:
+                self.probes.pop(url, None)
+            else:
+                self.probes[url] = probe
+            rows.append((url, interval, timeout, tag, probe.to_json() if probe is not None else None))
+            configs.append((url, interval, timeout))
+        await self.db.save_sites(rows)
+        self.scheduler.add_many(configs)
+        write_log(f"{len(rows)} Websites importiert", db=self.db)
+        return [config[0] for config in configs]
+
+    def _register(self, url, tag):
+        if url in self.states:
+            self.set_status(url, None)
+        else:
+            self.states[url] = SiteState()  # None = unbekannter Status, nicht False
+            self.counts[None] += 1
+            self._keys[_canonical(url)] = url
+            self.hosts.setdefault(host_key(url), set()).add(url)
+        self._set_tag(url, tag)
+        self.states[url].summary = None
+        if self.policy is not None:
+            self.policy.forget(url)
+
+    async def remove_site(self, url):
+        """Website entfernen; liefert die entfernte URL"""
+        url = self.resolve(url)
+        if url in self.states:
+            self.counts[self.states.pop(url).status] -= 1
+            self._keys.pop(_canonical(url), None)
+            host = host_key(url)
+            urls = self.hosts.get(host)
+            if urls is not None:
+                urls.discard(url)
+                if not urls:
+                    del self.hosts[host]
+        self.down.discard(url)
+        self._set_tag(url, None)
+        self.probes.pop(url, None)
+        self.scheduler.remove(url)
+        if self.policy is not None:
+            self.policy.forget(url)
+        await self.db.delete_site(url)
+        write_log(f"Website entfernt: {url}", db=self.db)
+        return url
+
+    def get_status(self):
+        return self.sites
+
+    def set_status(self, url, status):
+        """Setzt den Status einer Website und hält die Zähler aktuell (O(1))"""
+        state = self.states.get(url)
+        if state is None:
+            return
+        if state.status is not status:
+            old = state.status
+            self.counts[old] -= 1
+            self.counts[status] += 1
+            if status is False:
+                self.down.add(url)
+            else:
+                self.down.discard(url)
+            state.status = status
+            if self.on_status is not None:
+                self.on_status(url, old, status)
+        state.summary = None
+
+    async def set_probe(self, url, probe):
+        """Probe-Einstellungen setzen (None = einfacher GET)"""
+        if probe is None:
+            self.probes.pop(url, None)
+        else:
+            self.probes[url] = probe
+        await self.db.save_probe(url, probe.to_json() if probe is not None else None)
+        job = self.scheduler.get(url)
+        if job is not None:
+            # Neu einplanen: sofort mit der neuen Probe prüfen (bei Workern: Probe mitsenden)
+            self.scheduler.add(url, job.interval, job.timeout)
+            if self.policy is not None:
+                self.policy.forget(url)
+        write_log(f"Probe für {url}: {probe.describe() if probe is not None else 'GET'}", db=self.db)
+
+    def _set_tag(self, url, tag):
+        old = self.tags.pop(url, None)
+        if old is not None:
+            urls = self.tag_index.get(old)
+            if urls is not None:
+                urls.discard(url)
+                if not urls:
+                    del self.tag_index[old]
+        if tag:
+            self.tags[url] = tag
+            self.tag_index.setdefault(tag, set()).add(url)
+        else:
+            tag = None
+        if old != tag and self.on_tag is not None:
+            self.on_tag(url, old, tag)
+
+    def summary(self, url):
+        """Status-Text einer Website für /status; wird bis zum nächsten Check zwischengespeichert"""
+        state = self.states.get(url)
+        if state is None:
+            return self._render_summary(url)
+        if state.summary is None:
+            state.summary = self._render_summary(url)
+        return state.summary
+
+    def _render_summary(self, url):
+        state = self.states.get(url)
+        status = state.status if state is not None else None
+        if status is None:
+            text = "Unbekannt"
+        elif status:
+            text = "Online"
+        else:
+            text = "Offline"
+
+        if state is not None:
+            uptime = self.uptime(url)
+            if uptime is not None:
+                text += f" ({round(uptime, 1)}% Uptime)"
+            # Response-Zeiten der letzten 24h
+            latency = state.latency.summary("24h")
+            if latency:
+                text += (
+                    f"\n⚡ {latency['avg']:.0f}ms avg · p50 {latency['p50']:.0f}ms"
+                    f" · p95 {latency['p95']:.0f}ms · p99 {latency['p99']:.0f}ms"
+                )
+        tag = self.tags.get(url)
+        if tag:
+            text += f"\n🏷️ {tag}"
+        return text
+
+    def uptime(self, url):
+        state = self.states.get(url)
+        if state is None:
+            return None
+        total = state.up + state.down
+        return (state.up / total) * 100 if total else None
+
+    def latency_p50(self, url):
+        state = self.states.get(url)
+        latency = state.latency.summary("24h") if state is not None else None
+        return latency["p50"] if latency else None
+
+    def get_state(self, url):
+        return self.states.get(url)
+
+    def log_downtime(self, url, timestamp):
+        state = self.states.get(url)
+        if state is not None:
+            state.downtime_started(timestamp)
+        when = datetime.datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M:%S")
+        write_log(f"Downtime bei {url} um {when}", db=self.db)
+
+    def log_recovery(self, url, timestamp):
+        state = self.states.get(url)
+        if state is not None:
+            state.downtime_ended(timestamp)
+
+    def snapshot(self, urls=None):
+        """Zustand der Websites als Zeilen für Database.save_site_states"""
+        now = time.time()
+        rows = []
+        for url in self.states if urls is None else urls:
+            state = self.states.get(url)
+            if state is None:
+                continue
+            rows.append((
+                url,
+                None if state.status is None else int(state.status),
+                state.up,
+                state.down,
+                state.latency.snapshot(),
+                now,
+            ))
+        return rows
+
+    async def save_snapshot(self, chunk_size=500):
+        # In Blöcken, damit der Event-Loop bei vielen Websites nicht blockiert
+        urls = list(self.states)
+        writes = []
+        for start in range(0, len(urls), chunk_size):
+            writes.append(asyncio.ensure_future(self.db.save_site_states(self.snapshot(urls[start:start + chunk_size]))))
+            await asyncio.sleep(0)
+        await asyncio.gather(*writes)
+
+    def start_snapshots(self):
+        if self._snapshot_task is None or self._snapshot_task.done():
+            self._snapshot_task = asyncio.get_running_loop().create_task(self._snapshot_loop())
+
+    async def stop_snapshots(self):
+        """Beendet die periodischen Snapshots und speichert ein letztes Mal"""
+        if self._snapshot_task is not None:
+            self._snapshot_task.cancel()
+            try:
+                await self._snapshot_task
+            except asyncio.CancelledError:
+                pass
+            self._snapshot_task = None
+        await self.save_snapshot()
+
+    async def _snapshot_loop(self):
+        while True:
+            await asyncio.sleep(self.snapshot_interval)
+            try:
+                await self.save_snapshot()
+            except Exception as e:
+                write_log(f"Fehler beim Speichern des Monitor-Zustands: {e}", db=self.db, level="error")
@@ -0,0 +1,210 @@
+import ssl
+import time
+import socket
+import asyncio
+from urllib.parse import urlsplit
+
+from urls import DEFAULT_PORTS, NETWORK_SCHEMES
+
+# Checks ohne HTTP: tcp://host:port (nur Verbindungsaufbau), tls://host:port (mit Handshake)
+_PREFIXES = tuple(f"{scheme}://" for scheme in NETWORK_SCHEMES)
+
+_ssl_context = None
+
+
+def is_network_url(url):
+    return url.startswith(_PREFIXES)
+
+
+def split_target(url):
+    """(Host, Port, TLS) einer tcp://, tls://, http:// oder https:// URL; wirft ValueError"""
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    port = parts.port or DEFAULT_PORTS.get(scheme)
+    if not parts.hostname:
+        raise ValueError(f"Host fehlt: {url}")
+    if port is None:
+        raise ValueError(f"Port fehlt: {url} (z.B. {scheme}://host:5432)")
+    return parts.hostname, port, scheme in ("tls", "https")
+
+
+def _default_context():
+    # create_default_context lädt die CA-Zertifikate, das nur einmal machen
+    global _ssl_context
+    if _ssl_context is None:
+        _ssl_context = ssl.create_default_context()
+    return _ssl_context
+
+
+def _describe(error):
+    if isinstance(error, ssl.SSLCertVerificationError) and error.verify_message:
+        return f"TLS: {error.verify_message}"
+    return str(error) or type(error).__name__
+
+
+class ConnectResult:
+    """Ein Verbindungsaufbau: Zeiten der Phasen in Sekunden (None = Phase kam nicht vor)"""
+
+    __slots__ = ("address", "dns", "connect", "tls", "cert_expires", "error")
+
+    def __init__(self):
+        self.address = None  # verwendete IP-Adresse
+        self.dns = None
+        self.connect = None  # TCP-Handshake
+        self.tls = None  # TLS-Handshake
+        self.cert_expires = None  # Ablauf des Server-Zertifikats (Unix-Zeit)
+        self.error = None
+
+    @property
+    def ok(self):
+        return self.error is None
+
+    @property
+    def handshake(self):
+        """TCP- und TLS-Handshake zusammen (ohne DNS)"""
+        if self.connect is None:
+            return None
+        return self.connect + (self.tls or 0.0)
+
+    @property
+    def total(self):
+        if self.connect is None:
+            return None
+        return (self.dns or 0.0) + self.handshake
+
+
+async def _resolve(host, port):
+    infos = await asyncio.get_running_loop().getaddrinfo(host, port, type=socket.SOCK_STREAM)
+    return infos[0]  # wie beim Verbindungsaufbau die erste Adresse verwenden
+
+
+async def _connect(result, host, port, tls, address, ssl_context):
+    loop = asyncio.get_running_loop()
+    if address is None:
+        start = time.perf_counter()
+        address = await _resolve(host, port)
+        result.dns = time.perf_counter() - start
+    family, _, proto, _, sockaddr = address
+    result.address = sockaddr[0]
+
+    sock = socket.socket(family, socket.SOCK_STREAM, proto)
+    sock.setblocking(False)
+    transport = None
+    try:
+        start = time.perf_counter()
+        await loop.sock_connect(sock, sockaddr)
+        result.connect = time.perf_counter() - start
+        if not tls:
+            return
+        transport, protocol = await loop.create_connection(asyncio.Protocol, sock=sock)
+        start = time.perf_counter()
+        transport = await loop.start_tls(transport, protocol, ssl_context or _default_context(), server_hostname=host)
+        result.tls = time.perf_counter() - start
+        cert = transport.get_extra_info("peercert")
+        if cert and cert.get("notAfter"):
+            result.cert_expires = ssl.cert_time_to_seconds(cert["notAfter"])
+    finally:
+        if transport is not None:
+            transport.abort()  # gehört jetzt dem Transport
+        else:
+            sock.close()
+
+
+async def connect(host, port, tls=False, timeout=10, address=None, ssl_context=None):
+    """Baut eine TCP-Verbindung (optional mit TLS-Handshake) auf, misst die Phasen und schließt sie wieder.
+
+    address: bereits aufgelöste Adresse aus getaddrinfo, dann entfällt DNS.
+    Wirft keine Fehler, sondern setzt result.error.
+    """
+    result = ConnectResult()
+    try:
+        await asyncio.wait_for(_connect(result, host, port, tls, address, ssl_context), timeout)
+    except asyncio.CancelledError:
+        raise
+    except asyncio.TimeoutError:
+        result.error = "TimeoutError"
+    except Exception as e:
+        result.error = _describe(e)
+    return result
+
+
+class PingStats:
+    """Mehrere Verbindungsaufbauten zum selben Ziel, Zeiten in Millisekunden.
+
+    Gemessen wird der Handshake (TCP, bei TLS inkl. TLS) ohne DNS. Jitter ist
+    die mittlere Abweichung zwischen aufeinanderfolgenden erfolgreichen Messungen.
+    """
+
+    __slots__ = ("host", "port", "tls", "dns", "samples", "error")
+
+    def __init__(self, host, port, tls):
+        self.host = host
+        self.port = port
+        self.tls = tls
+        self.dns = None  # einmalige Namensauflösung in Sekunden
+        self.samples = []  # ConnectResult pro Versuch
+        self.error = None  # Fehler bei der Namensauflösung
+
+    @property
+    def sent(self):
+        return len(self.samples)
+
+    @property
+    def received(self):
+        return sum(1 for sample in self.samples if sample.ok)
+
+    @property
+    def loss(self):
+        return 100.0 if not self.samples else (1 - self.received / self.sent) * 100
+
+    @property
+    def address(self):
+        return next((sample.address for sample in self.samples if sample.address), None)
+
+    @property
+    def cert_expires(self):
+        return next((sample.cert_expires for sample in self.samples if sample.cert_expires), None)
+
+    @property
+    def last_error(self):
+        if self.error is not None:
+            return self.error
+        return next((sample.error for sample in reversed(self.samples) if sample.error), None)
+
+    def summary(self):
+        """min, avg, max, jitter (und tls als Mittelwert) in ms - None ohne erfolgreiche Messung"""
+        times = [sample.handshake * 1000 for sample in self.samples if sample.ok]
+        if not times:
+            return None
+        result = {
+            "min": min(times),
+            "avg": sum(times) / len(times),
+            "max": max(times),
+            "jitter": sum(abs(b - a) for a, b in zip(times, times[1:])) / (len(times) - 1) if len(times) > 1 else 0.0,
+        }
+        handshakes = [sample.tls * 1000 for sample in self.samples if sample.tls is not None]
+        if handshakes:
+            result["tls"] = sum(handshakes) / len(handshakes)
+        return result
+
+
+async def connect_samples(host, port, tls=False, count=4, timeout=5, interval=0.2, ssl_context=None):
+    """count Verbindungsaufbauten nacheinander; der Host wird nur einmal aufgelöst"""
+    stats = PingStats(host, port, tls)
+    start = time.perf_counter()
+    try:
+        address = await asyncio.wait_for(_resolve(host, port), timeout)
+    except asyncio.CancelledError:
+        raise
+    except asyncio.TimeoutError:
+        stats.error = "DNS: TimeoutError"
+        return stats
+    except Exception as e:
+        stats.error = f"DNS: {_describe(e)}"
+        return stats
+    stats.dns = time.perf_counter() - start
+    for index in range(count):
+        if index:
+            await asyncio.sleep(interval)
+        stats.samples.append(await connect(host, port, tls, timeout, address, ssl_context))
+    return stats
@@ -0,0 +1,256 @@
+import time
+import asyncio
+import datetime
+from urllib.parse import urlparse
+
+import discord
+
+from logger import write_log
+
+# Discord: max. 10 Embeds und 6000 Zeichen pro Nachricht, 25 Felder pro Embed
+MAX_EMBEDS_PER_MESSAGE = 10
+MAX_MESSAGE_CHARS = 6000
+MAX_FIELDS = 25
+FIELD_VALUE_LIMIT = 1024
+
+
+class _Transition:
+    __slots__ = ("url", "previous", "online", "reason", "at")
+
+    def __init__(self, url, previous, online, reason, at):
+        self.url = url
+        self.previous = previous  # Status vor dem ersten Wechsel im Fenster
+        self.online = online
+        self.reason = reason
+        self.at = at
+
+    @property
+    def timestamp(self):
+        return datetime.datetime.fromtimestamp(self.at, datetime.timezone.utc)
+
+
+class _RateLimiter:
+    """Token-Bucket pro Channel (Discord erlaubt ca. 5 Nachrichten pro 5 Sekunden)"""
+
+    def __init__(self, rate=5, per=5.0):
+        self.rate = rate
+        self.per = per
+        self._buckets = {}  # channel_id -> [Tokens, letzte Auffüllung]
+
+    async def acquire(self, channel_id):
+        loop = asyncio.get_running_loop()
+        bucket = self._buckets.setdefault(channel_id, [self.rate, loop.time()])
+        while True:
+            now = loop.time()
+            bucket[0] = min(self.rate, bucket[0] + (now - bucket[1]) * self.rate / self.per)
+            bucket[1] = now
+            if bucket[0] >= 1:
+                bucket[0] -= 1
+                return
+            await asyncio.sleep((1 - bucket[0]) * self.per / self.rate)
+
+
+class Notifier:
+    """Statuswechsel sammeln und getrennt von den Checks an Discord senden.
+
+    push() kehrt sofort zurück. Ein Hintergrund-Task sammelt Wechsel für
+    `window` Sekunden; mehrere Wechsel derselben Website werden dabei
+    zusammengefasst (online -> offline -> online im selben Fenster entfällt).
+    Wenige Wechsel werden wie bisher einzeln gemeldet, bei mehr als
+    `single_limit` gibt es ein Sammel-Embed pro Richtung, gruppiert nach Tag
+    oder Host. Offline-Meldungen gehen vor Online-Meldungen; gesendet wird
+    nacheinander von einem Task, mit bis zu 10 Embeds pro Nachricht und
+    gedrosselt auf das Rate-Limit des Channels. Jeder Wechsel geht an die
+    Status-Channels aller Server, die die Website abonniert haben; die
+    Channels werden parallel beliefert.
+    """
+
+    def __init__(self, bot, db, monitor, favicons, subscriptions, window=5.0, single_limit=3):
+        self.bot = bot
+        self.db = db
+        self.monitor = monitor
+        self.favicons = favicons
+        self.subscriptions = subscriptions
+        self.window = window
+        self.single_limit = single_limit
+        self.sent = 0
+        self.suppressed = 0
+        self._pending = {}  # url -> _Transition (Einfüge-Reihenfolge = Reihenfolge der Wechsel)
+        self._wakeup = asyncio.Event()
+        self._limiter = _RateLimiter()
+        self._task = None
+
+    def push(self, url, previous, online, reason=None):
+        pending = self._pending.get(url)
+        if pending is None:
+            self._pending[url] = _Transition(url, previous, online, reason, time.time())
+            self._wakeup.set()
+        elif online == pending.previous:
+            # Innerhalb des Fensters wieder im Ausgangszustand -> keine Meldung
+            del self._pending[url]
+            self.suppressed += 1
+        else:
+            pending.online = online
+            pending.reason = reason
+
+    @property
+    def pending(self):
+        return len(self._pending)
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        # Offene Meldungen noch ohne Wartefenster senden
+        try:
+            await self.flush()
+        except Exception as e:
+            write_log(f"Fehler beim Senden der letzten Benachrichtigungen: {e}", level="error")
+
+    async def _run(self):
+        while True:
+            await self._wakeup.wait()
+            await asyncio.sleep(self.window)
+            try:
+                await self.flush()
+            except Exception as e:
+                write_log(f"Fehler beim Senden von Benachrichtigungen: {e}", level="error")
+
+    async def flush(self):
+        self._wakeup.clear()
+        if not self._pending:
+            return
+        transitions, self._pending = list(self._pending.values()), {}
+
+        # Wechsel nach Status-Channel aufteilen (Reihenfolge der Wechsel bleibt erhalten)
+        by_channel = {}
+        for transition in transitions:
+            for channel_id in self.subscriptions.routes(transition.url):
+                by_channel.setdefault(channel_id, []).append(transition)
+
+        results = await asyncio.gather(
+            *(self._send(channel_id, group) for channel_id, group in by_channel.items()),
+            return_exceptions=True,
+        )
+        for channel_id, result in zip(by_channel, results):
+            if isinstance(result, Exception):
+                write_log(f"Fehler beim Senden an Channel {channel_id}: {result}", level="error")
+
+    async def _send(self, channel_id, transitions):
+        channel = self.bot.get_channel(channel_id)
+        if channel is None:
+            return
+
+        down = [t for t in transitions if not t.online]
+        up = [t for t in transitions if t.online]
+        embeds = []
+        # Offline zuerst, innerhalb einer Richtung in der Reihenfolge der Wechsel
+        for group, online in ((down, False), (up, True)):
+            if not group:
+                continue
+            if len(group) <= self.single_limit:
+                embeds.extend(self._single_embed(t) for t in group)
+            else:
+                embeds.extend(self._summary_embeds(group, online))
+
+        for message in self._pack(embeds):
+            await self._limiter.acquire(channel.id)
+            await channel.send(embeds=message)
+            self.sent += 1
+
+    def _pack(self, embeds):
+        """Embeds in Nachrichten mit max. 10 Embeds / 6000 Zeichen aufteilen"""
+        message, size = [], 0
+        for embed in embeds:
+            length = len(embed)
+            if message and (len(message) >= MAX_EMBEDS_PER_MESSAGE or size + length > MAX_MESSAGE_CHARS):
+                yield message
+                message, size = [], 0
+            message.append(embed)
+            size += length
+        if message:
+            yield message
+
+    def _footer(self, embed):
+        user = self.bot.user
+        embed.set_footer(text="Site Sentinel", icon_url=user.avatar.url if user and user.avatar else None)
+
+    def _single_embed(self, transition):
+        url = transition.url
+        if transition.online:
+            embed = discord.Embed(
+                title="🟢 Website Online",
+                description=f"**{url}** ist wieder erreichbar",
+                color=discord.Color.green(),
+                timestamp=transition.timestamp
+            )
+            favicon_url = self.favicons.lookup(url)
+        else:
+            embed = discord.Embed(
+                title="🔴 Website Offline",
+                description=f"**{url}** ist nicht erreichbar",
+                color=discord.Color.red(),
+                timestamp=transition.timestamp
+            )
+            if transition.reason:
+                embed.add_field(name="Grund", value=transition.reason[:FIELD_VALUE_LIMIT], inline=False)
+            # Nur aus dem Cache - keine Requests an einen Host, der gerade down ist
+            favicon_url = self.favicons.lookup(url, refresh=False)
+        if favicon_url:
+            embed.set_thumbnail(url=favicon_url)
+        self._footer(embed)
+        return embed
+
+    def _group_key(self, url):
+        tag = self.monitor.tags.get(url)
+        if tag:
+            return f"🏷️ {tag}"
+        return f"🖥️ {urlparse(url).hostname or url}"
+
+    def _summary_embeds(self, transitions, online):
+        groups = {}
+        for t in transitions:
+            groups.setdefault(self._group_key(t.url), []).append(t)
+
+        if online:
+            title = f"🟢 {len(transitions)} Websites wieder online"
+            color = discord.Color.green()
+        else:
+            title = f"🔴 {len(transitions)} Websites offline"
+            color = discord.Color.red()
+
+        # Größte Gruppen zuerst - bei gemeinsamer Ursache steht sie oben
+        ordered = sorted(groups.items(), key=lambda item: -len(item[1]))
+        fields = []
+        for key, members in ordered:
+            lines = []
+            for t in members:
+                line = f"• {t.url}"
+                if not online and t.reason:
+                    line += f" — {t.reason[:80]}"
+                lines.append(line)
+            value = "\n".join(lines)
+            if len(value) > FIELD_VALUE_LIMIT:
+                value = value[:FIELD_VALUE_LIMIT - 2].rsplit("\n", 1)[0] + "\n…"
+            fields.append((f"{key} ({len(members)})"[:256], value))
+
+        embeds = []
+        embed = None
+        for name, value in fields:
+            # Neues Embed bei 25 Feldern oder wenn die 6000 Zeichen überschritten würden
+            if embed is None or len(embed.fields) >= MAX_FIELDS or len(embed) + len(name) + len(value) > MAX_MESSAGE_CHARS:
+                embed = discord.Embed(title=title, color=color, timestamp=transitions[0].timestamp)
+                self._footer(embed)
+                if not embeds and len(ordered) > 1:
+                    embed.description = f"Betroffen: {len(ordered)} Gruppen (nach Tag oder Host)"
+                embeds.append(embed)
+            embed.add_field(name=name, value=value, inline=False)
+        return embeds
@@ -0,0 +1,144 @@
+import time
+from collections import deque
+
+from logger import write_log
+
+
+class Decision:
+    """Ergebnis der Policy für einen Check"""
+
+    __slots__ = ("status", "changed", "notify")
+
+    def __init__(self, status, changed=False, notify=False):
+        self.status = status  # bestätigter Status (True/False)
+        self.changed = changed  # Status hat sich mit diesem Check geändert
+        self.notify = notify  # Benachrichtigung senden
+
+
+class _PolicyState:
+    __slots__ = ("window", "healthy", "factor", "transitions", "flapping", "notified")
+
+    def __init__(self, size, notified):
+        self.window = deque(maxlen=size)  # letzte Ergebnisse (True = ok)
+        self.healthy = 0  # aufeinanderfolgende erfolgreiche Checks
+        self.factor = 1.0  # aktueller Faktor auf das konfigurierte Intervall
+        self.transitions = deque()  # Zeitpunkte bestätigter Statuswechsel
+        self.flapping = False
+        self.notified = notified  # zuletzt gemeldeter Status
+
+
+class CheckPolicy:
+    """Entscheidet, wann ein Statuswechsel als bestätigt gilt und wie oft geprüft wird.
+
+    - Ein Wechsel gilt erst, wenn `confirm` der letzten `window` Checks ihn
+      zeigen; bis dahin gibt es schnelle Bestätigungs-Checks nach `retry_delay`
+      Sekunden.
+    - Solange eine Website offline oder auffällig ist, wird mit
+      `degraded_factor` des Intervalls geprüft (nicht unter `min_interval`).
+    - Nach je `backoff_after` erfolgreichen Checks in Folge wächst das
+      Intervall um 25 %, höchstens auf `max_backoff` x das konfigurierte.
+    - Gibt es `flap_threshold` Wechsel innerhalb von `flap_window` Sekunden,
+      gilt die Website als flatternd und Benachrichtigungen werden
+      unterdrückt, bis sie sich beruhigt hat.
+    """
+
+    def __init__(
+        self,
+        scheduler,
+        confirm=2,
+        window=3,
+        retry_delay=5,
+        degraded_factor=0.25,
+        min_interval=10,
+        backoff_after=30,
+        max_backoff=2.0,
+        flap_threshold=4,
+        flap_window=3600,
+    ):
+        self.scheduler = scheduler
+        self.confirm = max(1, min(confirm, window))
+        self.window = window
+        self.retry_delay = retry_delay
+        self.degraded_factor = degraded_factor
+        self.min_interval = min_interval
+        self.backoff_after = backoff_after
+        self.max_backoff = max_backoff
+        self.flap_threshold = flap_threshold
+        self.flap_window = flap_window
+        self.rechecks = 0
+        self.suppressed = 0
+        self._states = {}
+
+    def forget(self, url):
+        self._states.pop(url, None)
+
+    def is_flapping(self, url):
+        state = self._states.get(url)
+        return state is not None and state.flapping
+
+    def observe(self, url, ok, previous, now=None):
+        """Check-Ergebnis auswerten; previous ist der bisher bestätigte Status"""
+        now = time.time() if now is None else now
+        state = self._states.get(url)
+        if state is None:
+            state = self._states[url] = _PolicyState(self.window, previous)
+        state.window.append(ok)
+
+        if previous is None:
+            # Erster Check: Status direkt übernehmen, keine Benachrichtigung
+            decision = Decision(ok)
+            state.notified = ok
+        elif ok == previous:
+            decision = Decision(previous)
+        elif sum(1 for result in state.window if result == ok) >= self.confirm:
+            state.window.clear()
+            decision = Decision(ok, changed=True)
+            self._record_transition(url, state, now)
+        else:
+            # Noch nicht bestätigt: alter Status bleibt, schnell nachprüfen
+            decision = Decision(previous)
+            self.scheduler.recheck(url, self.retry_delay)
+            self.rechecks += 1
+
+        self._update_flapping(url, state, now)
+        if decision.status != state.notified:
+            if state.flapping:
+                if decision.changed:
+                    self.suppressed += 1
+            else:
+                decision.notify = True
+                state.notified = decision.status
+
+        self._adjust_interval(url, state, ok, decision.status)
+        return decision
+
+    def _record_transition(self, url, state, now):
+        state.transitions.append(now)
+        if not state.flapping and len(state.transitions) >= self.flap_threshold:
+            state.flapping = True
+            write_log(f"{url} wechselt häufig den Status - Benachrichtigungen werden unterdrückt")
+
+    def _update_flapping(self, url, state, now):
+        while state.transitions and state.transitions[0] < now - self.flap_window:
+            state.transitions.popleft()
+        if state.flapping and len(state.transitions) <= self.flap_threshold // 2:
+            state.flapping = False
+            write_log(f"{url} ist wieder stabil - Benachrichtigungen aktiv")
+
+    def _adjust_interval(self, url, state, ok, status):
+        if ok and status:
+            state.healthy += 1
+            factor = min(self.max_backoff, 1.0 + 0.25 * (state.healthy // self.backoff_after))
+        else:
+            state.healthy = 0
+            factor = self.degraded_factor
+        if factor == state.factor:
+            return
+        state.factor = factor
+        job = self.scheduler.get(url)
+        if job is None:
+            return
+        interval = job.interval * factor
+        if factor < 1:
+            interval = max(interval, min(self.min_interval, job.interval))
+        self.scheduler.set_interval(url, interval)
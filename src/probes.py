@@ -0,0 +1,123 @@
+import re
+import json
+import hashlib
+
+DEFAULT_MAX_BYTES = 256 * 1024
+CHUNK_SIZE = 16 * 1024
+# Überlappung zwischen Chunks, damit Regex-Treffer an Chunk-Grenzen gefunden werden
+REGEX_OVERLAP = 4096
+
+
+class ProbeConfig:
+    """Probe-Einstellungen einer Website.
+
+    - method: "GET" oder "HEAD" (HEAD prüft nur den Status-Code)
+    - conditional: GET mit If-None-Match/If-Modified-Since, 304 gilt als online
+    - keyword / regex: muss im Body vorkommen (gestreamt, max. max_bytes)
+    - body_hash: erwarteter SHA-256 der ersten max_bytes des Bodys
+    """
+
+    __slots__ = ("method", "conditional", "keyword", "regex", "body_hash", "max_bytes", "_pattern", "validators")
+
+    def __init__(self, method="GET", conditional=False, keyword=None, regex=None, body_hash=None, max_bytes=None):
+        self.method = method.upper()
+        self.conditional = conditional
+        self.keyword = keyword
+        self.regex = regex
+        self.body_hash = body_hash.lower() if body_hash else None
+        self.max_bytes = max_bytes or DEFAULT_MAX_BYTES
+        # Wirft re.error bei ungültigem Muster
+        self._pattern = re.compile(regex.encode("utf-8")) if regex else None
+        # Für conditional GET: (ETag, Last-Modified, Ergebnis der Body-Prüfung) der letzten Antwort
+        self.validators = None
+
+    def conditional_headers(self):
+        if not self.conditional or self.validators is None:
+            return None
+        etag, last_modified, _ = self.validators
+        headers = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+        return headers or None
+
+    @property
+    def reads_body(self):
+        return self.method != "HEAD" and bool(self.keyword or self._pattern or self.body_hash)
+
+    def to_json(self):
+        return json.dumps({
+            "method": self.method,
+            "conditional": self.conditional,
+            "keyword": self.keyword,
+            "regex": self.regex,
+            "body_hash": self.body_hash,
+            "max_bytes": self.max_bytes,
+        })
+
+    @classmethod
+    def from_json(cls, raw):
+        return cls(**json.loads(raw))
+
+    def describe(self):
+        parts = [self.method]
+        if self.conditional:
+            parts.append("conditional")
+        if self.keyword:
+            parts.append(f"keyword={self.keyword!r}")
+        if self.regex:
+            parts.append(f"regex={self.regex!r}")
+        if self.body_hash:
+            parts.append(f"hash={self.body_hash[:12]}…")
+        if self.reads_body:
+            parts.append(f"max {self.max_bytes} Bytes")
+        return ", ".join(parts)
+
+
+async def check_body(resp, config):
+    """Liest den Body in Chunks (höchstens max_bytes) und prüft Keyword/Regex/Hash.
+
+    Gibt (Fehlertext oder None, gelesene Bytes) zurück. Sobald alle Prüfungen
+    ohne Hash erfüllt sind, wird nicht weitergelesen.
+    """
+    keyword = config.keyword.encode("utf-8") if config.keyword else None
+    pattern = config._pattern
+    hasher = hashlib.sha256() if config.body_hash else None
+    keyword_found = keyword is None
+    pattern_found = pattern is None
+    keyword_tail = b""
+    pattern_tail = b""
+    read = 0
+
+    async for chunk in resp.content.iter_chunked(CHUNK_SIZE):
+        remaining = config.max_bytes - read
+        if len(chunk) > remaining:
+            chunk = chunk[:remaining]
+        read += len(chunk)
+
+        if hasher is not None:
+            hasher.update(chunk)
+        if not keyword_found:
+            window = keyword_tail + chunk
+            if keyword in window:
+                keyword_found = True
+            keyword_tail = window[-(len(keyword) - 1):] if len(keyword) > 1 else b""
+        if not pattern_found:
+            window = pattern_tail + chunk
+            if pattern.search(window):
+                pattern_found = True
+            pattern_tail = window[-REGEX_OVERLAP:]
+
+        if read >= config.max_bytes:
+            break
+        if hasher is None and keyword_found and pattern_found:
+            break  # Alles gefunden, Rest des Bodys nicht herunterladen
+
+    if not keyword_found:
+        return f"Keyword nicht gefunden: {config.keyword}", read
+    if not pattern_found:
+        return f"Regex nicht gefunden: {config.regex}", read
+    if hasher is not None and hasher.hexdigest() != config.body_hash:
+        return f"Inhalt geändert (SHA-256 {hasher.hexdigest()[:12]}…)", read
+    return None, read
@@ -0,0 +1,190 @@
+import asyncio
+import heapq
+import itertools
+import random
+
+
+class _Job:
+    __slots__ = ("url", "interval", "current", "timeout", "base", "generation", "task", "overruns")
+
+    def __init__(self, url, interval, timeout, base, generation):
+        self.url = url
+        self.interval = interval  # konfiguriertes Intervall
+        self.current = interval  # tatsächlich verwendetes Intervall (kann die Policy anpassen)
+        self.timeout = timeout
+        self.base = base  # geplanter Zeitpunkt ohne Jitter (verhindert Drift)
+        self.generation = generation
+        self.task = None
+        self.overruns = 0
+
+
+class SiteScheduler:
+    """Plant Checks pro Website mit eigenem Intervall und Timeout.
+
+    Die nächsten Termine liegen in einem Heap, ein einzelner Task schläft bis zum
+    nächsten fälligen Check. Startzeitpunkte werden gleichmäßig über das Intervall
+    verteilt und pro Lauf leicht gejittert, damit nicht alle Checks gleichzeitig
+    feuern. Läuft ein Check beim nächsten Termin noch, wird der Termin übersprungen
+    und als Überlauf gemeldet.
+    """
+
+    def __init__(self, run_check, default_interval=60, default_timeout=10, jitter=0.1, on_overrun=None):
+        self._run_check = run_check  # async callable(url, timeout)
+        self.default_interval = default_interval
+        self.default_timeout = default_timeout
+        self.jitter = jitter
+        self._on_overrun = on_overrun
+        self._heap = []  # (fällig, seq, url, generation)
+        self._jobs = {}
+        self._seq = itertools.count()
+        self._generations = itertools.count()
+        self._wakeup = None
+        self._task = None
+        self.overruns = 0
+
+    @property
+    def running(self):
+        return self._task is not None and not self._task.done()
+
+    def _now(self):
+        return asyncio.get_running_loop().time() if self.running else 0.0
+
+    def _push(self, job, due):
+        heapq.heappush(self._heap, (due, next(self._seq), job.url, job.generation))
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def _jittered(self, job):
+        if not self.jitter:
+            return job.base
+        return job.base + random.uniform(0, self.jitter * job.current)
+
+    def add(self, url, interval=None, timeout=None, offset=0.0):
+        """Plant eine Website ein (oder ersetzt ihre Konfiguration)"""
+        old = self._jobs.get(url)
+        interval = interval or self.default_interval
+        timeout = timeout or self.default_timeout
+        job = _Job(url, interval, timeout, self._now() + offset, next(self._generations))
+        if old is not None:
+            job.task = old.task  # laufenden Check weiter für Überlauf-Erkennung kennen
+        self._jobs[url] = job
+        self._push(job, job.base)
+
+    def add_many(self, sites):
+        """Plant mehrere Websites ein und verteilt ihre Startzeitpunkte gleichmäßig.
+
+        sites: Iterable aus (url, interval, timeout)
+        """
+        by_interval = {}
+        for url, interval, timeout in sites:
+            by_interval.setdefault(interval or self.default_interval, []).append((url, timeout))
+        for interval, entries in by_interval.items():
+            step = interval / len(entries)
+            for i, (url, timeout) in enumerate(entries):
+                self.add(url, interval, timeout, offset=i * step)
+
+    def set_interval(self, url, interval):
+        """Verwendetes Intervall ändern; das konfigurierte Intervall bleibt erhalten"""
+        job = self._jobs.get(url)
+        if job is None or job.current == interval:
+            return
+        job.current = interval
+        due = self._now() + interval
+        if due < job.base:
+            self._reschedule(job, due)  # nächster Termin läge sonst zu weit in der Zukunft
+
+    def recheck(self, url, delay):
+        """Außerplanmäßigen Check in `delay` Sekunden einplanen (z.B. zur Bestätigung)"""
+        job = self._jobs.get(url)
+        if job is None:
+            return
+        due = self._now() + delay
+        if due < job.base:
+            self._reschedule(job, due)
+
+    def _reschedule(self, job, due):
+        # Neue Generation -> der bisherige Heap-Eintrag wird verworfen
+        job.generation = next(self._generations)
+        job.base = due
+        self._push(job, due)
+
+    def remove(self, url):
+        # Heap-Einträge werden beim Abarbeiten über die Generation verworfen
+        self._jobs.pop(url, None)
+
+    def get(self, url):
+        return self._jobs.get(url)
+
+    def __len__(self):
+        return len(self._jobs)
+
+    @property
+    def backlog(self):
+        """Anzahl der Checks, die gerade laufen"""
+        return sum(1 for job in self._jobs.values() if job.task is not None and not job.task.done())
+
+    def start(self):
+        if self.running:
+            return
+        loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        # Termine, die vor dem Start geplant wurden, relativ zu jetzt neu setzen
+        now = loop.time()
+        entries, self._heap = self._heap, []
+        for due, seq, url, generation in entries:
+            job = self._jobs.get(url)
+            if job is not None and job.generation == generation:
+                job.base = now + due
+                heapq.heappush(self._heap, (job.base, seq, url, generation))
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        running = [job.task for job in self._jobs.values() if job.task is not None and not job.task.done()]
+        for task in running:
+            task.cancel()
+        await asyncio.gather(*running, return_exceptions=True)
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            if not self._heap:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            delay = self._heap[0][0] - loop.time()
+            if delay > 0:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            _, _, url, generation = heapq.heappop(self._heap)
+            job = self._jobs.get(url)
+            if job is None or job.generation != generation:
+                continue  # entfernt oder neu eingeplant
+
+            now = loop.time()
+            if job.task is not None and not job.task.done():
+                job.overruns += 1
+                self.overruns += 1
+                if self._on_overrun is not None:
+                    self._on_overrun(url, job.overruns)
+            else:
+                job.task = asyncio.create_task(self._run_check(url, job.timeout))
+
+            # Nächsten Termin berechnen, verpasste Termine nicht nachholen
+            job.base += job.current
+            if job.base <= now:
+                job.base = now + job.current
+            self._push(job, self._jittered(job))
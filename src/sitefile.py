@@ -0,0 +1,220 @@
+import io
+import re
+import csv
+import json
+import asyncio
+import tempfile
+from urllib.parse import urlsplit
+
+import yaml
+
+from probes import ProbeConfig
+from urls import normalize_url, is_valid_host
+
+FIELDS = ("url", "interval", "timeout", "tag", "probe")
+EXPORT_FIELDS = FIELDS + ("status", "uptime", "p50_ms")
+MAX_BYTES = 5 * 1024 * 1024
+MAX_SITES = 20000
+
+
+class SiteEntry:
+    """Eine geprüfte Zeile einer Import-Datei"""
+
+    __slots__ = ("line", "url", "interval", "timeout", "tag", "probe")
+
+    def __init__(self, line, url, interval=None, timeout=None, tag=None, probe=None):
+        self.line = line
+        self.url = url
+        self.interval = interval
+        self.timeout = timeout
+        self.tag = tag
+        self.probe = probe  # ProbeConfig oder None
+
+
+def detect_format(filename):
+    name = filename.lower()
+    if name.endswith(".csv"):
+        return "csv"
+    if name.endswith((".yaml", ".yml")):
+        return "yaml"
+    return "text"
+
+
+def _number(value, name, low, high):
+    if value is None or value == "":
+        return None
+    try:
+        number = float(value) if isinstance(value, str) else value
+        if isinstance(number, float):
+            # 60.0 oder "60.0" (z.B. aus Tabellenkalkulationen) wie 60 behandeln
+            if not number.is_integer():
+                raise ValueError
+        number = int(number)
+    except (TypeError, ValueError, OverflowError):
+        raise ValueError(f"{name} ist keine Zahl: {value!r}")
+    if not low <= number <= high:
+        raise ValueError(f"{name} muss zwischen {low} und {high} liegen")
+    return number
+
+
+def validate_url(url):
+    """Kanonische Form einer URL (wie bei /add und Import); wirft ValueError mit lesbarer Meldung"""
+    url = normalize_url(url)
+    if not re.match(r"https?://[^/?#]+/|(tcp|tls)://[^/?#]+:\d+$", url):
+        raise ValueError(f"Ungültige URL: {url}")
+    host = urlsplit(url).hostname or ""
+    if not is_valid_host(host):
+        raise ValueError(f"Ungültiger Hostname: {host!r}")
+    return url
+
+
+def parse_entry(line, raw):
+    """Eintrag (URL-Text oder dict) prüfen; wirft ValueError mit lesbarer Meldung"""
+    if isinstance(raw, str):
+        raw = {"url": raw}
+    if not isinstance(raw, dict):
+        raise ValueError("Eintrag muss eine URL oder eine Zuordnung sein")
+    url = str(raw.get("url") or "").strip()
+    if not url:
+        raise ValueError("URL fehlt")
+    url = validate_url(url)
+    tag = raw.get("tag") or None
+    if tag is not None:
+        tag = str(tag).strip()[:50] or None
+    probe = raw.get("probe") or None
+    if probe is not None:
+        try:
+            probe = ProbeConfig.from_json(probe if isinstance(probe, str) else json.dumps(probe))
+        except Exception as e:
+            raise ValueError(f"Ungültige Probe: {e}")
+    return SiteEntry(
+        line,
+        url,
+        interval=_number(raw.get("interval"), "Intervall", 10, 86400),
+        timeout=_number(raw.get("timeout"), "Timeout", 1, 120),
+        tag=tag,
+        probe=probe,
+    )
+
+
+async def _lines(stream, max_bytes):
+    """Zeilen eines aiohttp-StreamReaders dekodieren, ohne die Datei ganz zu laden"""
+    size = 0
+    first = True
+    async for raw in stream:
+        size += len(raw)
+        if size > max_bytes:
+            raise ValueError(f"Datei ist größer als {max_bytes // 1024} KB")
+        line = raw.decode("utf-8-sig" if first else "utf-8", errors="replace").rstrip("\r\n")
+        first = False
+        yield line
+
+
+async def read_entries(stream, fmt, max_bytes=MAX_BYTES, max_sites=MAX_SITES):
+    """Liefert (Zeile, SiteEntry, None) oder (Zeile, None, Fehlermeldung) pro Eintrag.
+
+    CSV und Text werden zeilenweise gelesen (ein Eintrag pro Zeile), YAML
+    braucht das ganze Dokument. Ein Fehler der Datei selbst (zu groß,
+    ungültiges YAML) wird als ValueError geworfen.
+    """
+    count = 0
+
+    def check_limit():
+        if count > max_sites:
+            raise ValueError(f"Mehr als {max_sites} Einträge")
+
+    if fmt == "yaml":
+        chunks = []
+        async for line in _lines(stream, max_bytes):
+            chunks.append(line)
+        try:
+            data = yaml.safe_load("\n".join(chunks))
+        except yaml.YAMLError as e:
+            raise ValueError(f"Ungültiges YAML: {e}")
+        if isinstance(data, dict):
+            data = data.get("sites")
+        if data is None:
+            return
+        if not isinstance(data, list):
+            raise ValueError("YAML muss eine Liste von Websites enthalten (oder `sites:`)")
+        for index, raw in enumerate(data, start=1):
+            count += 1
+            check_limit()
+            try:
+                yield index, parse_entry(index, raw), None
+            except ValueError as e:
+                yield index, None, str(e)
+        return
+
+    header = None
+    line_no = 0
+    async for line in _lines(stream, max_bytes):
+        line_no += 1
+        text = line.strip()
+        if not text or text.startswith("#"):
+            continue
+        if fmt == "text":
+            raw = text.split()[0]
+        else:
+            # Ein Datensatz pro Zeile (URLs und Tags enthalten keine Zeilenumbrüche)
+            values = next(csv.reader([line]))
+            if header is None:
+                if "url" in (value.strip().lower() for value in values):
+                    header = [value.strip().lower() for value in values]
+                    continue
+                header = list(FIELDS)
+            raw = {name: value.strip() for name, value in zip(header, values) if name in FIELDS}
+        count += 1
+        check_limit()
+        try:
+            yield line_no, parse_entry(line_no, raw), None
+        except ValueError as e:
+            yield line_no, None, str(e)
+
+
+def _export_row(monitor, url):
+    job = monitor.scheduler.get(url)
+    probe = monitor.probes.get(url)
+    status = monitor.sites.get(url)
+    uptime = monitor.uptime(url)
+    p50 = monitor.latency_p50(url)
+    return {
+        "url": url,
+        "interval": job.interval if job is not None else None,
+        "timeout": job.timeout if job is not None else None,
+        "tag": monitor.tags.get(url),
+        "probe": probe.to_json() if probe is not None else None,
+        "status": "unknown" if status is None else ("online" if status else "offline"),
+        "uptime": round(uptime, 2) if uptime is not None else None,
+        "p50_ms": round(p50) if p50 is not None else None,
+    }
+
+
+async def export_sites(monitor, fmt, chunk_size=1000):
+    """Konfiguration und Kennzahlen aller Websites als CSV oder YAML.
+
+    Die Datei wird stückweise in eine temporäre Datei geschrieben; zurück kommt
+    das (binäre) Dateiobjekt am Anfang, der Aufrufer schließt es.
+    """
+    out = io.TextIOWrapper(tempfile.TemporaryFile(), encoding="utf-8", newline="")
+    urls = sorted(monitor.sites)
+    if fmt == "csv":
+        writer = csv.DictWriter(out, fieldnames=EXPORT_FIELDS, lineterminator="\n")
+        writer.writeheader()
+    else:
+        out.write("sites:\n")
+    for start in range(0, len(urls), chunk_size):
+        rows = [_export_row(monitor, url) for url in urls[start:start + chunk_size]]
+        if fmt == "csv":
+            writer.writerows(rows)
+        else:
+            for row in rows:
+                if row["probe"] is not None:
+                    row["probe"] = json.loads(row["probe"])
+            # Listeneinträge einzeln anhängen, zusammen ergeben sie die Liste unter `sites:`
+            out.write(yaml.safe_dump(rows, allow_unicode=True, sort_keys=False, default_flow_style=False))
+        await asyncio.sleep(0)  # bei vielen Websites die Event-Loop nicht blockieren
+    out.flush()
+    fp = out.detach()
+    fp.seek(0)
+    return fp
@@ -0,0 +1,327 @@
+import json
+import math
+import time
+import bisect
+from array import array
+
+# Relative Genauigkeit der Quantile: Bucket-Grenzen wachsen um Faktor GAMMA
+GAMMA = 1.04
+_LOG_GAMMA = math.log(GAMMA)
+
+# Name -> (Fensterlänge in Sekunden, Anzahl Teil-Histogramme)
+WINDOWS = {
+    "1h": (3600, 12),
+    "24h": (86400, 24),
+    "7d": (7 * 86400, 7),
+}
+_WINDOW_INDEX = {name: index for index, name in enumerate(WINDOWS)}
+
+# Pro Teil-Histogramm in _Window.meta: Slot, Anzahl, Summe, Maximum, Beginn in _Window.keys
+_META = 5
+
+
+def _bucket(ms):
+    if ms < 1:
+        return 0
+    return int(math.log(ms) / _LOG_GAMMA) + 1
+
+
+def _bucket_value(index):
+    # Mittelpunkt des Buckets (geometrisch), Fehler <= (GAMMA - 1) / 2
+    if index == 0:
+        return 0.5
+    low = GAMMA ** (index - 1)
+    return low * (1 + GAMMA) / 2
+
+
+class _Window:
+    """Rollierendes Fenster aus Teil-Histogrammen in flachen Arrays.
+
+    keys enthält pro Teil-Histogramm die belegten Buckets sortiert, hits an
+    derselben Stelle deren Anzahl; ein Messwert wird per Binärsuche
+    einsortiert, pro Bucket fallen 6 Bytes an.
+    """
+
+    __slots__ = ("slice_seconds", "size", "meta", "keys", "hits")
+
+    def __init__(self, length, count):
+        self.slice_seconds = length / count
+        self.size = count
+        self.meta = array("d", (-1.0, 0.0, 0.0, 0.0, 0.0)) * count
+        self.keys = array("H")
+        self.hits = array("I")
+
+    def _range(self, index):
+        start = int(self.meta[index * _META + 4])
+        end = int(self.meta[(index + 1) * _META + 4]) if index + 1 < self.size else len(self.keys)
+        return start, end
+
+    def _shift(self, index, delta):
+        # Beginn aller folgenden Teil-Histogramme verschieben
+        meta = self.meta
+        for i in range(index + 1, self.size):
+            meta[i * _META + 4] += delta
+
+    def _reset(self, index, slot):
+        start, end = self._range(index)
+        if end > start:
+            del self.keys[start:end]
+            del self.hits[start:end]
+            self._shift(index, start - end)
+        base = index * _META
+        self.meta[base] = slot
+        self.meta[base + 1] = 0.0
+        self.meta[base + 2] = 0.0
+        self.meta[base + 3] = 0.0
+
+    def _count(self, index, bucket, n=1):
+        start, end = self._range(index)
+        position = bisect.bisect_left(self.keys, bucket, start, end)
+        if position < end and self.keys[position] == bucket:
+            self.hits[position] += n
+        else:
+            self.keys.insert(position, bucket)
+            self.hits.insert(position, n)
+            self._shift(index, 1)
+
+    def add(self, ms, now):
+        slot = int(now // self.slice_seconds)
+        index = slot % self.size
+        base = index * _META
+        if self.meta[base] != slot:
+            self._reset(index, slot)
+        self._count(index, _bucket(ms))
+        meta = self.meta
+        meta[base + 1] += 1
+        meta[base + 2] += ms
+        if ms > meta[base + 3]:
+            meta[base + 3] = ms
+
+    def active(self, now):
+        """Indizes der Teil-Histogramme innerhalb des Fensters, die Messwerte enthalten"""
+        oldest = int(now // self.slice_seconds) - self.size + 1
+        meta = self.meta
+        return [i for i in range(self.size) if meta[i * _META] >= oldest and meta[i * _META + 1]]
+
+    def buckets(self, index):
+        start, end = self._range(index)
+        return list(zip(self.keys[start:end], self.hits[start:end]))
+
+    def to_list(self):
+        slices = []
+        meta = self.meta
+        for i in range(self.size):
+            base = i * _META
+            if not meta[base + 1]:
+                continue
+            entry = [int(meta[base]), int(meta[base + 1]), round(meta[base + 2], 1), round(meta[base + 3], 1)]
+            for bucket, n in self.buckets(i):
+                entry.append(bucket)
+                entry.append(n)
+            slices.append(entry)
+        return slices
+
+    def restore(self, entry):
+        slot = entry[0]
+        index = slot % self.size
+        self._reset(index, slot)
+        base = index * _META
+        self.meta[base + 1] = entry[1]
+        self.meta[base + 2] = entry[2]
+        self.meta[base + 3] = entry[3]
+        buckets = entry[4:]
+        for bucket, n in zip(buckets[::2], buckets[1::2]):
+            self._count(index, bucket, n)
+
+
+class _Ring:
+    """Ringpuffer fester Größe für Messwerte (float32, Array statt deque)"""
+
+    __slots__ = ("values", "size", "position")
+
+    def __init__(self, size, width=1):
+        self.values = array("f")
+        self.size = size * width
+        self.position = 0  # nächste Schreibposition, sobald der Puffer voll ist
+
+    def append(self, *values):
+        if len(self.values) < self.size:
+            self.values.extend(values)
+            return
+        position = self.position
+        self.values[position:position + len(values)] = array("f", values)
+        self.position = (position + len(values)) % self.size
+
+    def ordered(self):
+        """Alle Werte, ältester zuerst"""
+        return self.values[self.position:] + self.values[:self.position]
+
+    def __len__(self):
+        return len(self.values)
+
+
+class LatencyStats:
+    """Antwortzeiten einer Website mit fester Speichergröße.
+
+    Die letzten Messwerte liegen in einem Ringpuffer, für die Fenster 1h/24h/7d
+    gibt es rollierende Log-Histogramme (Teil-Histogramme pro Zeitscheibe). Ein
+    neuer Messwert kostet O(1), Avg/Quantile/Max werden aus den wenigen
+    Buckets berechnet, unabhängig davon wie viele Messwerte es gab.
+    Alle Werte in Millisekunden. Die Fenster werden erst mit dem ersten
+    Messwert angelegt.
+    """
+
+    __slots__ = ("recent", "windows", "_raw")
+
+    def __init__(self, recent_size=60):
+        self.recent = _Ring(recent_size)
+        self.windows = None
+        self._raw = None
+
+    @classmethod
+    def restore(cls, raw, recent_size=60):
+        """Gespeicherten Zustand (JSON aus snapshot()) erst beim ersten Zugriff dekodieren.
+
+        Beim Warmstart mit vielen Websites kostet das Laden so nur das Lesen der
+        Strings; dekodiert wird verteilt über die ersten Checks.
+        """
+        stats = cls(recent_size)
+        stats._raw = raw
+        return stats
+
+    def _materialize(self):
+        raw, self._raw = self._raw, None
+        self._apply(json.loads(raw))
+
+    def _windows(self):
+        if self.windows is None:
+            self.windows = tuple(_Window(length, count) for length, count in WINDOWS.values())
+        return self.windows
+
+    def add(self, seconds, now=None):
+        if self._raw is not None:
+            self._materialize()
+        now = time.time() if now is None else now
+        ms = seconds * 1000
+        self.recent.append(ms)
+        for window in self._windows():
+            window.add(ms, now)
+
+    def to_dict(self):
+        """Kompakte, JSON-taugliche Darstellung (Buckets als flache Liste)"""
+        if self._raw is not None:
+            self._materialize()
+        windows = {}
+        if self.windows is not None:
+            for name, window in zip(WINDOWS, self.windows):
+                windows[name] = window.to_list()
+        return {"recent": [round(ms, 1) for ms in self.recent.ordered()], "windows": windows}
+
+    def snapshot(self):
+        """Zustand für die Datenbank; noch nicht dekodierte Daten werden unverändert zurückgegeben"""
+        if self._raw is not None:
+            return self._raw
+        return self.to_dict()
+
+    @classmethod
+    def from_dict(cls, data, recent_size=60):
+        stats = cls(recent_size)
+        stats._apply(data)
+        return stats
+
+    def _apply(self, data):
+        for ms in data.get("recent", ())[-self.recent.size:]:
+            self.recent.append(ms)
+        for name, slices in data.get("windows", {}).items():
+            index = _WINDOW_INDEX.get(name)
+            if index is None or not slices:
+                continue
+            window = self._windows()[index]
+            for entry in slices:
+                window.restore(entry)
+
+    @property
+    def last(self):
+        if self._raw is not None:
+            self._materialize()
+        if not len(self.recent):
+            return None
+        return self.recent.values[self.recent.position - 1]
+
+    def summary(self, window="24h", quantiles=(0.5, 0.95, 0.99), now=None):
+        """avg, max und Quantile für ein Fenster - None wenn keine Messwerte vorliegen"""
+        if self._raw is not None:
+            self._materialize()
+        if self.windows is None:
+            return None
+        now = time.time() if now is None else now
+        target = self.windows[_WINDOW_INDEX[window]]
+        active = target.active(now)
+        meta = target.meta
+        count = int(sum(meta[i * _META + 1] for i in active))
+        if not count:
+            return None
+
+        merged = {}
+        for i in active:
+            for bucket, n in target.buckets(i):
+                merged[bucket] = merged.get(bucket, 0) + n
+        ordered = sorted(merged.items())
+        maximum = max(meta[i * _META + 3] for i in active)
+
+        result = {
+            "count": count,
+            "avg": sum(meta[i * _META + 2] for i in active) / count,
+            "max": maximum,
+        }
+        for q in quantiles:
+            rank = q * (count - 1)
+            seen = 0
+            value = maximum
+            for bucket, n in ordered:
+                seen += n
+                if seen > rank:
+                    value = min(_bucket_value(bucket), maximum)
+                    break
+            result[f"p{round(q * 100)}"] = value
+        return result
+
+
+class PhaseStats:
+    """Letzte Phasen-Messungen (DNS, Connect, TTFB, Gesamt) einer Website.
+
+    Wird nicht persistiert; dient zur Eingrenzung, ob eine Verlangsamung am
+    DNS, am Netzwerk oder am Server liegt, und ob Keep-Alive greift.
+    Alle Werte in Millisekunden, fehlende Phasen als NaN im Ringpuffer.
+    """
+
+    PHASES = ("dns", "connect", "ttfb", "total")
+
+    __slots__ = ("recent", "requests", "reused")
+
+    def __init__(self, recent_size=20):
+        self.recent = _Ring(recent_size, width=len(self.PHASES))
+        self.requests = 0
+        self.reused = 0
+
+    def add(self, timing):
+        self.recent.append(*(
+            math.nan if getattr(timing, phase) is None else getattr(timing, phase) * 1000
+            for phase in self.PHASES
+        ))
+        self.requests += 1
+        if timing.reused:
+            self.reused += 1
+
+    def summary(self):
+        """Median pro Phase über die letzten Messungen - None ohne Messungen"""
+        if not len(self.recent):
+            return None
+        values = self.recent.values
+        width = len(self.PHASES)
+        result = {}
+        for index, phase in enumerate(self.PHASES):
+            measured = sorted(value for value in values[index::width] if not math.isnan(value))
+            result[phase] = measured[len(measured) // 2] if measured else None
+        result["reuse"] = self.reused / self.requests * 100
+        return result
@@ -0,0 +1,266 @@
+import asyncio
+from collections.abc import Mapping
+
+# Websites und Status-Channel aus der Zeit vor mehreren Servern, bis der Bot den Server kennt
+LEGACY_GUILD = 0
+
+
+class SubscriptionIndex:
+    """Welche Server (Guilds) welche Websites abonniert haben und wohin Wechsel gemeldet werden.
+
+    Jede URL wird nur einmal geprüft, egal wie viele Server sie abonniert
+    haben. Für Benachrichtigungen liegt url -> Channel-IDs im Speicher; ein
+    Eintrag wird erst bei Bedarf berechnet und nur für die URLs verworfen,
+    die ein Command (/add, /remove, /setchannel, ...) betrifft. Zähler,
+    Offline-Menge und Tags pro Server werden über status_changed() und
+    tag_changed() (monitor.on_status/on_tag) mitgeführt; changes[guild_id]
+    ändert sich bei jeder Änderung daran (für zwischengespeicherte Listen).
+    """
+
+    def __init__(self, db):
+        self.db = db
+        self.guilds = {}  # guild_id -> {url: None} (Reihenfolge des Hinzufügens)
+        self.subscribers = {}  # url -> set(guild_id)
+        self.channels = {}  # guild_id -> Status-Channel
+        self._routes = {}  # url -> tuple(channel_id), Cache für routes()
+        self.counts = {}  # guild_id -> {True: n, False: n, None: n}
+        self.down = {}  # guild_id -> Menge der URLs mit Status False
+        self.tags = {}  # guild_id -> {Tag: Menge von URLs}
+        self.changes = {}  # guild_id -> Stand (steigt bei jeder Änderung)
+        self._clock = 0
+        self._status = {}  # url -> Status (monitor.sites nach load())
+        self._tags = {}  # url -> Tag (monitor.tags nach load())
+
+    async def load(self, monitor):
+        """Abos laden (nach monitor.load(), URLs werden auf die überwachte Form gebracht)"""
+        rows, channels = await asyncio.gather(self.db.load_subscriptions(), self.db.load_guild_channels())
+        self.guilds = {}
+        self.subscribers = {}
+        self._routes = {}
+        self.counts = {}
+        self.down = {}
+        self.tags = {}
+        self._status = monitor.sites
+        self._tags = monitor.tags
+        self.channels = dict(channels)
+        moved = {}
+        for guild_id, url in rows:
+            resolved = monitor.resolve(url)
+            if resolved not in monitor.sites:
+                continue  # Website wurde entfernt oder war ein Duplikat ohne Gegenstück
+            if resolved != url:
+                moved.setdefault(guild_id, []).append(resolved)
+            self._add(guild_id, resolved)
+        for guild_id, urls in moved.items():
+            await self.db.subscribe(guild_id, urls)
+
+    def _add(self, guild_id, url):
+        urls = self.guilds.setdefault(guild_id, {})
+        if url in urls:
+            return
+        urls[url] = None
+        self.subscribers.setdefault(url, set()).add(guild_id)
+        self._routes.pop(url, None)
+        status = self._status.get(url)
+        counts = self.counts.get(guild_id)
+        if counts is None:
+            counts = self.counts[guild_id] = {True: 0, False: 0, None: 0}
+        counts[status] += 1
+        if status is False:
+            self.down.setdefault(guild_id, set()).add(url)
+        tag = self._tags.get(url)
+        if tag is not None:
+            self.tags.setdefault(guild_id, {}).setdefault(tag, set()).add(url)
+        self._touch(guild_id)
+
+    def _discard(self, guild_id, url):
+        """Entfernt ein Abo; True, wenn die URL danach kein Server mehr abonniert hat"""
+        urls = self.guilds.get(guild_id)
+        if urls is not None and url in urls:
+            del urls[url]
+            self.counts[guild_id][self._status.get(url)] -= 1
+            down = self.down.get(guild_id)
+            if down is not None:
+                down.discard(url)
+            self._untag(guild_id, url, self._tags.get(url))
+            self._touch(guild_id)
+            if not urls:
+                del self.guilds[guild_id]
+                del self.counts[guild_id]
+                self.down.pop(guild_id, None)
+                self.tags.pop(guild_id, None)
+                self.changes.pop(guild_id, None)
+        self._routes.pop(url, None)
+        guilds = self.subscribers.get(url)
+        if guilds is None:
+            return True
+        guilds.discard(guild_id)
+        if guilds:
+            return False
+        del self.subscribers[url]
+        return True
+
+    def status_changed(self, url, old, new):
+        """Statuswechsel einer Website (monitor.on_status): Zähler der abonnierenden Server anpassen"""
+        for guild_id in self.subscribers.get(url, ()):
+            counts = self.counts[guild_id]
+            counts[old] -= 1
+            counts[new] += 1
+            if new is False:
+                self.down.setdefault(guild_id, set()).add(url)
+            elif old is False:
+                self.down[guild_id].discard(url)
+            self._touch(guild_id)
+
+    def tag_changed(self, url, old, new):
+        """Neuer Tag einer Website (monitor.on_tag): Tag-Mengen der abonnierenden Server anpassen"""
+        for guild_id in self.subscribers.get(url, ()):
+            self._untag(guild_id, url, old)
+            if new is not None:
+                self.tags.setdefault(guild_id, {}).setdefault(new, set()).add(url)
+            self._touch(guild_id)
+
+    def _untag(self, guild_id, url, tag):
+        index = self.tags.get(guild_id)
+        if tag is None or index is None:
+            return
+        members = index.get(tag)
+        if members is not None:
+            members.discard(url)
+            if not members:
+                del index[tag]
+
+    def _touch(self, guild_id):
+        self._clock += 1
+        self.changes[guild_id] = self._clock
+
+    def routes(self, url):
+        """Status-Channels aller Server, die die URL abonniert haben"""
+        route = self._routes.get(url)
+        if route is None:
+            channels = self.channels
+            route = tuple(
+                channels[guild_id] for guild_id in self.subscribers.get(url, ()) if guild_id in channels
+            )
+            self._routes[url] = route
+        return route
+
+    def urls(self, guild_id):
+        return self.guilds.get(guild_id, {})
+
+    def is_subscribed(self, guild_id, url):
+        return url in self.guilds.get(guild_id, ())
+
+    def is_shared(self, guild_id, url):
+        """True, wenn (auch) andere Server die URL abonniert haben - ihre Einstellungen gelten dann für alle"""
+        return any(other != guild_id for other in self.subscribers.get(url, ()))
+
+    async def subscribe(self, guild_id, urls):
+        """Abos anlegen; liefert die URLs, die der Server noch nicht hatte"""
+        known = self.guilds.get(guild_id, {})
+        new = [url for url in dict.fromkeys(urls) if url not in known]
+        if new:
+            await self.db.subscribe(guild_id, new)
+            for url in new:
+                self._add(guild_id, url)
+        return new
+
+    async def unsubscribe(self, guild_id, url):
+        """Abo entfernen; True, wenn die URL danach niemand mehr abonniert hat (Check kann weg)"""
+        await self.db.unsubscribe(guild_id, url)
+        return self._discard(guild_id, url)
+
+    async def set_channel(self, guild_id, channel_id):
+        await self.db.set_guild_channel(guild_id, channel_id)
+        self.channels[guild_id] = channel_id
+        for url in self.urls(guild_id):
+            self._routes.pop(url, None)
+
+    async def remove_guild(self, guild_id):
+        """Alle Abos eines Servers entfernen; liefert die URLs ohne verbleibende Abonnenten"""
+        await self.db.delete_guild(guild_id)
+        self.channels.pop(guild_id, None)
+        return [url for url in list(self.urls(guild_id)) if self._discard(guild_id, url)]
+
+    async def adopt(self, guild_id, old_id=LEGACY_GUILD):
+        """Abos und Channel von old_id (ältere Datenbank ohne Server) auf guild_id übertragen"""
+        urls = list(self.urls(old_id))
+        if not urls and old_id not in self.channels:
+            return 0
+        await self.db.move_guild(old_id, guild_id)
+        channel_id = self.channels.pop(old_id, None)
+        if channel_id is not None:
+            self.channels.setdefault(guild_id, channel_id)
+        for url in urls:
+            self._discard(old_id, url)
+            self._add(guild_id, url)
+        return len(urls)
+
+    def view(self, guild_id, monitor):
+        return GuildSites(monitor, self, guild_id)
+
+
+class _GuildStatus(Mapping):
+    """url -> Status, beschränkt auf die Websites eines Servers"""
+
+    __slots__ = ("_status", "_urls")
+
+    def __init__(self, status, urls):
+        self._status = status
+        self._urls = urls
+
+    def __getitem__(self, url):
+        if url not in self._urls:
+            raise KeyError(url)
+        return self._status[url]
+
+    def get(self, url, default=None):
+        return self._status.get(url, default) if url in self._urls else default
+
+    def __contains__(self, url):
+        return url in self._urls
+
+    def __iter__(self):
+        return iter(self._urls)
+
+    def __len__(self):
+        return len(self._urls)
+
+
+class GuildSites:
+    """Sicht eines Servers auf den SiteMonitor (für /status, /debug, /export).
+
+    sites, down, counts und tag_index enthalten nur die abonnierten Websites,
+    alles andere (summary, uptime, scheduler, probes, ...) kommt vom Monitor.
+    down, counts und tag_index führt der SubscriptionIndex mit, sie kosten nichts.
+    """
+
+    def __init__(self, monitor, index, guild_id):
+        self.monitor = monitor
+        self.index = index
+        self.guild_id = guild_id
+        self.urls = index.urls(guild_id)
+        self.sites = _GuildStatus(monitor.sites, self.urls)
+
+    def __getattr__(self, name):
+        return getattr(self.monitor, name)
+
+    def get_status(self):
+        return self.sites
+
+    @property
+    def down(self):
+        return self.index.down.get(self.guild_id, set())
+
+    @property
+    def counts(self):
+        return self.index.counts.get(self.guild_id) or {True: 0, False: 0, None: 0}
+
+    @property
+    def tag_index(self):
+        return self.index.tags.get(self.guild_id, {})
+
+    @property
+    def version(self):
+        """Ändert sich, sobald sich Websites, Status oder Tags des Servers ändern"""
+        return self.index.changes.get(self.guild_id, 0)
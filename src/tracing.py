@@ -0,0 +1,123 @@
+import time
+
+import aiohttp
+
+
+class RequestTiming:
+    """Phasen eines Requests in Sekunden (None = Phase kam nicht vor).
+
+    - dns: Namensauflösung (0 bei Treffer im DNS-Cache)
+    - connect: Verbindungsaufbau inkl. TLS-Handshake (aiohttp trennt TCP und TLS nicht)
+    - ttfb: Request gesendet bis Antwort-Header empfangen (Wartezeit auf den Server)
+    - total: Request-Start bis die Antwort vollständig gelesen ist
+    - reused: Verbindung kam aus dem Keep-Alive-Pool
+    """
+
+    __slots__ = ("start", "dns", "connect", "ttfb", "total", "reused", "_dns_start", "_connect_start", "_connect_dns", "_sent")
+
+    def __init__(self):
+        self.start = None
+        self.dns = None
+        self.connect = None
+        self.ttfb = None
+        self.total = None
+        self.reused = False
+        self._dns_start = None
+        self._connect_start = None
+        self._connect_dns = 0.0
+        self._sent = None
+
+    def finish(self):
+        if self.start is not None:
+            self.total = time.perf_counter() - self.start
+
+    def describe(self):
+        parts = []
+        for label, value in (("DNS", self.dns), ("Connect", self.connect), ("TTFB", self.ttfb), ("Gesamt", self.total)):
+            if value is not None:
+                parts.append(f"{label} {value * 1000:.0f}ms")
+        parts.append("Verbindung wiederverwendet" if self.reused else "neue Verbindung")
+        return " · ".join(parts)
+
+
+def _timing(ctx):
+    timing = ctx.trace_request_ctx
+    return timing if isinstance(timing, RequestTiming) else None
+
+
+async def _on_request_start(session, ctx, params):
+    timing = _timing(ctx)
+    if timing is not None:
+        timing.start = time.perf_counter()
+
+
+async def _on_dns_start(session, ctx, params):
+    timing = _timing(ctx)
+    if timing is not None:
+        timing._dns_start = time.perf_counter()
+
+
+async def _on_dns_end(session, ctx, params):
+    timing = _timing(ctx)
+    if timing is not None and timing._dns_start is not None:
+        timing.dns = (timing.dns or 0.0) + time.perf_counter() - timing._dns_start
+
+
+async def _on_dns_cache_hit(session, ctx, params):
+    timing = _timing(ctx)
+    if timing is not None and timing.dns is None:
+        timing.dns = 0.0
+
+
+async def _on_connection_start(session, ctx, params):
+    timing = _timing(ctx)
+    if timing is not None:
+        timing._connect_start = time.perf_counter()
+        timing._connect_dns = timing.dns or 0.0
+        timing.reused = False
+
+
+async def _on_connection_end(session, ctx, params):
+    timing = _timing(ctx)
+    if timing is not None and timing._connect_start is not None:
+        # Die DNS-Auflösung läuft innerhalb des Verbindungsaufbaus, bei Redirects wird summiert
+        elapsed = time.perf_counter() - timing._connect_start
+        dns = (timing.dns or 0.0) - timing._connect_dns
+        timing.connect = (timing.connect or 0.0) + max(0.0, elapsed - dns)
+
+
+async def _on_connection_reused(session, ctx, params):
+    timing = _timing(ctx)
+    if timing is not None:
+        timing.reused = True
+
+
+async def _on_headers_sent(session, ctx, params):
+    timing = _timing(ctx)
+    if timing is not None:
+        timing._sent = time.perf_counter()
+
+
+async def _on_request_end(session, ctx, params):
+    timing = _timing(ctx)
+    if timing is not None and timing._sent is not None:
+        timing.ttfb = time.perf_counter() - timing._sent
+
+
+def create_trace_config():
+    """TraceConfig für die gemeinsame Session.
+
+    Gemessen wird nur, wenn der Request mit trace_request_ctx=RequestTiming()
+    gestartet wurde; andere Requests (z.B. Favicons) kosten nur den Aufruf.
+    """
+    trace_config = aiohttp.TraceConfig()
+    trace_config.on_request_start.append(_on_request_start)
+    trace_config.on_dns_resolvehost_start.append(_on_dns_start)
+    trace_config.on_dns_resolvehost_end.append(_on_dns_end)
+    trace_config.on_dns_cache_hit.append(_on_dns_cache_hit)
+    trace_config.on_connection_create_start.append(_on_connection_start)
+    trace_config.on_connection_create_end.append(_on_connection_end)
+    trace_config.on_connection_reuseconn.append(_on_connection_reused)
+    trace_config.on_request_headers_sent.append(_on_headers_sent)
+    trace_config.on_request_end.append(_on_request_end)
+    return trace_config
@@ -0,0 +1,67 @@
+import re
+import ipaddress
+from urllib.parse import urlsplit, urlunsplit
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+# Nur Host und Port, kein Pfad (siehe netprobe)
+NETWORK_SCHEMES = ("tcp", "tls")
+# Hostname nach IDNA-Kodierung: Labels aus Buchstaben, Ziffern, "-" und "_", getrennt durch Punkte
+HOST_PATTERN = re.compile(r"(?!-)[a-z0-9_-]{1,63}(?<!-)(?:\.(?!-)[a-z0-9_-]{1,63}(?<!-))*")
+
+
+def _is_ip(host):
+    try:
+        ipaddress.ip_address(host.strip("[]"))
+    except ValueError:
+        return False
+    return True
+
+
+def is_valid_host(host):
+    """Hostname oder IP-Adresse (wie urlsplit().hostname sie liefert); False z.B. bei Leerzeichen"""
+    return bool(host) and (HOST_PATTERN.fullmatch(host) is not None or _is_ip(host))
+
+
+def normalize_url(url):
+    """Kanonische Form einer URL, damit gleiche Websites nur einmal geprüft werden.
+
+    Schema und Host werden klein geschrieben, der Host IDNA-kodiert,
+    Standard-Ports und Fragmente entfernt und ein leerer Pfad wird zu "/".
+    Ohne Schema wird https angenommen, bei IP-Adressen http (Zertifikate
+    gelten fast nie für IPs). Pfad und Query bleiben unverändert, tcp:// und
+    tls:// URLs bestehen nur aus Host und Port. Wirft ValueError bei
+    ungültigem Port.
+    """
+    url = url.strip()
+    if "://" not in url:
+        host = urlsplit("//" + url).hostname or ""
+        url = ("http://" if _is_ip(host) else "https://") + url
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    host = parts.hostname or ""
+    if host and not host.startswith("["):
+        host = host.rstrip(".")
+        try:
+            host = host.encode("idna").decode("ascii")
+        except UnicodeError:
+            pass  # ungültige Labels unverändert lassen, der Check meldet den Fehler
+    if ":" in host:
+        host = f"[{host}]"  # IPv6
+    netloc = host
+    if parts.username is not None:
+        userinfo = parts.username + (f":{parts.password}" if parts.password is not None else "")
+        netloc = f"{userinfo}@{host}"
+    try:
+        port = parts.port
+    except ValueError:
+        raise ValueError(f"Ungültiger Port: {url}") from None
+    if port is not None and port != DEFAULT_PORTS.get(scheme):
+        netloc += f":{port}"
+    if scheme in NETWORK_SCHEMES:
+        return f"{scheme}://{netloc}"
+    return urlunsplit((scheme, netloc, parts.path or "/", parts.query, ""))
+
+
+def host_key(url):
+    """Host einer URL, für Gruppierung und Limits pro Host"""
+    return urlsplit(url).hostname or url
@@ -0,0 +1,179 @@
+import math
+import time
+
+import discord
+
+PAGE_SIZE = 10
+
+FILTER_ALL = "all"
+FILTER_DOWN = "down"
+TAG_PREFIX = "tag:"
+
+SORT_DEFAULT = "default"
+SORT_LATENCY = "latency"
+SORT_UPTIME = "uptime"
+
+
+class SiteListView(discord.ui.View):
+    """Blättern, Filtern und Sortieren der überwachten Websites.
+
+    Pro Seite werden nur die Websites dieser Seite gerendert. Die gefilterte
+    (und ggf. sortierte) Liste wird einmal aufgebaut und für jede Seite nur
+    geschnitten; neu aufgebaut wird sie, wenn sich monitor.version ändert
+    (Websites, Status oder Tags des Servers) oder über 🔄.
+    """
+
+    def __init__(self, monitor, render, timeout=300):
+        super().__init__(timeout=timeout)
+        self.monitor = monitor
+        self.render = render  # callable(view) -> discord.Embed
+        self.page = 0
+        self.filter = FILTER_ALL
+        self.sort = SORT_DEFAULT
+        self._ordered = None
+        self._version = None
+
+        filter_options = [
+            discord.SelectOption(label="Alle Websites", value=FILTER_ALL, emoji="🌐", default=True),
+            discord.SelectOption(label="Nur Offline", value=FILTER_DOWN, emoji="🔴"),
+        ]
+        for tag in sorted(monitor.tag_index)[:23]:  # Discord erlaubt max. 25 Optionen
+            filter_options.append(discord.SelectOption(label=f"Tag: {tag}"[:100], value=f"{TAG_PREFIX}{tag}"[:100], emoji="🏷️"))
+        self.filter_select = discord.ui.Select(placeholder="Filter", options=filter_options, row=0)
+        self.filter_select.callback = self._on_filter
+        self.add_item(self.filter_select)
+
+        self.sort_select = discord.ui.Select(
+            placeholder="Sortierung",
+            options=[
+                discord.SelectOption(label="Standard", value=SORT_DEFAULT, default=True),
+                discord.SelectOption(label="Antwortzeit (langsamste zuerst)", value=SORT_LATENCY, emoji="⚡"),
+                discord.SelectOption(label="Uptime (niedrigste zuerst)", value=SORT_UPTIME, emoji="📉"),
+            ],
+            row=1,
+        )
+        self.sort_select.callback = self._on_sort
+        self.add_item(self.sort_select)
+        self._sync_buttons()
+
+    # Daten
+
+    def _source(self):
+        if self.filter == FILTER_DOWN:
+            return sorted(self.monitor.down)
+        if self.filter.startswith(TAG_PREFIX):
+            return sorted(self.monitor.tag_index.get(self.filter[len(TAG_PREFIX):], ()))
+        return self.monitor.sites
+
+    def count(self):
+        if self.filter == FILTER_DOWN:
+            return len(self.monitor.down)
+        if self.filter.startswith(TAG_PREFIX):
+            return len(self.monitor.tag_index.get(self.filter[len(TAG_PREFIX):], ()))
+        return len(self.monitor.sites)
+
+    @property
+    def pages(self):
+        return max(1, math.ceil(self.count() / PAGE_SIZE))
+
+    def _order(self):
+        version = self.monitor.version
+        if self._ordered is None or self._version != version:
+            if self.sort == SORT_DEFAULT:
+                self._ordered = list(self._source())
+            else:
+                if self.sort == SORT_LATENCY:
+                    def key(url):
+                        p50 = self.monitor.latency_p50(url)
+                        return -p50 if p50 is not None else math.inf
+                else:
+                    def key(url):
+                        uptime = self.monitor.uptime(url)
+                        return uptime if uptime is not None else math.inf
+                self._ordered = sorted(self._source(), key=key)
+            self._version = version
+        return self._ordered
+
+    def page_urls(self):
+        start = self.page * PAGE_SIZE
+        return self._order()[start:start + PAGE_SIZE]
+
+    # Steuerung
+
+    def _sync_buttons(self):
+        self.previous_page.disabled = self.page <= 0
+        self.next_page.disabled = self.page >= self.pages - 1
+
+    async def _update(self, interaction):
+        self.page = min(self.page, self.pages - 1)
+        self._sync_buttons()
+        await interaction.response.edit_message(embed=self.render(self), view=self)
+
+    async def _on_filter(self, interaction):
+        self.filter = self.filter_select.values[0]
+        for option in self.filter_select.options:
+            option.default = option.value == self.filter
+        self.page = 0
+        self._ordered = None
+        await self._update(interaction)
+
+    async def _on_sort(self, interaction):
+        self.sort = self.sort_select.values[0]
+        for option in self.sort_select.options:
+            option.default = option.value == self.sort
+        self.page = 0
+        self._ordered = None
+        await self._update(interaction)
+
+    @discord.ui.button(label="◀", style=discord.ButtonStyle.secondary, row=2)
+    async def previous_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        self.page = max(0, self.page - 1)
+        await self._update(interaction)
+
+    @discord.ui.button(label="🔄", style=discord.ButtonStyle.secondary, row=2)
+    async def refresh(self, interaction: discord.Interaction, button: discord.ui.Button):
+        self._ordered = None
+        await self._update(interaction)
+
+    @discord.ui.button(label="▶", style=discord.ButtonStyle.secondary, row=2)
+    async def next_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        self.page = min(self.pages - 1, self.page + 1)
+        await self._update(interaction)
+
+
+class LogView(discord.ui.View):
+    """Blättern durch die Treffer von /logs; jede Seite wird einzeln abgefragt"""
+
+    def __init__(self, fetch, render, timeout=300):
+        super().__init__(timeout=timeout)
+        self.fetch = fetch  # async callable(page) -> (Einträge, weitere vorhanden)
+        self.render = render  # callable(view) -> discord.Embed
+        self.page = 0
+        self.records = []
+        self.more = False
+        self.query_ms = 0.0
+
+    async def load(self):
+        start = time.perf_counter()
+        self.records, self.more = await self.fetch(self.page)
+        self.query_ms = (time.perf_counter() - start) * 1000
+        self.previous_page.disabled = self.page <= 0
+        self.next_page.disabled = not self.more
+
+    async def _update(self, interaction):
+        await self.load()
+        await interaction.response.edit_message(embed=self.render(self), view=self)
+
+    @discord.ui.button(label="◀", style=discord.ButtonStyle.secondary)
+    async def previous_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        self.page = max(0, self.page - 1)
+        await self._update(interaction)
+
+    @discord.ui.button(label="🔄", style=discord.ButtonStyle.secondary)
+    async def refresh(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self._update(interaction)
+
+    @discord.ui.button(label="▶", style=discord.ButtonStyle.secondary)
+    async def next_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        self.page += 1
+        await self._update(interaction)
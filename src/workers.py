@@ -0,0 +1,536 @@
+"""Check-Worker in eigenen Prozessen (auch auf anderen Hosts).
+
+Der Bot startet einen WorkerHub, der die gleiche Schnittstelle wie
+SiteScheduler hat. Worker verbinden sich per TCP mit dem Hub, jeder Worker
+besitzt über Consistent Hashing einen Teil der Websites und prüft ihn mit
+eigenem Scheduler, Checker und HTTP-Client. Ergebnisse gehen als JSON-Zeilen
+zurück an den Bot, der nur noch Commands, Status und Benachrichtigungen
+verarbeitet. Kommt ein Worker hinzu oder fällt weg, wandern nur die
+Websites, deren Zuständigkeit sich ändert.
+
+Worker auf einem anderen Host starten (das Token kommt aus der Umgebung,
+nicht von der Kommandozeile, dort wäre es für alle Nutzer in `ps` sichtbar):
+
+    SITESENTINEL_WORKER_TOKEN=... python src/workers.py --hub 10.0.0.5:8765 --id host-b
+"""
+import os
+import sys
+import json
+import socket
+import asyncio
+import hmac
+import hashlib
+import argparse
+import bisect
+import ipaddress
+
+from checker import ConcurrentChecker, CheckResult
+from http_client import HttpClient
+from probes import ProbeConfig
+from scheduler import SiteScheduler
+from tracing import RequestTiming
+
+# Große Zeilen erlauben (viele Websites in einer Nachricht)
+STREAM_LIMIT = 16 * 1024 * 1024
+# Websites pro "add"-Nachricht
+ADD_BATCH = 500
+# Umgebungsvariable mit dem worker_token für Worker-Prozesse
+TOKEN_ENV = "SITESENTINEL_WORKER_TOKEN"
+
+
+def _is_loopback(host):
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False  # Hostname oder "" (alle Interfaces)
+
+
+def _token_matches(given, expected):
+    # Vergleich in konstanter Zeit, damit sich das Token nicht über Antwortzeiten erraten lässt
+    return hmac.compare_digest(str(given or "").encode("utf-8"), str(expected or "").encode("utf-8"))
+
+
+def _whole_number(value):
+    """argparse-Typ: ganze Zahl, auch als 60.0 (wie in config.yaml und beim Import erlaubt)"""
+    try:
+        number = float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"keine Zahl: {value!r}")
+    if not number.is_integer():
+        raise argparse.ArgumentTypeError(f"keine ganze Zahl: {value!r}")
+    return int(number)
+
+
+def _hash(key):
+    return int.from_bytes(hashlib.md5(key.encode("utf-8")).digest()[:8], "big")
+
+
+class HashRing:
+    """Consistent Hashing mit virtuellen Knoten pro Worker"""
+
+    def __init__(self, nodes=(), replicas=100):
+        self.replicas = replicas
+        self._keys = []
+        self._owners = []
+        self.nodes = set()
+        for node in nodes:
+            self.add(node)
+
+    def add(self, node):
+        if node in self.nodes:
+            return
+        self.nodes.add(node)
+        for i in range(self.replicas):
+            key = _hash(f"{node}#{i}")
+            index = bisect.bisect(self._keys, key)
+            self._keys.insert(index, key)
+            self._owners.insert(index, node)
+
+    def remove(self, node):
+        if node not in self.nodes:
+            return
+        self.nodes.discard(node)
+        kept = [(k, o) for k, o in zip(self._keys, self._owners) if o != node]
+        self._keys = [k for k, _ in kept]
+        self._owners = [o for _, o in kept]
+
+    def node_for(self, key):
+        if not self._keys:
+            return None
+        index = bisect.bisect(self._keys, _hash(key)) % len(self._keys)
+        return self._owners[index]
+
+
+def result_to_dict(result):
+    timing = result.timing
+    return {
+        "op": "result",
+        "url": result.url,
+        "status": result.status,
+        "response_time": result.response_time,
+        "error": result.error,
+        "checked_at": result.checked_at,
+        "timing": None if timing is None else [timing.dns, timing.connect, timing.ttfb, timing.total, timing.reused],
+    }
+
+
+def result_from_dict(data):
+    timing = None
+    if data.get("timing") is not None:
+        timing = RequestTiming()
+        timing.dns, timing.connect, timing.ttfb, timing.total, timing.reused = data["timing"]
+    return CheckResult(
+        data["url"],
+        status=data.get("status"),
+        response_time=data.get("response_time"),
+        error=data.get("error"),
+        checked_at=data.get("checked_at"),
+        timing=timing,
+    )
+
+
+async def _send(writer, message):
+    writer.write(json.dumps(message, separators=(",", ":")).encode("utf-8") + b"\n")
+    await writer.drain()
+
+
+# Bot-Seite
+
+class _RemoteJob:
+    __slots__ = ("url", "interval", "current", "timeout", "worker")
+
+    def __init__(self, url, interval, timeout):
+        self.url = url
+        self.interval = interval
+        self.current = interval
+        self.timeout = timeout
+        self.worker = None  # ID des zuständigen Workers
+
+
+class _Connection:
+    __slots__ = ("worker_id", "writer", "queue", "task")
+
+    def __init__(self, worker_id, writer):
+        self.worker_id = worker_id
+        self.writer = writer
+        self.queue = asyncio.Queue()  # ausgehende Nachrichten, Reihenfolge bleibt erhalten
+        self.task = None
+
+
+class WorkerHub:
+    """Verteilt Websites auf Worker-Prozesse; Schnittstelle wie SiteScheduler.
+
+    on_result(result) wird für jedes Ergebnis eines Workers aufgerufen.
+    Mit local_workers > 0 startet der Hub selbst entsprechend viele Worker
+    auf diesem Host, weitere können sich über host/port verbinden. Ohne
+    token lauscht der Hub nur auf Loopback-Adressen.
+    """
+
+    def __init__(
+        self,
+        on_result,
+        host="127.0.0.1",
+        port=8765,
+        token=None,
+        local_workers=0,
+        worker_options=None,
+        default_interval=60,
+        default_timeout=10,
+        on_overrun=None,
+        log=None,
+    ):
+        if not token and not _is_loopback(host):
+            # Sonst könnte jeder im Netz als Worker Ergebnisse einschleusen
+            raise ValueError(f"worker_token fehlt: der Worker-Hub auf {host}:{port} wäre ohne Token von außen erreichbar")
+        self._on_result = on_result
+        self.host = host
+        self.port = port
+        self.token = token
+        self.local_workers = local_workers
+        self.worker_options = worker_options or {}  # Schlüssel wie in config.yaml
+        self.default_interval = default_interval
+        self.default_timeout = default_timeout
+        self._on_overrun = on_overrun
+        self._log = log or (lambda message: None)
+        self.probes = {}  # url -> ProbeConfig, wird vom Monitor geteilt
+        self.overruns = 0
+        self.results = 0
+        self._jobs = {}
+        self._ring = HashRing()
+        self._connections = {}  # worker_id -> _Connection
+        self._server = None
+        self._processes = []
+        self._task = None
+
+    # Schnittstelle wie SiteScheduler
+
+    @property
+    def running(self):
+        return self._server is not None
+
+    @property
+    def workers(self):
+        return sorted(self._connections)
+
+    def __len__(self):
+        return len(self._jobs)
+
+    def get(self, url):
+        return self._jobs.get(url)
+
+    @property
+    def backlog(self):
+        return 0  # laufende Checks kennen nur die Worker
+
+    def add(self, url, interval=None, timeout=None, offset=0.0):
+        job = _RemoteJob(url, interval or self.default_interval, timeout or self.default_timeout)
+        old = self._jobs.get(url)
+        self._jobs[url] = job
+        if old is not None and old.worker is not None and old.worker != self._ring.node_for(url):
+            self._send_to(old.worker, {"op": "remove", "urls": [url]})
+        job.worker = self._ring.node_for(url)
+        if job.worker is not None:
+            self._send_to(job.worker, {"op": "add", "sites": [self._site(job)], "spread": False})
+
+    def add_many(self, sites):
+        by_worker = {}
+        for url, interval, timeout in sites:
+            job = _RemoteJob(url, interval or self.default_interval, timeout or self.default_timeout)
+            job.worker = self._ring.node_for(url)
+            self._jobs[url] = job
+            if job.worker is not None:
+                by_worker.setdefault(job.worker, []).append(self._site(job))
+        for worker_id, entries in by_worker.items():
+            self._send_sites(worker_id, entries)
+
+    def remove(self, url):
+        job = self._jobs.pop(url, None)
+        if job is not None and job.worker is not None:
+            self._send_to(job.worker, {"op": "remove", "urls": [url]})
+
+    def set_interval(self, url, interval):
+        job = self._jobs.get(url)
+        if job is None or job.current == interval:
+            return
+        job.current = interval
+        if job.worker is not None:
+            self._send_to(job.worker, {"op": "interval", "url": url, "interval": interval})
+
+    def recheck(self, url, delay):
+        job = self._jobs.get(url)
+        if job is not None and job.worker is not None:
+            self._send_to(job.worker, {"op": "recheck", "url": url, "delay": delay})
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._start())
+
+    async def stop(self):
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+        if self._server is not None:
+            self._server.close()
+            self._server = None
+        tasks = []
+        for connection in list(self._connections.values()):
+            connection.task.cancel()
+            connection.writer.close()
+            tasks.append(connection.task)
+        self._connections.clear()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for process in self._processes:
+            if process.returncode is None:
+                process.terminate()
+        for process in self._processes:
+            try:
+                await asyncio.wait_for(process.wait(), timeout=5)
+            except asyncio.TimeoutError:
+                process.kill()
+        self._processes = []
+
+    # Intern
+
+    def _site(self, job):
+        probe = self.probes.get(job.url)
+        return [job.url, job.interval, job.timeout, probe.to_json() if probe is not None else None, job.current]
+
+    def _send_to(self, worker_id, message):
+        connection = self._connections.get(worker_id)
+        if connection is not None:
+            connection.queue.put_nowait(message)
+
+    def _send_sites(self, worker_id, sites):
+        for start in range(0, len(sites), ADD_BATCH):
+            self._send_to(worker_id, {"op": "add", "sites": sites[start:start + ADD_BATCH], "spread": True})
+
+    async def _start(self):
+        self._server = await asyncio.start_server(self._handle_worker, self.host, self.port, limit=STREAM_LIMIT)
+        if self.port == 0:
+            self.port = self._server.sockets[0].getsockname()[1]
+        self._log(f"Worker-Hub lauscht auf {self.host}:{self.port}")
+        # Lokale Worker als eigene Python-Prozesse (wie Worker auf anderen Hosts)
+        hub_host = "127.0.0.1" if self.host in ("0.0.0.0", "") else self.host
+        args = [os.path.abspath(__file__), "--hub", f"{hub_host}:{self.port}"]
+        env = dict(os.environ)
+        env.pop(TOKEN_ENV, None)
+        if self.token:
+            env[TOKEN_ENV] = self.token
+        for key, value in self.worker_options.items():
+            args += [f"--{key.replace('_', '-')}", str(value)]
+        for i in range(self.local_workers):
+            process = await asyncio.create_subprocess_exec(sys.executable, *args, "--id", f"local-{i}", env=env)
+            self._processes.append(process)
+
+    def _rebalance(self):
+        """Zuständigkeiten neu berechnen und nur verschobene Websites umziehen"""
+        moves_add = {}
+        moves_remove = {}
+        for job in self._jobs.values():
+            owner = self._ring.node_for(job.url)
+            if owner == job.worker:
+                continue
+            if job.worker is not None and job.worker in self._connections:
+                moves_remove.setdefault(job.worker, []).append(job.url)
+            job.worker = owner
+            if owner is not None:
+                moves_add.setdefault(owner, []).append(self._site(job))
+        for worker_id, urls in moves_remove.items():
+            self._send_to(worker_id, {"op": "remove", "urls": urls})
+        for worker_id, sites in moves_add.items():
+            self._send_sites(worker_id, sites)
+        moved = sum(len(sites) for sites in moves_add.values())
+        self._log(f"Worker: {len(self._connections)} verbunden, {moved} Websites neu verteilt")
+
+    async def _writer_loop(self, connection):
+        while True:
+            message = await connection.queue.get()
+            await _send(connection.writer, message)
+
+    async def _handle_worker(self, reader, writer):
+        connection = None
+        try:
+            hello = json.loads(await reader.readline() or b"null")
+            if not hello or hello.get("op") != "hello" or not _token_matches(hello.get("token"), self.token):
+                writer.close()
+                return
+            worker_id = str(hello["worker"])
+            old = self._connections.get(worker_id)
+            if old is not None:
+                # Gleiche ID verbindet sich neu -> alte Verbindung ersetzen
+                old.task.cancel()
+                old.writer.close()
+            connection = _Connection(worker_id, writer)
+            connection.task = asyncio.get_running_loop().create_task(self._writer_loop(connection))
+            self._connections[worker_id] = connection
+            self._ring.add(worker_id)
+            if old is not None:
+                # Der Worker hat seinen Zustand verloren -> alle seine Websites neu senden
+                for job in self._jobs.values():
+                    if job.worker == worker_id:
+                        job.worker = None
+            self._rebalance()
+
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                message = json.loads(line)
+                op = message.get("op")
+                if op == "result":
+                    self.results += 1
+                    await self._on_result(result_from_dict(message))
+                elif op == "overrun":
+                    self.overruns += 1
+                    if self._on_overrun is not None:
+                        self._on_overrun(message["url"], message["count"])
+                elif op == "log":
+                    self._log(f"[{worker_id}] {message['message']}")
+        except (ConnectionError, asyncio.IncompleteReadError, json.JSONDecodeError, ValueError, KeyError):
+            pass
+        finally:
+            if connection is not None and self._connections.get(connection.worker_id) is connection:
+                del self._connections[connection.worker_id]
+                connection.task.cancel()
+                self._ring.remove(connection.worker_id)
+                if self._server is not None:
+                    self._rebalance()
+            writer.close()
+
+
+# Worker-Seite
+
+class CheckWorker:
+    """Prüft die zugewiesenen Websites und meldet die Ergebnisse an den Hub"""
+
+    def __init__(self, worker_id, host, port, token=None, options=None):
+        options = options or {}
+        self.worker_id = worker_id
+        self.host = host
+        self.port = port
+        self.token = token
+        self.options = options
+        self.checker = ConcurrentChecker(
+            max_concurrency=options.get("max_concurrency", 50),
+            max_per_host=options.get("max_per_host", 4),
+            timeout=options.get("check_timeout", 10),
+            host_gap=options.get("host_gap", 0),
+        )
+        self.http_client = HttpClient(
+            limit=options.get("http_pool_limit", 100),
+            limit_per_host=options.get("http_pool_per_host", 10),
+            dns_ttl=options.get("dns_cache_ttl", 300),
+        )
+        self.scheduler = None
+        self.probes = {}
+        self._writer = None
+
+    def _emit(self, message):
+        if self._writer is not None and not self._writer.is_closing():
+            self._writer.write(json.dumps(message, separators=(",", ":")).encode("utf-8") + b"\n")
+
+    async def _run_check(self, url, timeout):
+        result = await self.checker.check(self.http_client.session, url, timeout=timeout, probe=self.probes.get(url))
+        self._emit(result_to_dict(result))
+        if self._writer is not None:
+            await self._writer.drain()
+
+    def _report_overrun(self, url, count):
+        self._emit({"op": "overrun", "url": url, "count": count})
+
+    def _apply(self, message):
+        op = message.get("op")
+        if op == "add":
+            sites = message["sites"]
+            for url, _, _, probe, _ in sites:
+                if probe:
+                    self.probes[url] = ProbeConfig.from_json(probe)
+                else:
+                    self.probes.pop(url, None)
+            if message.get("spread"):
+                self.scheduler.add_many((url, interval, timeout) for url, interval, timeout, _, _ in sites)
+            else:
+                for url, interval, timeout, _, _ in sites:
+                    self.scheduler.add(url, interval, timeout)
+            for url, interval, _, _, current in sites:
+                if current != interval:
+                    self.scheduler.set_interval(url, current)
+        elif op == "remove":
+            for url in message["urls"]:
+                self.scheduler.remove(url)
+                self.probes.pop(url, None)
+        elif op == "interval":
+            self.scheduler.set_interval(message["url"], message["interval"])
+        elif op == "recheck":
+            self.scheduler.recheck(message["url"], message["delay"])
+
+    async def _session(self):
+        reader, writer = await asyncio.open_connection(self.host, self.port, limit=STREAM_LIMIT)
+        self._writer = writer
+        sock = writer.get_extra_info("socket")
+        if sock is not None:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        await _send(writer, {"op": "hello", "worker": self.worker_id, "token": self.token})
+        # Pro Verbindung ein neuer Scheduler - die Zuständigkeiten kommen vom Hub
+        self.scheduler = SiteScheduler(
+            self._run_check,
+            default_timeout=self.options.get("check_timeout", 10),
+            on_overrun=self._report_overrun,
+        )
+        self.probes = {}
+        self.scheduler.start()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                self._apply(json.loads(line))
+        finally:
+            self._writer = None
+            await self.scheduler.stop()
+            writer.close()
+
+    async def run(self):
+        delay = 1
+        try:
+            while True:
+                try:
+                    await self._session()
+                    delay = 1
+                except (ConnectionError, OSError) as e:
+                    print(f"[{self.worker_id}] Keine Verbindung zum Hub ({e}), neuer Versuch in {delay}s", file=sys.stderr)
+                except (ValueError, KeyError, TypeError) as e:
+                    # Kaputte Nachricht (JSONDecodeError ist ein ValueError) -> neu verbinden
+                    print(f"[{self.worker_id}] Ungültige Nachricht vom Hub ({e!r}), neuer Versuch in {delay}s", file=sys.stderr)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 30)
+        finally:
+            await self.http_client.close()
+
+
+def run_worker(worker_id, host, port, token=None, options=None):
+    """Einstiegspunkt für Worker-Prozesse"""
+    worker = CheckWorker(worker_id, host, port, token, options)
+    try:
+        asyncio.run(worker.run())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="SiteSentinel Check-Worker")
+    parser.add_argument("--hub", default="127.0.0.1:8765", help="Adresse des Worker-Hubs (host:port)")
+    parser.add_argument("--id", default=f"{socket.gethostname()}-{os.getpid()}", help="Eindeutige Worker-ID")
+    parser.add_argument("--max-concurrency", type=_whole_number, default=50)
+    parser.add_argument("--max-per-host", type=_whole_number, default=4)
+    parser.add_argument("--host-gap", type=float, default=0)
+    parser.add_argument("--check-timeout", type=float, default=10)
+    parser.add_argument("--http-pool-limit", type=_whole_number, default=100)
+    parser.add_argument("--http-pool-per-host", type=_whole_number, default=10)
+    parser.add_argument("--dns-cache-ttl", type=float, default=300)
+    args = parser.parse_args()
+    hub_host, hub_port = args.hub.rsplit(":", 1)
+    options = {key: value for key, value in vars(args).items() if key not in ("hub", "id")}
+    # worker_token aus config.yaml, siehe TOKEN_ENV
+    run_worker(args.id, hub_host, int(hub_port), os.environ.get(TOKEN_ENV) or None, options)